@@ -0,0 +1,135 @@
+//! Database cost of the register and login paths, bcrypt excluded.
+//!
+//! `legacy` reproduces the old queries: register looked up the username and
+//! the email before inserting (three round trips), login filtered on
+//! `username = ? OR email = ?`. `current` is what the handlers do now: a bare
+//! insert that relies on the unique indexes, and `find_login_user`.
+//!
+//! Needs a migrated database in `DATABASE_URL` (read from `.env` as well);
+//! rows created here use the `bench_` prefix and are deleted afterwards.
+//! Run with `cargo bench --bench auth_db`.
+
+use criterion::{black_box, criterion_group, criterion_main, Criterion};
+use my_axum_app::handlers::auth::find_login_user;
+use my_axum_app::models::user::{ActiveModel, Column, Entity as UserEntity};
+use sea_orm::{
+    ActiveModelTrait, ColumnTrait, Database, DatabaseConnection, EntityTrait, QueryFilter, Set,
+};
+use std::env;
+use std::sync::atomic::{AtomicU64, Ordering};
+use tokio::runtime::Runtime;
+
+/// Never verified here; a fixed value keeps bcrypt out of the measurement.
+const PASSWORD_HASH: &str = "$2b$10$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchm";
+const LOGIN_USERNAME: &str = "bench_login";
+const LOGIN_EMAIL: &str = "bench_login@example.com";
+
+static NEXT_ID: AtomicU64 = AtomicU64::new(0);
+
+fn new_user() -> ActiveModel {
+    let id = NEXT_ID.fetch_add(1, Ordering::Relaxed);
+    ActiveModel {
+        username: Set(format!("bench_{}", id)),
+        email: Set(format!("bench_{}@example.com", id)),
+        password_hash: Set(PASSWORD_HASH.to_string()),
+        is_active: Set(true),
+        ..Default::default()
+    }
+}
+
+async fn legacy_register(db: &DatabaseConnection, user: ActiveModel) {
+    let username = user.username.clone().unwrap();
+    let email = user.email.clone().unwrap();
+
+    let by_username = UserEntity::find()
+        .filter(Column::Username.eq(&username))
+        .one(db)
+        .await
+        .unwrap();
+    let by_email = UserEntity::find()
+        .filter(Column::Email.eq(&email))
+        .one(db)
+        .await
+        .unwrap();
+    assert!(by_username.is_none() && by_email.is_none());
+
+    user.insert(db).await.unwrap();
+}
+
+async fn legacy_login(db: &DatabaseConnection, username_or_email: &str) {
+    let user = UserEntity::find()
+        .filter(
+            Column::Username
+                .eq(username_or_email)
+                .or(Column::Email.eq(username_or_email)),
+        )
+        .one(db)
+        .await
+        .unwrap();
+    assert!(user.is_some());
+}
+
+async fn cleanup(db: &DatabaseConnection) {
+    UserEntity::delete_many()
+        .filter(Column::Username.starts_with("bench_"))
+        .exec(db)
+        .await
+        .unwrap();
+}
+
+fn bench_auth_db(c: &mut Criterion) {
+    dotenvy::dotenv().ok();
+    let database_url = match env::var("DATABASE_URL") {
+        Ok(url) => url,
+        Err(_) => {
+            eprintln!("DATABASE_URL is not set, skipping auth_db benchmarks");
+            return;
+        }
+    };
+
+    let rt = Runtime::new().unwrap();
+    let db = rt.block_on(Database::connect(&database_url)).unwrap();
+    rt.block_on(async {
+        cleanup(&db).await;
+        ActiveModel {
+            username: Set(LOGIN_USERNAME.to_string()),
+            email: Set(LOGIN_EMAIL.to_string()),
+            password_hash: Set(PASSWORD_HASH.to_string()),
+            is_active: Set(true),
+            ..Default::default()
+        }
+        .insert(&db)
+        .await
+        .unwrap();
+    });
+
+    let mut group = c.benchmark_group("register_db");
+    group.bench_function("legacy", |b| {
+        b.iter(|| rt.block_on(legacy_register(&db, new_user())))
+    });
+    group.bench_function("current", |b| {
+        b.iter(|| rt.block_on(async { new_user().insert(&db).await.unwrap() }))
+    });
+    group.finish();
+
+    let mut group = c.benchmark_group("login_lookup");
+    for input in [LOGIN_USERNAME, LOGIN_EMAIL] {
+        let kind = if input.contains('@') { "email" } else { "username" };
+        group.bench_function(format!("legacy/{}", kind), |b| {
+            b.iter(|| rt.block_on(legacy_login(&db, black_box(input))))
+        });
+        group.bench_function(format!("current/{}", kind), |b| {
+            b.iter(|| {
+                rt.block_on(async {
+                    assert!(find_login_user(&db, black_box(input)).await.unwrap().is_some())
+                })
+            })
+        });
+    }
+    group.finish();
+
+    rt.block_on(cleanup(&db));
+}
+
+criterion_group!(benches, bench_auth_db);
+criterion_main!(benches);
@@ -0,0 +1,71 @@
+//! Per-request JWT verification cost.
+//!
+//! `legacy` reproduces what `jwt_auth_layer` did before the service moved into
+//! `AppState`: read `JWT_SECRET`, key a fresh HMAC, split the token into a
+//! `Vec`, `format!` the signed message and decode into heap buffers.
+//! `shared` is the current path through a pre-keyed `JwtService`.
+//!
+//! Run with `cargo bench --bench jwt_verify`.
+
+use base64::{engine::general_purpose, Engine as _};
+use criterion::{black_box, criterion_group, criterion_main, Criterion};
+use hmac::{Hmac, Mac};
+use my_axum_app::services::auth::{Claims, JwtService};
+use sha2::Sha256;
+use std::env;
+
+type HmacSha256 = Hmac<Sha256>;
+
+const SECRET: &str = "benchmark-secret-key-that-is-long-enough-for-hs256-signing";
+
+fn legacy_extract_user_id(token: &str) -> anyhow::Result<i32> {
+    let secret = env::var("JWT_SECRET").unwrap_or_else(|_| SECRET.to_string());
+
+    let parts: Vec<&str> = token.split('.').collect();
+    if parts.len() != 3 {
+        return Err(anyhow::anyhow!("Invalid token format"));
+    }
+
+    let message = format!("{}.{}", parts[0], parts[1]);
+    let mut mac = HmacSha256::new_from_slice(secret.as_bytes())
+        .map_err(|e| anyhow::anyhow!("Invalid secret key: {}", e))?;
+    mac.update(message.as_bytes());
+    let expected_signature = mac.finalize().into_bytes();
+    let provided_signature = general_purpose::URL_SAFE_NO_PAD.decode(parts[2])?;
+    if expected_signature[..] != provided_signature[..] {
+        return Err(anyhow::anyhow!("Invalid signature"));
+    }
+
+    let claims_bytes = general_purpose::URL_SAFE_NO_PAD.decode(parts[1])?;
+    let claims_json = String::from_utf8(claims_bytes)?;
+    let claims: Claims = serde_json::from_str(&claims_json)?;
+    if claims.exp < chrono::Utc::now().timestamp() {
+        return Err(anyhow::anyhow!("Token has expired"));
+    }
+
+    Ok(claims.sub.parse::<i32>()?)
+}
+
+fn bench_verify(c: &mut Criterion) {
+    env::set_var("JWT_SECRET", SECRET);
+
+    let service = JwtService::with_secret(SECRET.as_bytes(), 24).unwrap();
+    let token = service
+        .generate_token(42, "benchmark_user", "benchmark_user@karyawan.local", true, 0)
+        .unwrap();
+
+    assert_eq!(legacy_extract_user_id(&token).unwrap(), 42);
+    assert_eq!(service.extract_user_id(&token).unwrap(), 42);
+
+    let mut group = c.benchmark_group("jwt_verify_per_request");
+    group.bench_function("legacy", |b| {
+        b.iter(|| legacy_extract_user_id(black_box(&token)).unwrap())
+    });
+    group.bench_function("shared", |b| {
+        b.iter(|| service.extract_user_id(black_box(&token)).unwrap())
+    });
+    group.finish();
+}
+
+criterion_group!(benches, bench_verify);
+criterion_main!(benches);
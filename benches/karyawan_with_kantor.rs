@@ -0,0 +1,152 @@
+//! Round trips of the karyawan-with-kantor endpoints at 100k karyawan rows.
+//!
+//! `legacy` reproduces the old handlers: the list loaded the karyawan page
+//! and then the kantor rows with `load_one` (jabatan names would have needed
+//! a third query), the by-id lookup ran `find_by_id` plus `find_related`.
+//! `joined` is what the handlers do now: one LEFT JOIN projected by
+//! `with_kantor_columns`, which also returns `jabatan_nama`.
+//!
+//! Needs a migrated database in `DATABASE_URL` (read from `.env` as well).
+//! The benchmark creates one kantor, one jabatan and 100k karyawan named
+//! `bench_*`, and deletes them afterwards. Run with
+//! `cargo bench --bench karyawan_with_kantor`.
+
+use criterion::{black_box, criterion_group, criterion_main, Criterion};
+use my_axum_app::handlers::karyawan::{with_kantor_columns, KaryawanWithKantor};
+use my_axum_app::models::{
+    jabatan::{ActiveModel as JabatanActiveModel, Entity as JabatanEntity},
+    kantor::{ActiveModel as KantorActiveModel, Entity as KantorEntity},
+    karyawan::{ActiveModel as KaryawanActiveModel, Column, Entity as KaryawanEntity},
+};
+use rust_decimal::Decimal;
+use sea_orm::{
+    ActiveModelTrait, ColumnTrait, Database, DatabaseConnection, EntityTrait, LoaderTrait,
+    ModelTrait, QueryFilter, QueryOrder, QuerySelect, Set,
+};
+use std::env;
+use tokio::runtime::Runtime;
+
+const ROWS: usize = 100_000;
+const INSERT_BATCH: usize = 1_000;
+const PAGE_SIZE: u64 = 200;
+
+async fn seed(db: &DatabaseConnection) -> (i32, i32, i32) {
+    let kantor = KantorActiveModel {
+        nama: Set("bench_kantor".to_string()),
+        alamat: Set("bench".to_string()),
+        longitude: Set(Decimal::ZERO),
+        latitude: Set(Decimal::ZERO),
+        ..Default::default()
+    }
+    .insert(db)
+    .await
+    .unwrap();
+    let jabatan = JabatanActiveModel {
+        nama_jabatan: Set("bench_jabatan".to_string()),
+        ..Default::default()
+    }
+    .insert(db)
+    .await
+    .unwrap();
+
+    for batch in (0..ROWS).collect::<Vec<_>>().chunks(INSERT_BATCH) {
+        let rows = batch.iter().map(|i| KaryawanActiveModel {
+            nama: Set(format!("bench_{}", i)),
+            gaji: Set(5_000_000),
+            kantor_id: Set(kantor.id),
+            jabatan_id: Set(jabatan.id),
+            ..Default::default()
+        });
+        KaryawanEntity::insert_many(rows).exec(db).await.unwrap();
+    }
+
+    let middle = KaryawanEntity::find()
+        .filter(Column::Nama.eq(format!("bench_{}", ROWS / 2)))
+        .one(db)
+        .await
+        .unwrap()
+        .unwrap();
+    (kantor.id, jabatan.id, middle.id)
+}
+
+async fn cleanup(db: &DatabaseConnection, kantor_id: i32, jabatan_id: i32) {
+    KaryawanEntity::delete_many()
+        .filter(Column::KantorId.eq(kantor_id))
+        .exec(db)
+        .await
+        .unwrap();
+    KantorEntity::delete_by_id(kantor_id).exec(db).await.unwrap();
+    JabatanEntity::delete_by_id(jabatan_id).exec(db).await.unwrap();
+}
+
+async fn legacy_page(db: &DatabaseConnection) -> usize {
+    let karyawans = KaryawanEntity::find()
+        .order_by_asc(Column::Id)
+        .limit(PAGE_SIZE)
+        .all(db)
+        .await
+        .unwrap();
+    let kantors = karyawans.load_one(KantorEntity, db).await.unwrap();
+    let jabatans = karyawans.load_one(JabatanEntity, db).await.unwrap();
+    karyawans.len() + kantors.len() + jabatans.len()
+}
+
+async fn joined_page(db: &DatabaseConnection) -> usize {
+    with_kantor_columns(KaryawanEntity::find().order_by_asc(Column::Id).limit(PAGE_SIZE))
+        .into_model::<KaryawanWithKantor>()
+        .all(db)
+        .await
+        .unwrap()
+        .len()
+}
+
+async fn legacy_by_id(db: &DatabaseConnection, id: i32) {
+    let karyawan = KaryawanEntity::find_by_id(id).one(db).await.unwrap().unwrap();
+    let kantor = karyawan.find_related(KantorEntity).one(db).await.unwrap();
+    let jabatan = karyawan.find_related(JabatanEntity).one(db).await.unwrap();
+    assert!(kantor.is_some() && jabatan.is_some());
+}
+
+async fn joined_by_id(db: &DatabaseConnection, id: i32) {
+    let karyawan = with_kantor_columns(KaryawanEntity::find_by_id(id))
+        .into_model::<KaryawanWithKantor>()
+        .one(db)
+        .await
+        .unwrap()
+        .unwrap();
+    assert!(karyawan.kantor_nama.is_some() && karyawan.jabatan_nama.is_some());
+}
+
+fn bench_with_kantor(c: &mut Criterion) {
+    dotenvy::dotenv().ok();
+    let database_url = match env::var("DATABASE_URL") {
+        Ok(url) => url,
+        Err(_) => {
+            eprintln!("DATABASE_URL is not set, skipping karyawan_with_kantor benchmarks");
+            return;
+        }
+    };
+
+    let rt = Runtime::new().unwrap();
+    let db = rt.block_on(Database::connect(&database_url)).unwrap();
+    let (kantor_id, jabatan_id, middle_id) = rt.block_on(seed(&db));
+
+    let mut group = c.benchmark_group("with_kantor_page");
+    group.bench_function("legacy", |b| b.iter(|| rt.block_on(legacy_page(&db))));
+    group.bench_function("joined", |b| b.iter(|| rt.block_on(joined_page(&db))));
+    group.finish();
+
+    let mut group = c.benchmark_group("with_kantor_by_id");
+    group.bench_function("legacy", |b| {
+        b.iter(|| rt.block_on(legacy_by_id(&db, black_box(middle_id))))
+    });
+    group.bench_function("joined", |b| {
+        b.iter(|| rt.block_on(joined_by_id(&db, black_box(middle_id))))
+    });
+    group.finish();
+
+    rt.block_on(cleanup(&db, kantor_id, jabatan_id));
+}
+
+criterion_group!(benches, bench_with_kantor);
+criterion_main!(benches);
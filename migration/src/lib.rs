@@ -15,6 +15,13 @@ mod m20251031_194811_create_jabatan_table;
 mod m20251031_194846_add_jabatan_id_to_karyawan;
 mod m20251101_000001_remove_posisi_from_karyawan;
 mod m20251101_100000_add_user_tracking_to_jabatan;
+mod m20251102_000001_add_security_epoch_to_users;
+mod m20251103_000001_add_karyawan_list_indexes;
+mod m20251104_000001_add_karyawan_stats_indexes;
+mod m20251105_000001_add_fulltext_search_indexes;
+mod m20251106_000001_add_kantor_location;
+mod m20251107_000001_add_sync_support;
+mod m20251108_000001_add_needs_account_to_karyawan;
 
 pub struct Migrator;
 
@@ -37,6 +44,13 @@ impl MigratorTrait for Migrator {
             Box::new(m20251031_194846_add_jabatan_id_to_karyawan::Migration),
             Box::new(m20251101_000001_remove_posisi_from_karyawan::Migration),
             Box::new(m20251101_100000_add_user_tracking_to_jabatan::Migration),
+            Box::new(m20251102_000001_add_security_epoch_to_users::Migration),
+            Box::new(m20251103_000001_add_karyawan_list_indexes::Migration),
+            Box::new(m20251104_000001_add_karyawan_stats_indexes::Migration),
+            Box::new(m20251105_000001_add_fulltext_search_indexes::Migration),
+            Box::new(m20251106_000001_add_kantor_location::Migration),
+            Box::new(m20251107_000001_add_sync_support::Migration),
+            Box::new(m20251108_000001_add_needs_account_to_karyawan::Migration),
         ]
     }
 }
\ No newline at end of file
@@ -0,0 +1,102 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+/// Indexes on foreign key columns: (index, foreign key, column, referenced table, on delete).
+const FOREIGN_KEY_INDEXES: [(&str, &str, Karyawan, Referenced, ForeignKeyAction); 3] = [
+    ("idx_karyawan_kantor_id", "fk_karyawan_kantor_id", Karyawan::KantorId, Referenced::Kantor, ForeignKeyAction::Restrict),
+    ("idx_karyawan_jabatan_id", "fk_karyawan_jabatan_id", Karyawan::JabatanId, Referenced::Jabatan, ForeignKeyAction::Restrict),
+    ("idx_karyawan_user_id", "fk_karyawan_user_id", Karyawan::UserId, Referenced::Users, ForeignKeyAction::SetNull),
+];
+
+/// Indexes for the `nama` prefix filter and the name/recency sorts.
+const SORT_INDEXES: [(&str, Karyawan); 2] = [
+    ("idx_karyawan_nama", Karyawan::Nama),
+    ("idx_karyawan_updated_at", Karyawan::UpdatedAt),
+];
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // Indexes for the filters and sorts of GET /api/karyawans. InnoDB
+        // appends the primary key to every secondary index, so each one also
+        // serves the (column, id) keyset order used for pagination.
+        let indexes = FOREIGN_KEY_INDEXES
+            .iter()
+            .map(|(name, _, column, _, _)| (*name, *column))
+            .chain(SORT_INDEXES);
+
+        for (name, column) in indexes {
+            manager
+                .create_index(
+                    Index::create()
+                        .name(name)
+                        .table(Karyawan::Table)
+                        .col(column)
+                        .to_owned(),
+                )
+                .await?;
+        }
+
+        Ok(())
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        for (name, _) in SORT_INDEXES {
+            manager
+                .drop_index(Index::drop().name(name).table(Karyawan::Table).to_owned())
+                .await?;
+        }
+
+        // MySQL discards the implicit foreign key index once one of ours
+        // covers the column and refuses to drop ours while the foreign key
+        // needs it, so recreate each foreign key around the drop.
+        for (name, fk_name, column, referenced, on_delete) in FOREIGN_KEY_INDEXES {
+            manager
+                .drop_foreign_key(
+                    ForeignKey::drop()
+                        .name(fk_name)
+                        .table(Karyawan::Table)
+                        .to_owned(),
+                )
+                .await?;
+
+            manager
+                .drop_index(Index::drop().name(name).table(Karyawan::Table).to_owned())
+                .await?;
+
+            manager
+                .create_foreign_key(
+                    ForeignKey::create()
+                        .name(fk_name)
+                        .from(Karyawan::Table, column)
+                        .to(referenced, Referenced::Id)
+                        .on_delete(on_delete)
+                        .on_update(ForeignKeyAction::Cascade)
+                        .to_owned(),
+                )
+                .await?;
+        }
+
+        Ok(())
+    }
+}
+
+#[derive(DeriveIden, Clone, Copy)]
+enum Karyawan {
+    Table,
+    KantorId,
+    JabatanId,
+    UserId,
+    Nama,
+    UpdatedAt,
+}
+
+#[derive(DeriveIden, Clone, Copy)]
+enum Referenced {
+    Kantor,
+    Jabatan,
+    Users,
+    Id,
+}
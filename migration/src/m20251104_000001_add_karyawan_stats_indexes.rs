@@ -0,0 +1,53 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+/// (index, group column): one covering index per stats dimension.
+const STATS_INDEXES: [(&str, Karyawan); 2] = [
+    ("idx_karyawan_kantor_gaji", Karyawan::KantorId),
+    ("idx_karyawan_jabatan_gaji", Karyawan::JabatanId),
+];
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // GET /api/kantors/stats and /api/jabatans/stats group karyawan by
+        // kantor_id / jabatan_id and aggregate gaji. With (group, gaji) the
+        // aggregate is answered from the index without reading table rows.
+        // The single-column indexes stay: they keep the (column, id) order
+        // that the filtered, keyset-paginated lists rely on.
+        for (name, column) in STATS_INDEXES {
+            manager
+                .create_index(
+                    Index::create()
+                        .name(name)
+                        .table(Karyawan::Table)
+                        .col(column)
+                        .col(Karyawan::Gaji)
+                        .to_owned(),
+                )
+                .await?;
+        }
+
+        Ok(())
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        for (name, _) in STATS_INDEXES {
+            manager
+                .drop_index(Index::drop().name(name).table(Karyawan::Table).to_owned())
+                .await?;
+        }
+
+        Ok(())
+    }
+}
+
+#[derive(DeriveIden, Clone, Copy)]
+enum Karyawan {
+    Table,
+    KantorId,
+    JabatanId,
+    Gaji,
+}
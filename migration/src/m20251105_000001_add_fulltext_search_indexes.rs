@@ -0,0 +1,41 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+/// (index, table, columns) searched by GET /api/search.
+const FULLTEXT_INDEXES: [(&str, &str, &str); 2] = [
+    ("ft_karyawan_nama", "karyawan", "nama"),
+    ("ft_kantor_nama_alamat", "kantor", "nama, alamat"),
+];
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // The ngram parser indexes every ngram_token_size-character substring
+        // (2 by default), so "udi" finds "Budi" and names without spaces are
+        // still searchable. sea-query cannot express WITH PARSER, hence raw SQL.
+        for (name, table, columns) in FULLTEXT_INDEXES {
+            manager
+                .get_connection()
+                .execute_unprepared(&format!(
+                    "ALTER TABLE {} ADD FULLTEXT INDEX {} ({}) WITH PARSER ngram",
+                    table, name, columns
+                ))
+                .await?;
+        }
+
+        Ok(())
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        for (name, table, _) in FULLTEXT_INDEXES {
+            manager
+                .get_connection()
+                .execute_unprepared(&format!("ALTER TABLE {} DROP INDEX {}", table, name))
+                .await?;
+        }
+
+        Ok(())
+    }
+}
@@ -0,0 +1,35 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // POINT(longitude, latitude) kept in sync by MySQL, for the bounding
+        // box prefilter of GET /api/kantors/nearby. SRID 0 makes the box a
+        // plain longitude/latitude rectangle; the column needs an explicit
+        // SRID (and NOT NULL, STORED) before the optimizer uses its SPATIAL
+        // index. sea-query cannot express generated columns, hence raw SQL.
+        let db = manager.get_connection();
+        db.execute_unprepared(
+            "ALTER TABLE kantor ADD COLUMN location POINT \
+             GENERATED ALWAYS AS (POINT(longitude, latitude)) STORED NOT NULL SRID 0",
+        )
+        .await?;
+        db.execute_unprepared("ALTER TABLE kantor ADD SPATIAL INDEX sidx_kantor_location (location)")
+            .await?;
+
+        Ok(())
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        let db = manager.get_connection();
+        db.execute_unprepared("ALTER TABLE kantor DROP INDEX sidx_kantor_location")
+            .await?;
+        db.execute_unprepared("ALTER TABLE kantor DROP COLUMN location")
+            .await?;
+
+        Ok(())
+    }
+}
@@ -0,0 +1,137 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // Ids deleted from karyawan, kantor and jabatan, so the
+        // GET /api/<table>/changes endpoints can report deletions.
+        manager
+            .create_table(
+                Table::create()
+                    .table(SyncTombstones::Table)
+                    .if_not_exists()
+                    .col(
+                        ColumnDef::new(SyncTombstones::Id)
+                            .big_integer()
+                            .not_null()
+                            .auto_increment()
+                            .primary_key(),
+                    )
+                    .col(ColumnDef::new(SyncTombstones::TableName).string_len(32).not_null())
+                    .col(ColumnDef::new(SyncTombstones::RecordId).integer().not_null())
+                    .col(
+                        ColumnDef::new(SyncTombstones::DeletedAt)
+                            .timestamp()
+                            .not_null()
+                            .default(Expr::current_timestamp()),
+                    )
+                    .to_owned(),
+            )
+            .await?;
+
+        // (table_name, deleted_at, id): InnoDB appends the primary key.
+        manager
+            .create_index(
+                Index::create()
+                    .name("idx_sync_tombstones_table_deleted_at")
+                    .table(SyncTombstones::Table)
+                    .col(SyncTombstones::TableName)
+                    .col(SyncTombstones::DeletedAt)
+                    .to_owned(),
+            )
+            .await?;
+
+        // Changes are read in (updated_at, id) order. karyawan already has
+        // idx_karyawan_updated_at, which InnoDB extends with id.
+        manager
+            .create_index(
+                Index::create()
+                    .name("idx_kantor_updated_at")
+                    .table(Kantor::Table)
+                    .col(Kantor::UpdatedAt)
+                    .col(Kantor::Id)
+                    .to_owned(),
+            )
+            .await?;
+        manager
+            .create_index(
+                Index::create()
+                    .name("idx_jabatan_updated_at")
+                    .table(Jabatan::Table)
+                    .col(Jabatan::UpdatedAt)
+                    .col(Jabatan::Id)
+                    .to_owned(),
+            )
+            .await?;
+
+        // Unlike karyawan and kantor, jabatan.updated_at was never bumped on
+        // update, so updated jabatan would not show up as changed.
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Jabatan::Table)
+                    .modify_column(
+                        ColumnDef::new(Jabatan::UpdatedAt)
+                            .timestamp()
+                            .not_null()
+                            .default(Expr::current_timestamp())
+                            .extra("ON UPDATE CURRENT_TIMESTAMP".to_string()),
+                    )
+                    .to_owned(),
+            )
+            .await
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Jabatan::Table)
+                    .modify_column(
+                        ColumnDef::new(Jabatan::UpdatedAt)
+                            .timestamp()
+                            .not_null()
+                            .default(Expr::current_timestamp()),
+                    )
+                    .to_owned(),
+            )
+            .await?;
+
+        manager
+            .drop_index(Index::drop().name("idx_jabatan_updated_at").table(Jabatan::Table).to_owned())
+            .await?;
+        manager
+            .drop_index(Index::drop().name("idx_kantor_updated_at").table(Kantor::Table).to_owned())
+            .await?;
+
+        manager
+            .drop_table(Table::drop().table(SyncTombstones::Table).to_owned())
+            .await
+    }
+}
+
+#[derive(DeriveIden)]
+enum SyncTombstones {
+    Table,
+    Id,
+    TableName,
+    RecordId,
+    DeletedAt,
+}
+
+#[derive(DeriveIden)]
+enum Kantor {
+    Table,
+    Id,
+    UpdatedAt,
+}
+
+#[derive(DeriveIden)]
+enum Jabatan {
+    Table,
+    Id,
+    UpdatedAt,
+}
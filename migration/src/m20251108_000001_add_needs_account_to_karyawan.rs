@@ -0,0 +1,66 @@
+use sea_orm_migration::prelude::*;
+
+#[derive(DeriveMigrationName)]
+pub struct Migration;
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // Set when a karyawan is inserted without an account, cleared once the
+        // user provisioner links one (or gives up). `user_id IS NULL` alone is
+        // not enough: fk_karyawan_user_id is ON DELETE SET NULL, so deleting
+        // an account would make the provisioner recreate it. Existing rows
+        // are left unmarked for the same reason.
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Karyawan::Table)
+                    .add_column(
+                        ColumnDef::new(Karyawan::NeedsAccount)
+                            .boolean()
+                            .not_null()
+                            .default(false),
+                    )
+                    .to_owned(),
+            )
+            .await?;
+
+        // (needs_account, id): InnoDB appends the primary key, which the
+        // provisioner scans in order.
+        manager
+            .create_index(
+                Index::create()
+                    .name("idx_karyawan_needs_account")
+                    .table(Karyawan::Table)
+                    .col(Karyawan::NeedsAccount)
+                    .to_owned(),
+            )
+            .await
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        manager
+            .drop_index(
+                Index::drop()
+                    .name("idx_karyawan_needs_account")
+                    .table(Karyawan::Table)
+                    .to_owned(),
+            )
+            .await?;
+
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Karyawan::Table)
+                    .drop_column(Karyawan::NeedsAccount)
+                    .to_owned(),
+            )
+            .await
+    }
+}
+
+#[derive(DeriveIden)]
+enum Karyawan {
+    Table,
+    NeedsAccount,
+}
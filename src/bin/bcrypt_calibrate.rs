@@ -0,0 +1,41 @@
+//! Pick a `BCRYPT_COST` for this host.
+//!
+//! Hashes at increasing costs and reports the highest one whose hash time
+//! stays within the target latency (milliseconds, default 250):
+//!
+//! ```text
+//! cargo run --release --bin bcrypt_calibrate -- 250
+//! ```
+
+use my_axum_app::services::auth::PasswordService;
+use std::{env, process, time::Duration};
+
+fn main() {
+    let target_ms = match env::args().nth(1) {
+        Some(arg) => match arg.parse::<u64>() {
+            Ok(ms) if ms > 0 => ms,
+            _ => {
+                eprintln!("❌ Usage: bcrypt_calibrate [target_ms]");
+                process::exit(2);
+            }
+        },
+        None => 250,
+    };
+
+    println!("⏱️  Calibrating bcrypt cost for a target of {} ms per hash", target_ms);
+
+    let (cost, timings) = match PasswordService::calibrate_cost(Duration::from_millis(target_ms)) {
+        Ok(result) => result,
+        Err(err) => {
+            eprintln!("❌ Calibration failed: {}", err);
+            process::exit(1);
+        }
+    };
+
+    for (measured_cost, elapsed) in &timings {
+        println!("   cost {:>2}: {:>8.1} ms", measured_cost, elapsed.as_secs_f64() * 1000.0);
+    }
+
+    println!("✅ Recommended setting: BCRYPT_COST={}", cost);
+    println!("   Existing hashes are upgraded on the next successful login.");
+}
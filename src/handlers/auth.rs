@@ -1,28 +1,59 @@
 use axum::{
-    extract::{Request, State},
+    extract::State,
     http::StatusCode,
-    Json,
+    Extension, Json,
 };
 use sea_orm::{
-    ActiveModelTrait, ColumnTrait, DatabaseConnection, EntityTrait, QueryFilter, Set,
+    sea_query::Expr, ActiveModelTrait, ColumnTrait, DatabaseConnection, DbErr, EntityTrait,
+    QueryFilter, Set, SqlErr,
 };
+use std::sync::Arc;
 use validator::Validate;
 
 use crate::{
+    middleware::throttle::{too_many_attempts_message, ClientIp},
     models::{
         common::ApiResponse,
         user::{
-            Entity as UserEntity, LoginRequest, LoginResponse, RegisterRequest, UserResponse,
-            Model as UserModel,
+            Entity as UserEntity, LoginRequest, LoginResponse, RefreshRequest, RegisterRequest,
+            TokenResponse, UserResponse, Model as UserModel,
         },
     },
-    services::auth::{JwtService, PasswordService},
+    services::{
+        auth::{JwtService, PasswordService},
+        login_throttle::LoginThrottle,
+        password_pool::{PasswordPool, PasswordPoolError},
+        refresh::{RefreshError, RefreshStore, RefreshSubject},
+        revocation::Revocation,
+    },
+    state::AppState,
     validators::security::SecurityValidator,
 };
 
 pub async fn register(
     State(db): State<DatabaseConnection>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(login_throttle): State<Arc<LoginThrottle>>,
+    Extension(client_ip): Extension<ClientIp>,
     Json(request): Json<RegisterRequest>,
+) -> Result<Json<ApiResponse<UserResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+    let result = register_user(&db, &password_pool, request).await;
+
+    // Failed registrations (invalid input, taken username/email) count
+    // against the IP; successful ones and server errors do not
+    if let Err((status, _)) = &result {
+        if status.is_client_error() {
+            login_throttle.record_failed_registration(client_ip.0);
+        }
+    }
+
+    result
+}
+
+async fn register_user(
+    db: &DatabaseConnection,
+    password_pool: &PasswordPool,
+    request: RegisterRequest,
 ) -> Result<Json<ApiResponse<UserResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
     // Validate request
     if let Err(errors) = request.validate() {
@@ -88,39 +119,18 @@ pub async fn register(
         None => None,
     };
 
-    // Check if username already exists
-    if let Ok(Some(_)) = UserEntity::find()
-        .filter(crate::models::user::Column::Username.eq(&sanitized_username))
-        .one(&db)
-        .await
-    {
-        return Err((
-            StatusCode::CONFLICT,
-            Json(ApiResponse::error(
-                "Registration failed".to_string(),
-                vec!["Username sudah digunakan".to_string()],
-            )),
-        ));
-    }
-
-    // Check if email already exists
-    if let Ok(Some(_)) = UserEntity::find()
-        .filter(crate::models::user::Column::Email.eq(&sanitized_email))
-        .one(&db)
-        .await
-    {
-        return Err((
-            StatusCode::CONFLICT,
-            Json(ApiResponse::error(
-                "Registration failed".to_string(),
-                vec!["Email sudah digunakan".to_string()],
-            )),
-        ));
-    }
-
-    // Hash password
-    let password_hash = match PasswordService::hash_password(&request.password) {
+    // Hash password on the dedicated bcrypt pool
+    let password_hash = match password_pool.hash_password(&request.password).await {
         Ok(hash) => hash,
+        Err(PasswordPoolError::Busy) => {
+            return Err((
+                StatusCode::SERVICE_UNAVAILABLE,
+                Json(ApiResponse::error(
+                    "Registration failed".to_string(),
+                    vec!["Server sedang sibuk, silakan coba lagi".to_string()],
+                )),
+            ));
+        }
         Err(_) => {
             return Err((
                 StatusCode::INTERNAL_SERVER_ERROR,
@@ -142,7 +152,9 @@ pub async fn register(
         ..Default::default()
     };
 
-    match new_user.insert(&db).await {
+    // The unique indexes on username and email do the duplicate check, in the
+    // same round trip as the insert and without a check-then-insert race
+    match new_user.insert(db).await {
         Ok(user) => {
             let user_response = UserResponse::from(user);
             Ok(Json(ApiResponse::success(
@@ -151,6 +163,16 @@ pub async fn register(
             )))
         }
         Err(err) => {
+            if let Some(message) = duplicate_user_message(&err) {
+                return Err((
+                    StatusCode::CONFLICT,
+                    Json(ApiResponse::error(
+                        "Registration failed".to_string(),
+                        vec![message.to_string()],
+                    )),
+                ));
+            }
+
             eprintln!("Database error during registration: {}", err);
             Err((
                 StatusCode::INTERNAL_SERVER_ERROR,
@@ -165,6 +187,12 @@ pub async fn register(
 
 pub async fn login(
     State(db): State<DatabaseConnection>,
+    State(jwt_service): State<Arc<JwtService>>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(refresh_store): State<Arc<RefreshStore>>,
+    State(login_throttle): State<Arc<LoginThrottle>>,
+    State(user_cache): State<Arc<UserCache>>,
+    Extension(client_ip): Extension<ClientIp>,
     Json(request): Json<LoginRequest>,
 ) -> Result<Json<ApiResponse<LoginResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
     // Validate request
@@ -188,19 +216,26 @@ pub async fn login(
         ));
     }
 
+    // Reject accounts over their failure budget (from this IP) before any DB
+    // or bcrypt work
+    let account = LoginThrottle::account_key(&request.username_or_email);
+    if let Err(retry_after) = login_throttle.check_account(client_ip.0, &account) {
+        return Err((
+            StatusCode::TOO_MANY_REQUESTS,
+            Json(ApiResponse::error(
+                "Login failed".to_string(),
+                vec![too_many_attempts_message(retry_after)],
+            )),
+        ));
+    }
+
     // Find user by username or email
-    let user = UserEntity::find()
-        .filter(
-            crate::models::user::Column::Username
-                .eq(&request.username_or_email)
-                .or(crate::models::user::Column::Email.eq(&request.username_or_email)),
-        )
-        .one(&db)
-        .await;
+    let user = find_login_user(&db, &request.username_or_email).await;
 
     let user = match user {
         Ok(Some(user)) => user,
         Ok(None) => {
+            login_throttle.record_failure(client_ip.0, &account);
             return Err((
                 StatusCode::UNAUTHORIZED,
                 Json(ApiResponse::error(
@@ -232,24 +267,31 @@ pub async fn login(
         ));
     }
 
-    // Verify password
-    match PasswordService::verify_password(&request.password, &user.password_hash) {
+    // Verify password on the dedicated bcrypt pool
+    match password_pool.verify_password(&request.password, &user.password_hash).await {
         Ok(true) => {
-            // Generate JWT token
-            let jwt_service = match JwtService::new() {
-                Ok(service) => service,
-                Err(_) => {
-                    return Err((
-                        StatusCode::INTERNAL_SERVER_ERROR,
-                        Json(ApiResponse::error(
-                            "Login failed".to_string(),
-                            vec!["Token generation error".to_string()],
-                        )),
-                    ));
-                }
-            };
+            login_throttle.record_success(client_ip.0, &account);
 
-            let token = match jwt_service.generate_token(user.id, &user.username, &user.email) {
+            // Upgrade hashes made with another cost once the response is out
+            if PasswordService::needs_rehash(&user.password_hash) {
+                spawn_rehash(
+                    db.clone(),
+                    password_pool.clone(),
+                    user_cache.clone(),
+                    user.id,
+                    user.password_hash.clone(),
+                    request.password.clone(),
+                );
+            }
+
+            // Generate JWT token
+            let token = match jwt_service.generate_token(
+                user.id,
+                &user.username,
+                &user.email,
+                user.is_active,
+                user.security_epoch,
+            ) {
                 Ok(token) => token,
                 Err(_) => {
                     return Err((
@@ -262,13 +304,18 @@ pub async fn login(
                 }
             };
 
+            // Start a refresh-token session so the client can renew without bcrypt
+            let (family, generation) = refresh_store.issue(RefreshSubject::from(&user));
+            let refresh_token = jwt_service.generate_refresh_token(&family, generation);
+
             let user_response = UserResponse::from(user);
-            let expires_in = JwtService::get_token_expiry_hours() * 3600; // Convert to seconds
 
             let login_response = LoginResponse {
                 user: user_response,
                 token,
-                expires_in,
+                expires_in: jwt_service.expiry_seconds(),
+                refresh_token,
+                refresh_expires_in: refresh_store.ttl_seconds(),
             };
 
             Ok(Json(ApiResponse::success(
@@ -276,11 +323,21 @@ pub async fn login(
                 login_response,
             )))
         }
-        Ok(false) => Err((
-            StatusCode::UNAUTHORIZED,
+        Ok(false) => {
+            login_throttle.record_failure(client_ip.0, &account);
+            Err((
+                StatusCode::UNAUTHORIZED,
+                Json(ApiResponse::error(
+                    "Login failed".to_string(),
+                    vec!["Username/email atau password salah".to_string()],
+                )),
+            ))
+        }
+        Err(PasswordPoolError::Busy) => Err((
+            StatusCode::SERVICE_UNAVAILABLE,
             Json(ApiResponse::error(
                 "Login failed".to_string(),
-                vec!["Username/email atau password salah".to_string()],
+                vec!["Server sedang sibuk, silakan coba lagi".to_string()],
             )),
         )),
         Err(_) => Err((
@@ -293,101 +350,288 @@ pub async fn login(
     }
 }
 
-pub async fn me(
-    State(db): State<DatabaseConnection>,
-    request: Request,
-) -> Result<Json<ApiResponse<UserResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
-    // Extract authorization header
-    let auth_header = request
-        .headers()
-        .get(axum::http::header::AUTHORIZATION)
-        .and_then(|header| header.to_str().ok())
-        .and_then(|header| {
-            if header.starts_with("Bearer ") {
-                Some(header.trim_start_matches("Bearer "))
-            } else {
-                None
+/// Re-hash a password at the configured `BCRYPT_COST` in the background.
+///
+/// The update only applies while the stored hash is still `old_hash`, so a
+/// password changed in the meantime is never overwritten. A busy pool or a
+/// failed update is skipped; the next login tries again. A stored hash drops
+/// the user's `UserCache` entry so the cached row is not served stale.
+fn spawn_rehash(
+    db: DatabaseConnection,
+    password_pool: Arc<PasswordPool>,
+    user_cache: Arc<UserCache>,
+    user_id: i32,
+    old_hash: String,
+    password: String,
+) {
+    tokio::spawn(async move {
+        let new_hash = match password_pool.hash_password(&password).await {
+            Ok(hash) => hash,
+            Err(err) => {
+                eprintln!("⚠️  Skipping password rehash for user {}: {}", user_id, err);
+                return;
             }
-        });
+        };
 
-    let token = match auth_header {
-        Some(token) => token,
-        None => {
-            return Err((
-                StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["Missing authorization header".to_string()],
-                )),
-            ));
+        let result = UserEntity::update_many()
+            .col_expr(
+                crate::models::user::Column::PasswordHash,
+                Expr::value(new_hash),
+            )
+            .filter(crate::models::user::Column::Id.eq(user_id))
+            .filter(crate::models::user::Column::PasswordHash.eq(old_hash))
+            .exec(&db)
+            .await;
+
+        match result {
+            Ok(result) if result.rows_affected > 0 => user_cache.invalidate(user_id),
+            Ok(_) => {}
+            Err(err) => {
+                eprintln!("⚠️  Failed to store rehashed password for user {}: {}", user_id, err);
+            }
         }
-    };
+    });
+}
+
+/// Columns to look a login up by, in order: email first when the input
+/// contains `@`, then username.
+///
+/// Usernames may contain `@` too (auto-created karyawan accounts keep
+/// whatever `nama` held), so the username lookup is never skipped.
+fn login_lookup_columns(username_or_email: &str) -> Vec<crate::models::user::Column> {
+    use crate::models::user::Column;
 
-    // Initialize JWT service
-    let jwt_service = match JwtService::new() {
-        Ok(service) => service,
+    if username_or_email.contains('@') {
+        vec![Column::Email, Column::Username]
+    } else {
+        vec![Column::Username]
+    }
+}
+
+/// Find the user for a login, matching the same row as the old
+/// `username = ? OR email = ?` filter (email first when both match).
+///
+/// Each lookup is a single-column equality that MySQL answers from one unique
+/// index instead of an index merge; the common case needs only one of them.
+pub async fn find_login_user(
+    db: &DatabaseConnection,
+    username_or_email: &str,
+) -> Result<Option<UserModel>, DbErr> {
+    for column in login_lookup_columns(username_or_email) {
+        let user = UserEntity::find()
+            .filter(column.eq(username_or_email))
+            .one(db)
+            .await?;
+        if user.is_some() {
+            return Ok(user);
+        }
+    }
+
+    Ok(None)
+}
+
+/// Message for a duplicate-key error on the `users` unique indexes, if `err`
+/// is one.
+fn duplicate_user_message(err: &DbErr) -> Option<&'static str> {
+    match err.sql_err() {
+        Some(SqlErr::UniqueConstraintViolation(message)) => Some(duplicate_key_message(&message)),
+        _ => None,
+    }
+}
+
+/// MySQL reports `Duplicate entry '<value>' for key 'users.email'` (8.0) or
+/// `... for key 'email'` (5.7); only the key name is inspected, since the
+/// duplicated value itself may contain either word.
+fn duplicate_key_message(message: &str) -> &'static str {
+    let key = message
+        .rsplit("for key")
+        .next()
+        .unwrap_or_default()
+        .trim()
+        .trim_matches('\'');
+    match key.rsplit('.').next().unwrap_or(key) {
+        "email" => "Email sudah digunakan",
+        "username" => "Username sudah digunakan",
+        _ => "Username atau email sudah digunakan",
+    }
+}
+
+/// Exchange a refresh token for a new access token and a rotated refresh token.
+///
+/// Costs two HMACs, a map lookup and one primary-key read of the user; bcrypt
+/// is not involved. The presented refresh token is consumed: using it a
+/// second time revokes the whole session. Deleted or deactivated users, and
+/// users whose security epoch was bumped since login, lose every session.
+pub async fn refresh(
+    State(state): State<AppState>,
+    Json(request): Json<RefreshRequest>,
+) -> Result<Json<ApiResponse<TokenResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+    if request.validate().is_err() {
+        return Err(refresh_error(StatusCode::BAD_REQUEST, "Refresh token tidak valid"));
+    }
+
+    let (family, generation) = match state.jwt.verify_refresh_token(&request.refresh_token) {
+        Ok(parts) => parts,
         Err(_) => {
-            return Err((
-                StatusCode::INTERNAL_SERVER_ERROR,
-                Json(ApiResponse::error(
-                    "Authentication error".to_string(),
-                    vec!["JWT service initialization failed".to_string()],
-                )),
-            ));
+            return Err(refresh_error(StatusCode::UNAUTHORIZED, "Refresh token tidak valid"));
         }
     };
 
-    // Verify and extract user ID from token
-    let user_id = match jwt_service.extract_user_id(token) {
-        Ok(id) => id,
-        Err(_) => {
-            return Err((
+    let (subject, next_generation) = match state.refresh_tokens.rotate(family, generation) {
+        Ok(rotated) => rotated,
+        Err(RefreshError::Unknown) => {
+            return Err(refresh_error(StatusCode::UNAUTHORIZED, "Refresh token tidak valid"));
+        }
+        Err(RefreshError::Expired) => {
+            return Err(refresh_error(
                 StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["Invalid or expired token".to_string()],
-                )),
+                "Sesi telah berakhir, silakan login kembali",
             ));
         }
-    };
-
-    // Fetch user from database
-    let user = match UserEntity::find_by_id(user_id).one(&db).await {
-        Ok(Some(user)) => user,
-        Ok(None) => {
-            return Err((
+        Err(RefreshError::Reused) => {
+            return Err(refresh_error(
                 StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["User not found".to_string()],
-                )),
+                "Refresh token sudah digunakan, silakan login kembali",
             ));
         }
+    };
+
+    // The session can outlive the account, so read the user row itself;
+    // neither the user cache nor the stateless epoch table is current enough
+    let user = match UserEntity::find_by_id(subject.user_id).one(&state.db).await {
+        Ok(Some(user)) if !user.is_active => Err(Revocation::Inactive),
+        Ok(Some(user)) if user.security_epoch > subject.security_epoch => Err(Revocation::Revoked),
+        Ok(Some(user)) => Ok(user),
+        Ok(None) => Err(Revocation::Deleted),
         Err(_) => {
-            return Err((
+            return Err(refresh_error(StatusCode::INTERNAL_SERVER_ERROR, "Database error"));
+        }
+    };
+    let user = match user {
+        Ok(user) => user,
+        Err(revocation) => {
+            state.refresh_tokens.revoke_user(subject.user_id);
+            state.user_cache.invalidate(subject.user_id);
+            return Err(match revocation {
+                Revocation::Revoked => refresh_error(
+                    StatusCode::UNAUTHORIZED,
+                    "Sesi telah dicabut, silakan login kembali",
+                ),
+                Revocation::Inactive => {
+                    refresh_error(StatusCode::FORBIDDEN, "Account is not active")
+                }
+                Revocation::Deleted => refresh_error(StatusCode::UNAUTHORIZED, "User not found"),
+            });
+        }
+    };
+    state.user_cache.insert(user.clone());
+
+    let token = match state.jwt.generate_token(
+        user.id,
+        &user.username,
+        &user.email,
+        user.is_active,
+        user.security_epoch,
+    ) {
+        Ok(token) => token,
+        Err(_) => {
+            return Err(refresh_error(
                 StatusCode::INTERNAL_SERVER_ERROR,
-                Json(ApiResponse::error(
-                    "Authentication error".to_string(),
-                    vec!["Database error".to_string()],
-                )),
+                "Token generation failed",
             ));
         }
     };
 
-    // Check if user is active
-    if !user.is_active {
-        return Err((
-            StatusCode::FORBIDDEN,
-            Json(ApiResponse::error(
-                "Forbidden".to_string(),
-                vec!["Account is not active".to_string()],
-            )),
-        ));
+    let token_response = TokenResponse {
+        token,
+        expires_in: state.jwt.expiry_seconds(),
+        refresh_token: state.jwt.generate_refresh_token(family, next_generation),
+        refresh_expires_in: state.refresh_tokens.ttl_seconds(),
+    };
+
+    Ok(Json(ApiResponse::success(
+        "Token refreshed successfully".to_string(),
+        token_response,
+    )))
+}
+
+/// End the session behind a refresh token. Access tokens already issued stay
+/// valid until they expire, which is why they should be short-lived.
+pub async fn logout(
+    State(jwt_service): State<Arc<JwtService>>,
+    State(refresh_store): State<Arc<RefreshStore>>,
+    Json(request): Json<RefreshRequest>,
+) -> Result<Json<ApiResponse<()>>, (StatusCode, Json<ApiResponse<()>>)> {
+    if request.validate().is_err() {
+        return Err(refresh_error(StatusCode::BAD_REQUEST, "Refresh token tidak valid"));
+    }
+
+    match jwt_service.verify_refresh_token(&request.refresh_token) {
+        Ok((family, _)) => {
+            refresh_store.revoke(family);
+            Ok(Json(ApiResponse::success(
+                "Logout successful".to_string(),
+                (),
+            )))
+        }
+        Err(_) => Err(refresh_error(StatusCode::UNAUTHORIZED, "Refresh token tidak valid")),
     }
+}
 
+fn refresh_error(status: StatusCode, error: &str) -> (StatusCode, Json<ApiResponse<()>>) {
+    (
+        status,
+        Json(ApiResponse::error(
+            "Token refresh failed".to_string(),
+            vec![error.to_string()],
+        )),
+    )
+}
+
+pub async fn me(
+    Extension(user): Extension<UserModel>,
+) -> Result<Json<ApiResponse<UserResponse>>, (StatusCode, Json<ApiResponse<()>>)> {
+    // The user has already been authenticated and loaded by jwt_auth_layer
     let user_response = UserResponse::from(user);
     Ok(Json(ApiResponse::success(
         "User profile retrieved successfully".to_string(),
         user_response,
     )))
-}
\ No newline at end of file
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_login_lookup_falls_back_to_username() {
+        use crate::services::provisioning::karyawan_username;
+        use sea_orm::IdenStatic;
+
+        let columns = |input: &str| -> Vec<&'static str> {
+            login_lookup_columns(input).iter().map(|column| column.as_str()).collect()
+        };
+        assert_eq!(columns("budi"), vec!["username"]);
+
+        // The account auto-created for a karyawan named "Budi@Kantor"
+        let username = karyawan_username("Budi@Kantor");
+        assert_eq!(username, "budi@kantor");
+        assert_eq!(columns(&username), vec!["email", "username"]);
+    }
+
+    #[test]
+    fn test_duplicate_key_message() {
+        assert_eq!(
+            duplicate_key_message("Duplicate entry 'budi@example.com' for key 'users.email'"),
+            "Email sudah digunakan"
+        );
+        assert_eq!(
+            duplicate_key_message("Duplicate entry 'email' for key 'username'"),
+            "Username sudah digunakan"
+        );
+        assert_eq!(
+            duplicate_key_message("Duplicate entry '1' for key 'PRIMARY'"),
+            "Username atau email sudah digunakan"
+        );
+    }
+}
@@ -1,17 +1,27 @@
 use crate::models::{
     jabatan::{
-        ActiveModel as JabatanActiveModel, CreateJabatanRequest, Entity as JabatanEntity,
-        Model as Jabatan, UpdateJabatanRequest,
+        ActiveModel as JabatanActiveModel, Column as JabatanColumn, CreateJabatanRequest,
+        Entity as JabatanEntity, Model as Jabatan, UpdateJabatanRequest,
     },
+    pagination::{Cursor, PageQuery},
+    sync::SyncTable,
+    sync_tombstone,
     user::Model as User,
     ApiResponse,
 };
+use crate::database::ReadConnection;
+use crate::models::stats::{GroupStats, StatsGroup};
+use crate::services::count_cache::CountCache;
+use crate::services::stats_cache::StatsCache;
 use axum::{
-    extract::{Json as ExtractJson, Path, State},
+    extract::{Json as ExtractJson, Path, Query, State},
     response::Json,
     Extension,
 };
-use sea_orm::{ActiveModelTrait, DatabaseConnection, EntityTrait, ModelTrait, Set};
+use sea_orm::{
+    ActiveModelTrait, ColumnTrait, DatabaseConnection, EntityTrait, PaginatorTrait, QueryFilter, Set,
+};
+use std::sync::Arc;
 use validator::Validate;
 
 // Helper function for ID validation
@@ -42,13 +52,39 @@ fn handle_validation_errors(validation_errors: validator::ValidationErrors) -> V
 }
 
 pub async fn get_all_jabatan(
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    Query(query): Query<PageQuery>,
 ) -> Json<ApiResponse<Vec<Jabatan>>> {
-    match JabatanEntity::find().all(&db).await {
-        Ok(jabatan_list) => Json(ApiResponse::success(
-            "List of jabatan retrieved successfully".to_string(),
-            jabatan_list,
-        )),
+    let page = match query.resolve() {
+        Ok(page) => page,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid pagination parameters".to_string(), errors));
+        }
+    };
+
+    let total = match list_counts
+        .total_if(page.include_total, "jabatan", JabatanEntity::find().count(&db))
+        .await
+    {
+        Ok(total) => total,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to count jabatan".to_string(),
+                vec![format!("Database error: {}", err)],
+            ));
+        }
+    };
+
+    match page.apply(JabatanEntity::find(), JabatanColumn::Id).all(&db).await {
+        Ok(jabatan_list) => {
+            let (jabatan_list, meta) = page.finish(jabatan_list, |row| Cursor::new(row.id), total);
+            Json(ApiResponse::paginated(
+                "List of jabatan retrieved successfully".to_string(),
+                jabatan_list,
+                meta,
+            ))
+        }
         Err(err) => Json(ApiResponse::error(
             "Failed to retrieve jabatan".to_string(),
             vec![format!("Database error: {}", err)],
@@ -58,7 +94,7 @@ pub async fn get_all_jabatan(
 
 pub async fn get_jabatan_by_id(
     Path(id_str): Path<String>,
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
 ) -> Json<ApiResponse<Jabatan>> {
     let id = match validate_id(&id_str) {
         Ok(id) => id,
@@ -86,8 +122,29 @@ pub async fn get_jabatan_by_id(
     }
 }
 
+/// `GET /api/jabatans/stats`: headcount and gaji aggregates per jabatan,
+/// cached like [`crate::handlers::kantor::get_kantor_stats`].
+pub async fn get_jabatan_stats(
+    State(db): State<DatabaseConnection>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+) -> Json<ApiResponse<Vec<GroupStats>>> {
+    let load = GroupStats::load(&db, StatsGroup::Jabatan);
+    match karyawan_stats.get_or_load(StatsGroup::Jabatan, load).await {
+        Ok(stats) => Json(ApiResponse::success(
+            "Jabatan stats retrieved successfully".to_string(),
+            stats,
+        )),
+        Err(err) => Json(ApiResponse::error(
+            "Failed to retrieve jabatan stats".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
+    }
+}
+
 pub async fn create_jabatan(
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     Extension(user): Extension<User>,
     ExtractJson(payload): ExtractJson<CreateJabatanRequest>,
 ) -> Json<ApiResponse<Jabatan>> {
@@ -107,10 +164,14 @@ pub async fn create_jabatan(
     };
 
     match new_jabatan.insert(&db).await {
-        Ok(jabatan) => Json(ApiResponse::success(
-            "Jabatan created successfully".to_string(),
-            jabatan,
-        )),
+        Ok(jabatan) => {
+            list_counts.invalidate("jabatan");
+            karyawan_stats.invalidate();
+            Json(ApiResponse::success(
+                "Jabatan created successfully".to_string(),
+                jabatan,
+            ))
+        }
         Err(err) => Json(ApiResponse::error(
             "Failed to create jabatan".to_string(),
             vec![format!("Database error: {}", err)],
@@ -121,6 +182,8 @@ pub async fn create_jabatan(
 pub async fn update_jabatan(
     Path(id_str): Path<String>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     Extension(user): Extension<User>,
     ExtractJson(payload): ExtractJson<UpdateJabatanRequest>,
 ) -> Json<ApiResponse<Jabatan>> {
@@ -141,32 +204,42 @@ pub async fn update_jabatan(
         ));
     }
 
-    let existing_jabatan = match JabatanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(jabatan)) => jabatan,
-        Ok(None) => {
-            return Json(ApiResponse::error(
-                "Jabatan not found".to_string(),
-                vec!["Jabatan dengan ID tersebut tidak ditemukan".to_string()],
-            ));
-        }
-        Err(err) => {
-            return Json(ApiResponse::error(
-                "Failed to find jabatan".to_string(),
-                vec![format!("Database error: {}", err)],
-            ));
-        }
-    };
+    // One UPDATE ... WHERE id = ?; no row matched means the jabatan does not
+    // exist. The row is then re-read by primary key for the response.
+    let update = JabatanEntity::update_many()
+        .set(JabatanActiveModel {
+            nama_jabatan: Set(payload.nama_jabatan),
+            deskripsi: Set(payload.deskripsi),
+            updated_by: Set(Some(user.id)),
+            ..Default::default()
+        })
+        .filter(JabatanColumn::Id.eq(id));
 
-    let mut updated_jabatan: JabatanActiveModel = existing_jabatan.into();
-    updated_jabatan.nama_jabatan = Set(payload.nama_jabatan);
-    updated_jabatan.deskripsi = Set(payload.deskripsi);
-    updated_jabatan.updated_by = Set(Some(user.id));
+    let not_found = || {
+        Json(ApiResponse::error(
+            "Jabatan not found".to_string(),
+            vec!["Jabatan dengan ID tersebut tidak ditemukan".to_string()],
+        ))
+    };
 
-    match updated_jabatan.update(&db).await {
-        Ok(jabatan) => Json(ApiResponse::success(
-            format!("Jabatan with ID {} updated successfully", id),
-            jabatan,
-        )),
+    match update.exec(&db).await {
+        Ok(result) if result.rows_affected == 0 => not_found(),
+        Ok(_) => {
+            list_counts.invalidate("jabatan");
+            karyawan_stats.invalidate();
+            match JabatanEntity::find_by_id(id).one(&db).await {
+                Ok(Some(jabatan)) => Json(ApiResponse::success(
+                    format!("Jabatan with ID {} updated successfully", id),
+                    jabatan,
+                )),
+                // Deleted between the UPDATE and the read
+                Ok(None) => not_found(),
+                Err(err) => Json(ApiResponse::error(
+                    "Failed to retrieve updated jabatan".to_string(),
+                    vec![format!("Database error: {}", err)],
+                )),
+            }
+        }
         Err(err) => Json(ApiResponse::error(
             "Failed to update jabatan".to_string(),
             vec![format!("Database error: {}", err)],
@@ -177,6 +250,8 @@ pub async fn update_jabatan(
 pub async fn delete_jabatan(
     Path(id_str): Path<String>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
 ) -> Json<ApiResponse<()>> {
     let id = match validate_id(&id_str) {
         Ok(id) => id,
@@ -188,27 +263,19 @@ pub async fn delete_jabatan(
         }
     };
 
-    let existing_jabatan = match JabatanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(jabatan)) => jabatan,
-        Ok(None) => {
-            return Json(ApiResponse::error(
-                "Jabatan not found".to_string(),
-                vec!["Jabatan dengan ID tersebut tidak ditemukan".to_string()],
-            ));
-        }
-        Err(err) => {
-            return Json(ApiResponse::error(
-                "Failed to find jabatan".to_string(),
-                vec![format!("Database error: {}", err)],
-            ));
-        }
-    };
-
-    match existing_jabatan.delete(&db).await {
-        Ok(_) => Json(ApiResponse::success(
-            format!("Jabatan with ID {} deleted successfully", id),
-            (),
+    match sync_tombstone::delete_by_id::<JabatanEntity>(&db, SyncTable::Jabatan, id).await {
+        Ok(result) if result.rows_affected == 0 => Json(ApiResponse::error(
+            "Jabatan not found".to_string(),
+            vec!["Jabatan dengan ID tersebut tidak ditemukan".to_string()],
         )),
+        Ok(_) => {
+            list_counts.invalidate("jabatan");
+            karyawan_stats.invalidate();
+            Json(ApiResponse::success(
+                format!("Jabatan with ID {} deleted successfully", id),
+                (),
+            ))
+        }
         Err(err) => Json(ApiResponse::error(
             "Failed to delete jabatan".to_string(),
             vec![format!("Database error: {}", err)],
@@ -1,37 +1,66 @@
-use crate::models::{ApiResponse, kantor::{Entity as KantorEntity, Model as Kantor, ActiveModel as KantorActiveModel, CreateKantorRequest, UpdateKantorRequest}, user::Model as User};
+use crate::models::{ApiResponse, kantor::{Column as KantorColumn, Entity as KantorEntity, Model as Kantor, ActiveModel as KantorActiveModel, CreateKantorRequest, KantorDistance, NearbyKantorQuery, UpdateKantorRequest}, pagination::{Cursor, PageQuery}, sync::SyncTable, sync_tombstone, user::Model as User};
+use crate::database::ReadConnection;
+use crate::models::stats::{GroupStats, StatsGroup};
+use crate::services::count_cache::CountCache;
+use crate::services::stats_cache::StatsCache;
 use crate::validators::kantor::{
     handle_validation_errors, validate_id, validate_latitude, validate_longitude,
 };
 use axum::{
-    extract::{Json as ExtractJson, Path, State},
+    extract::{Json as ExtractJson, Path, Query, State},
     response::Json,
     Extension,
 };
-use sea_orm::{DatabaseConnection, EntityTrait, ActiveModelTrait, Set, ModelTrait};
+use sea_orm::{DatabaseConnection, EntityTrait, ActiveModelTrait, ColumnTrait, ConnectionTrait, FromQueryResult, PaginatorTrait, QueryFilter, Set};
 use validator::Validate;
 use rust_decimal::Decimal;
+use std::sync::Arc;
 use std::str::FromStr;
 
-pub async fn get_all_kantor(State(db): State<DatabaseConnection>) -> Json<ApiResponse<Vec<Kantor>>> {
-    match KantorEntity::find().all(&db).await {
+pub async fn get_all_kantor(
+    State(ReadConnection(db)): State<ReadConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    Query(query): Query<PageQuery>,
+) -> Json<ApiResponse<Vec<Kantor>>> {
+    let page = match query.resolve() {
+        Ok(page) => page,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid pagination parameters".to_string(), errors));
+        }
+    };
+
+    let total = match list_counts
+        .total_if(page.include_total, "kantor", KantorEntity::find().count(&db))
+        .await
+    {
+        Ok(total) => total,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to count kantors".to_string(),
+                vec![format!("Database error: {}", err)],
+            ));
+        }
+    };
+
+    match page.apply(KantorEntity::find(), KantorColumn::Id).all(&db).await {
         Ok(kantors) => {
-            Json(ApiResponse::success(
+            let (kantors, meta) = page.finish(kantors, |row| Cursor::new(row.id), total);
+            Json(ApiResponse::paginated(
                 "List of kantors retrieved successfully".to_string(),
                 kantors,
+                meta,
             ))
         }
-        Err(err) => {
-            Json(ApiResponse::error(
-                "Failed to retrieve kantors".to_string(),
-                vec![format!("Database error: {}", err)]
-            ))
-        }
+        Err(err) => Json(ApiResponse::error(
+            "Failed to retrieve kantors".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
     }
 }
 
 pub async fn get_kantor_by_id(
     Path(id): Path<String>,
-    State(db): State<DatabaseConnection>
+    State(ReadConnection(db)): State<ReadConnection>
 ) -> Json<ApiResponse<Kantor>> {
     // Validasi ID menggunakan function
     let id = match validate_id(&id) {
@@ -66,9 +95,58 @@ pub async fn get_kantor_by_id(
     }
 }
 
+/// `GET /api/kantors/nearby?lat=&lon=&radius=&limit=`: kantor within
+/// `radius` metres of the point, nearest first, with their distance.
+pub async fn get_nearby_kantor(
+    State(ReadConnection(db)): State<ReadConnection>,
+    Query(query): Query<NearbyKantorQuery>,
+) -> Json<ApiResponse<Vec<KantorDistance>>> {
+    let request = match query.resolve() {
+        Ok(request) => request,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid nearby parameters".to_string(), errors));
+        }
+    };
+
+    let statement = request.statement(db.get_database_backend());
+    match KantorDistance::find_by_statement(statement).all(&db).await {
+        Ok(kantors) => Json(ApiResponse::success(
+            "Nearby kantors retrieved successfully".to_string(),
+            kantors,
+        )),
+        Err(err) => Json(ApiResponse::error(
+            "Failed to retrieve nearby kantors".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
+    }
+}
+
+/// `GET /api/kantors/stats`: headcount and gaji aggregates per kantor.
+///
+/// Served from the stats cache; a miss runs one GROUP BY on the primary, so
+/// a lagging replica cannot re-cache numbers a write just invalidated.
+pub async fn get_kantor_stats(
+    State(db): State<DatabaseConnection>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+) -> Json<ApiResponse<Vec<GroupStats>>> {
+    let load = GroupStats::load(&db, StatsGroup::Kantor);
+    match karyawan_stats.get_or_load(StatsGroup::Kantor, load).await {
+        Ok(stats) => Json(ApiResponse::success(
+            "Kantor stats retrieved successfully".to_string(),
+            stats,
+        )),
+        Err(err) => Json(ApiResponse::error(
+            "Failed to retrieve kantor stats".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
+    }
+}
+
 pub async fn create_kantor(
     Extension(user): Extension<User>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     ExtractJson(payload): ExtractJson<CreateKantorRequest>,
 ) -> Json<ApiResponse<Kantor>> {
     // Validasi payload
@@ -136,6 +214,8 @@ pub async fn create_kantor(
 
     match new_kantor.insert(&db).await {
         Ok(kantor) => {
+            list_counts.invalidate("kantor");
+            karyawan_stats.invalidate();
             Json(ApiResponse::success(
                 "Kantor created successfully".to_string(),
                 kantor,
@@ -154,6 +234,8 @@ pub async fn update_kantor(
     Extension(user): Extension<User>,
     Path(id): Path<String>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     ExtractJson(payload): ExtractJson<UpdateKantorRequest>,
 ) -> Json<ApiResponse<Kantor>> {
     // Validasi ID menggunakan function
@@ -200,23 +282,6 @@ pub async fn update_kantor(
         ));
     }
 
-    // Check if kantor exists
-    let existing_kantor = match KantorEntity::find_by_id(id).one(&db).await {
-        Ok(Some(kantor)) => kantor,
-        Ok(None) => {
-            return Json(ApiResponse::error(
-                "Kantor not found".to_string(),
-                vec!["Kantor dengan ID tersebut tidak ditemukan".to_string()],
-            ));
-        }
-        Err(err) => {
-            return Json(ApiResponse::error(
-                "Failed to find kantor".to_string(),
-                vec![format!("Database error: {}", err)]
-            ));
-        }
-    };
-
     let longitude = match Decimal::from_str(&payload.longitude.to_string()) {
         Ok(val) => val,
         Err(_) => {
@@ -237,19 +302,43 @@ pub async fn update_kantor(
         }
     };
 
-    let mut updated_kantor: KantorActiveModel = existing_kantor.into();
-    updated_kantor.nama = Set(payload.nama);
-    updated_kantor.alamat = Set(payload.alamat);
-    updated_kantor.longitude = Set(longitude);
-    updated_kantor.latitude = Set(latitude);
-    updated_kantor.updated_by = Set(Some(user.id));
+    // One UPDATE ... WHERE id = ?; no row matched means the kantor does not
+    // exist. The row is then re-read by primary key for the response.
+    let update = KantorEntity::update_many()
+        .set(KantorActiveModel {
+            nama: Set(payload.nama),
+            alamat: Set(payload.alamat),
+            longitude: Set(longitude),
+            latitude: Set(latitude),
+            updated_by: Set(Some(user.id)),
+            ..Default::default()
+        })
+        .filter(KantorColumn::Id.eq(id));
 
-    match updated_kantor.update(&db).await {
-        Ok(kantor) => {
-            Json(ApiResponse::success(
-                format!("Kantor with ID {} updated successfully", id),
-                kantor,
-            ))
+    let not_found = || {
+        Json(ApiResponse::error(
+            "Kantor not found".to_string(),
+            vec!["Kantor dengan ID tersebut tidak ditemukan".to_string()],
+        ))
+    };
+
+    match update.exec(&db).await {
+        Ok(result) if result.rows_affected == 0 => not_found(),
+        Ok(_) => {
+            list_counts.invalidate("kantor");
+            karyawan_stats.invalidate();
+            match KantorEntity::find_by_id(id).one(&db).await {
+                Ok(Some(kantor)) => Json(ApiResponse::success(
+                    format!("Kantor with ID {} updated successfully", id),
+                    kantor,
+                )),
+                // Deleted between the UPDATE and the read
+                Ok(None) => not_found(),
+                Err(err) => Json(ApiResponse::error(
+                    "Failed to retrieve updated kantor".to_string(),
+                    vec![format!("Database error: {}", err)],
+                )),
+            }
         }
         Err(err) => {
             Json(ApiResponse::error(
@@ -262,7 +351,9 @@ pub async fn update_kantor(
 
 pub async fn delete_kantor(
     Path(id): Path<String>,
-    State(db): State<DatabaseConnection>
+    State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
 ) -> Json<ApiResponse<()>> {
     // Validasi ID menggunakan function
     let id = match validate_id(&id) {
@@ -275,25 +366,16 @@ pub async fn delete_kantor(
         }
     };
 
-    // Check if kantor exists
-    let existing_kantor = match KantorEntity::find_by_id(id).one(&db).await {
-        Ok(Some(kantor)) => kantor,
-        Ok(None) => {
-            return Json(ApiResponse::error(
+    match sync_tombstone::delete_by_id::<KantorEntity>(&db, SyncTable::Kantor, id).await {
+        Ok(result) if result.rows_affected == 0 => {
+            Json(ApiResponse::error(
                 "Kantor not found".to_string(),
                 vec!["Kantor dengan ID tersebut tidak ditemukan".to_string()],
-            ));
-        }
-        Err(err) => {
-            return Json(ApiResponse::error(
-                "Failed to find kantor".to_string(),
-                vec![format!("Database error: {}", err)]
-            ));
+            ))
         }
-    };
-
-    match existing_kantor.delete(&db).await {
         Ok(_) => {
+            list_counts.invalidate("kantor");
+            karyawan_stats.invalidate();
             Json(ApiResponse::success(
                 format!("Kantor with ID {} deleted successfully", id),
                 (),
@@ -1,28 +1,44 @@
 use crate::models::{
-    kantor::Entity as KantorEntity,
+    jabatan::Column as JabatanColumn,
+    kantor::Column as KantorColumn,
     karyawan::{
-        ActiveModel as KaryawanActiveModel, CreateKaryawanRequest, Entity as KaryawanEntity,
-        Model as Karyawan, UpdateKaryawanRequest,
+        ActiveModel as KaryawanActiveModel, Column as KaryawanColumn, CreateKaryawanRequest,
+        Entity as KaryawanEntity, KaryawanChanges, KaryawanListQuery, KaryawanRow,
+        Model as Karyawan, PatchKaryawanRequest, Relation as KaryawanRelation,
+        UpdateKaryawanRequest,
     },
-    user::{Model as User, Entity as UserEntity, ActiveModel as UserActiveModel},
+    pagination::{PageMeta, PageQuery},
+    sync::SyncTable,
+    sync_tombstone,
+    user::{Model as User, ActiveModel as UserActiveModel},
     ApiResponse,
 };
-use crate::validators::karyawan::{handle_validation_errors, validate_id, validate_kantor_id_exists, validate_jabatan_id_exists};
+use crate::validators::karyawan::{
+    handle_validation_errors, karyawan_reference_error, validate_id, validate_karyawan_references,
+};
+use crate::database::ReadConnection;
+use crate::services::count_cache::CountCache;
 use crate::services::file_upload::{FileUploadService, UploadedFile};
-use crate::services::auth::PasswordService;
+use crate::services::password_pool::PasswordPool;
+use crate::services::stats_cache::StatsCache;
+use crate::services::provisioning::{
+    karyawan_email, karyawan_username, UserProvisioner, DEFAULT_KARYAWAN_PASSWORD,
+};
 use axum::{
-    extract::{State, Json as ExtractJson, Path, Multipart},
+    extract::{State, Json as ExtractJson, Path, Multipart, Query},
     Extension,
     response::Json,
 };
 use sea_orm::{
-    prelude::DateTimeWithTimeZone, ActiveModelTrait, DatabaseConnection, EntityTrait, LoaderTrait,
-    ModelTrait, Set, QueryFilter, ColumnTrait,
+    prelude::DateTimeWithTimeZone, ActiveModelTrait, DatabaseConnection, DbErr, EntityTrait,
+    FromQueryResult, JoinType, PaginatorTrait, QueryFilter, QuerySelect, RelationTrait,
+    Select, Set, TransactionTrait,
 };
 use serde::{Deserialize, Serialize};
+use std::sync::Arc;
 use validator::Validate;
 
-#[derive(Serialize, Deserialize, Debug)]
+#[derive(Serialize, Deserialize, Debug, FromQueryResult)]
 pub struct KaryawanWithKantor {
     pub id: i32,
     pub nama: String,
@@ -42,64 +58,126 @@ pub struct KaryawanWithKantor {
     pub updated_at: DateTimeWithTimeZone,
 }
 
+impl KaryawanRow for KaryawanWithKantor {
+    fn id(&self) -> i32 {
+        self.id
+    }
+
+    fn nama(&self) -> &str {
+        &self.nama
+    }
+
+    fn gaji(&self) -> i32 {
+        self.gaji
+    }
+
+    fn created_at(&self) -> &DateTimeWithTimeZone {
+        &self.created_at
+    }
+
+    fn updated_at(&self) -> &DateTimeWithTimeZone {
+        &self.updated_at
+    }
+}
+
+/// Project `select` onto the columns of [`KaryawanWithKantor`], joining
+/// kantor and jabatan so the names come back in the same round trip.
+pub fn with_kantor_columns(select: Select<KaryawanEntity>) -> Select<KaryawanEntity> {
+    select
+        .select_only()
+        .columns([
+            KaryawanColumn::Id,
+            KaryawanColumn::Nama,
+            KaryawanColumn::Gaji,
+            KaryawanColumn::KantorId,
+            KaryawanColumn::JabatanId,
+            KaryawanColumn::FotoPath,
+            KaryawanColumn::FotoOriginalName,
+            KaryawanColumn::FotoSize,
+            KaryawanColumn::FotoMimeType,
+            KaryawanColumn::UserId,
+            KaryawanColumn::CreatedBy,
+            KaryawanColumn::UpdatedBy,
+            KaryawanColumn::CreatedAt,
+            KaryawanColumn::UpdatedAt,
+        ])
+        .column_as(KantorColumn::Nama, "kantor_nama")
+        .column_as(JabatanColumn::NamaJabatan, "jabatan_nama")
+        .join(JoinType::LeftJoin, KaryawanRelation::Kantor.def())
+        .join(JoinType::LeftJoin, KaryawanRelation::Jabatan.def())
+}
+
 pub async fn get_all_karyawan_with_kantor(
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    Query(page_query): Query<PageQuery>,
+    Query(list_query): Query<KaryawanListQuery>,
 ) -> Json<ApiResponse<Vec<KaryawanWithKantor>>> {
-    match KaryawanEntity::find().all(&db).await {
-        Ok(karyawans) => {
-            // Load related kantor data using Sea-ORM loader
-            match karyawans.load_one(KantorEntity, &db).await {
-                Ok(kantors) => {
-                    let karyawan_with_kantor: Vec<KaryawanWithKantor> = karyawans
-                        .into_iter()
-                        .zip(kantors.into_iter())
-                        .map(|(karyawan, kantor)| KaryawanWithKantor {
-                            id: karyawan.id,
-                            nama: karyawan.nama,
-                            gaji: karyawan.gaji,
-                            kantor_id: karyawan.kantor_id,
-                            kantor_nama: kantor.map(|k| k.nama),
-                            jabatan_id: karyawan.jabatan_id,
-                            jabatan_nama: None, // TODO: Load jabatan with loader
-                            foto_path: karyawan.foto_path,
-                            foto_original_name: karyawan.foto_original_name,
-                            foto_size: karyawan.foto_size,
-                            foto_mime_type: karyawan.foto_mime_type,
-                            user_id: karyawan.user_id,
-                            created_by: karyawan.created_by,
-                            updated_by: karyawan.updated_by,
-                            created_at: karyawan.created_at,
-                            updated_at: karyawan.updated_at,
-                        })
-                        .collect();
-
-                    Json(ApiResponse::success(
-                        "List of karyawans with kantor retrieved successfully".to_string(),
-                        karyawan_with_kantor,
-                    ))
-                }
-                Err(err) => Json(ApiResponse::error(
-                    "Failed to load kantor data".to_string(),
-                    vec![format!("Database error: {}", err)],
-                )),
-            }
-        }
-        Err(err) => Json(ApiResponse::error(
-            "Failed to retrieve karyawans".to_string(),
-            vec![format!("Database error: {}", err)],
+    match fetch_karyawan_page(&db, &list_counts, &page_query, &list_query, with_kantor_columns).await {
+        Ok((karyawans, meta)) => Json(ApiResponse::paginated(
+            "List of karyawans with kantor retrieved successfully".to_string(),
+            karyawans,
+            meta,
         )),
+        Err(response) => Json(response),
     }
 }
 
 pub async fn get_all_karyawan(
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    Query(page_query): Query<PageQuery>,
+    Query(list_query): Query<KaryawanListQuery>,
 ) -> Json<ApiResponse<Vec<Karyawan>>> {
-    match KaryawanEntity::find().all(&db).await {
-        Ok(karyawans) => Json(ApiResponse::success(
+    match fetch_karyawan_page(&db, &list_counts, &page_query, &list_query, |select| select).await {
+        Ok((karyawans, meta)) => Json(ApiResponse::paginated(
             "List of karyawans retrieved successfully".to_string(),
             karyawans,
+            meta,
         )),
-        Err(err) => Json(ApiResponse::error(
+        Err(response) => Json(response),
+    }
+}
+
+/// One page of karyawan matching the list filters, ordered by the requested
+/// sort. Filtering, ordering and the row limit all run in MySQL; `project`
+/// picks the columns (and joins) of the row type `R`.
+async fn fetch_karyawan_page<R, T>(
+    db: &DatabaseConnection,
+    list_counts: &CountCache,
+    page_query: &PageQuery,
+    list_query: &KaryawanListQuery,
+    project: impl FnOnce(Select<KaryawanEntity>) -> Select<KaryawanEntity>,
+) -> Result<(Vec<R>, PageMeta), ApiResponse<T>>
+where
+    R: FromQueryResult + KaryawanRow,
+{
+    let (page, filter) = match (page_query.resolve(), list_query.resolve()) {
+        (Ok(page), Ok(filter)) => (page, filter),
+        (page, filter) => {
+            let errors = page.err().into_iter().chain(filter.err()).flatten().collect();
+            return Err(ApiResponse::error("Invalid list parameters".to_string(), errors));
+        }
+    };
+
+    let filtered = KaryawanEntity::find().filter(filter.condition());
+    let total = list_counts
+        .total_if(page.include_total, &filter.cache_key(), filtered.clone().count(db))
+        .await
+        .map_err(|err| {
+            ApiResponse::error(
+                "Failed to count karyawans".to_string(),
+                vec![format!("Database error: {}", err)],
+            )
+        })?;
+
+    let select = page
+        .apply_sorted(filtered, KaryawanColumn::Id, &filter.sort)
+        .map_err(|error| ApiResponse::error("Invalid list parameters".to_string(), vec![error]))?;
+
+    match project(select).into_model::<R>().all(db).await {
+        Ok(rows) => Ok(page.finish(rows, |row| filter.cursor(row), total)),
+        Err(err) => Err(ApiResponse::error(
             "Failed to retrieve karyawans".to_string(),
             vec![format!("Database error: {}", err)],
         )),
@@ -108,7 +186,7 @@ pub async fn get_all_karyawan(
 
 pub async fn get_karyawan_with_kantor_by_id(
     Path(id_str): Path<String>,
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
 ) -> Json<ApiResponse<KaryawanWithKantor>> {
     // Validasi ID menggunakan function
     let id = match validate_id(&id_str) {
@@ -121,41 +199,18 @@ pub async fn get_karyawan_with_kantor_by_id(
         }
     };
 
-    match KaryawanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(karyawan)) => {
-            // Load related kantor data
-            let kantor_nama = match karyawan.find_related(KantorEntity).one(&db).await {
-                Ok(kantor) => kantor.map(|k| k.nama),
-                Err(_) => None,
-            };
-
-            let karyawan_with_kantor = KaryawanWithKantor {
-                id: karyawan.id,
-                nama: karyawan.nama,
-                gaji: karyawan.gaji,
-                kantor_id: karyawan.kantor_id,
-                kantor_nama,
-                jabatan_id: karyawan.jabatan_id,
-                jabatan_nama: None, // TODO: Load jabatan
-                foto_path: karyawan.foto_path,
-                foto_original_name: karyawan.foto_original_name,
-                foto_size: karyawan.foto_size,
-                foto_mime_type: karyawan.foto_mime_type,
-                user_id: karyawan.user_id,
-                created_by: karyawan.created_by,
-                updated_by: karyawan.updated_by,
-                created_at: karyawan.created_at,
-                updated_at: karyawan.updated_at,
-            };
-
-            Json(ApiResponse::success(
-                format!(
-                    "Karyawan with ID {} and kantor info retrieved successfully",
-                    id
-                ),
-                karyawan_with_kantor,
-            ))
-        }
+    match with_kantor_columns(KaryawanEntity::find_by_id(id))
+        .into_model::<KaryawanWithKantor>()
+        .one(&db)
+        .await
+    {
+        Ok(Some(karyawan_with_kantor)) => Json(ApiResponse::success(
+            format!(
+                "Karyawan with ID {} and kantor info retrieved successfully",
+                id
+            ),
+            karyawan_with_kantor,
+        )),
         Ok(None) => Json(ApiResponse::error(
             "Karyawan not found".to_string(),
             vec!["Karyawan dengan ID tersebut tidak ditemukan".to_string()],
@@ -169,7 +224,7 @@ pub async fn get_karyawan_with_kantor_by_id(
 
 pub async fn get_karyawan_by_id(
     Path(id_str): Path<String>,
-    State(db): State<DatabaseConnection>,
+    State(ReadConnection(db)): State<ReadConnection>,
 ) -> Json<ApiResponse<Karyawan>> {
     // Validasi ID menggunakan function
     let id = match validate_id(&id_str) {
@@ -200,6 +255,10 @@ pub async fn get_karyawan_by_id(
 
 pub async fn create_karyawan(
     State(db): State<DatabaseConnection>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(user_provisioner): State<Arc<UserProvisioner>>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     Extension(user): Extension<User>,
     ExtractJson(payload): ExtractJson<CreateKaryawanRequest>,
 ) -> Json<ApiResponse<Karyawan>> {
@@ -224,14 +283,6 @@ pub async fn create_karyawan(
         }
     };
 
-    // Validasi apakah kantor_id ada di database
-    if let Err(error_msg) = validate_kantor_id_exists(kantor_id, &db).await {
-        return Json(ApiResponse::error(
-            "Invalid kantor_id".to_string(),
-            vec![error_msg],
-        ));
-    }
-
     let jabatan_id = match payload.jabatan_id.parse::<i32>() {
         Ok(jabatan_id) => jabatan_id,
         Err(_) => {
@@ -245,13 +296,14 @@ pub async fn create_karyawan(
         }
     };
 
-    // Validasi apakah jabatan_id ada di database
-    if let Err(error_msg) = validate_jabatan_id_exists(jabatan_id, &db).await {
-        return Json(ApiResponse::error(
-            "Invalid jabatan_id".to_string(),
-            vec![error_msg],
-        ));
-    }
+    // Kantor, jabatan dan akun user yang sudah ada dicek dalam satu query.
+    // In deferred mode the background provisioner creates the account later
+    let username = (!user_provisioner.is_deferred()).then(|| karyawan_username(&payload.nama));
+    let references =
+        match validate_karyawan_references(kantor_id, jabatan_id, username.as_deref(), &db).await {
+            Ok(references) => references,
+            Err((message, error)) => return Json(ApiResponse::error(message, vec![error])),
+        };
 
     let gaji = match payload.gaji.parse::<i32>() {
         Ok(gaji) => gaji,
@@ -263,24 +315,10 @@ pub async fn create_karyawan(
         }
     };
 
-    // Auto-create user - generate username from nama (lowercase, remove spaces)
-    let mut user_id = None;
-    let username = payload.nama.to_lowercase().replace(" ", "");
-    
-    // Generate email from username
-    let email = format!("{}@karyawan.local", username);
-    
-    // Check if username already exists
-    let existing_user = UserEntity::find()
-        .filter(crate::models::user::Column::Username.eq(&username))
-        .one(&db)
-        .await;
-    
-    match existing_user {
-        Ok(None) => {
-            // User doesn't exist, create new user
-            let default_password = "12345678";
-            let password_hash = match PasswordService::hash_password(default_password) {
+    // Hash before the transaction so no row locks are held during bcrypt
+    let new_user = match (username, references.existing_user_id) {
+        (Some(username), None) => {
+            let password_hash = match password_pool.hash_password(DEFAULT_KARYAWAN_PASSWORD).await {
                 Ok(hash) => hash,
                 Err(e) => {
                     return Json(ApiResponse::error(
@@ -289,46 +327,26 @@ pub async fn create_karyawan(
                     ));
                 }
             };
-            
-            let new_user = UserActiveModel {
-                username: Set(username.clone()),
-                email: Set(email),
+
+            Some(UserActiveModel {
+                email: Set(karyawan_email(&username)),
+                username: Set(username),
                 password_hash: Set(password_hash),
                 full_name: Set(Some(payload.nama.clone())),
                 is_active: Set(true),
                 ..Default::default()
-            };
-            
-            match new_user.insert(&db).await {
-                Ok(created_user) => {
-                    user_id = Some(created_user.id);
-                }
-                Err(e) => {
-                    return Json(ApiResponse::error(
-                        "Failed to create user account".to_string(),
-                        vec![format!("Database error: {}", e)],
-                    ));
-                }
-            }
-        }
-        Ok(Some(existing)) => {
-            // User already exists, use existing user_id
-            user_id = Some(existing.id);
+            })
         }
-        Err(e) => {
-            return Json(ApiResponse::error(
-                "Failed to check existing user".to_string(),
-                vec![format!("Database error: {}", e)],
-            ));
-        }
-    }
+        _ => None,
+    };
 
     let new_karyawan = KaryawanActiveModel {
         nama: Set(payload.nama),
         gaji: Set(gaji),
         kantor_id: Set(kantor_id),
         jabatan_id: Set(jabatan_id),
-        user_id: Set(user_id),
+        user_id: Set(references.existing_user_id),
+        needs_account: Set(new_user.is_none() && references.existing_user_id.is_none()),
         created_by: Set(Some(user.id)),
         updated_by: Set(Some(user.id)),
         foto_path: Set(None),
@@ -338,21 +356,56 @@ pub async fn create_karyawan(
         ..Default::default()
     };
 
-    match new_karyawan.insert(&db).await {
-        Ok(karyawan) => Json(ApiResponse::success(
-            "Karyawan created successfully".to_string(),
-            karyawan,
-        )),
-        Err(err) => Json(ApiResponse::error(
-            "Failed to create karyawan".to_string(),
+    match insert_karyawan_with_user(&db, new_user, new_karyawan).await {
+        Ok(karyawan) => {
+            user_provisioner.schedule();
+            list_counts.invalidate("karyawan");
+            karyawan_stats.invalidate();
+            Json(ApiResponse::success(
+                "Karyawan created successfully".to_string(),
+                karyawan,
+            ))
+        }
+        Err((message, err)) => Json(ApiResponse::error(
+            message.to_string(),
             vec![format!("Database error: {}", err)],
         )),
     }
 }
 
+/// Insert `new_karyawan`, and first its user account when `new_user` is
+/// given, in one transaction: either both rows are committed or neither.
+/// The error carries the response message for the step that failed.
+async fn insert_karyawan_with_user(
+    db: &DatabaseConnection,
+    new_user: Option<UserActiveModel>,
+    mut new_karyawan: KaryawanActiveModel,
+) -> Result<Karyawan, (&'static str, DbErr)> {
+    let txn = db.begin().await.map_err(|err| ("Failed to create karyawan", err))?;
+
+    if let Some(new_user) = new_user {
+        let created_user = new_user
+            .insert(&txn)
+            .await
+            .map_err(|err| ("Failed to create user account", err))?;
+        new_karyawan.user_id = Set(Some(created_user.id));
+    }
+
+    // Dropping `txn` on an early return rolls back the user insert
+    let karyawan = new_karyawan
+        .insert(&txn)
+        .await
+        .map_err(|err| ("Failed to create karyawan", err))?;
+    txn.commit().await.map_err(|err| ("Failed to create karyawan", err))?;
+
+    Ok(karyawan)
+}
+
 pub async fn update_karyawan(
     Path(id_str): Path<String>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     Extension(user): Extension<User>,
     ExtractJson(payload): ExtractJson<UpdateKaryawanRequest>,
 ) -> Json<ApiResponse<Karyawan>> {
@@ -388,14 +441,6 @@ pub async fn update_karyawan(
         }
     };
 
-    // Validasi apakah kantor_id ada di database
-    if let Err(error_msg) = validate_kantor_id_exists(kantor_id, &db).await {
-        return Json(ApiResponse::error(
-            "Invalid kantor_id".to_string(),
-            vec![error_msg],
-        ));
-    }
-
     let jabatan_id = match payload.jabatan_id.parse::<i32>() {
         Ok(jabatan_id) => jabatan_id,
         Err(_) => {
@@ -409,14 +454,6 @@ pub async fn update_karyawan(
         }
     };
 
-    // Validasi apakah jabatan_id ada di database
-    if let Err(error_msg) = validate_jabatan_id_exists(jabatan_id, &db).await {
-        return Json(ApiResponse::error(
-            "Invalid jabatan_id".to_string(),
-            vec![error_msg],
-        ));
-    }
-
     let gaji = match payload.gaji.parse::<i32>() {
         Ok(gaji) => gaji,
         Err(_) => {
@@ -427,45 +464,168 @@ pub async fn update_karyawan(
         }
     };
 
-    // Check if karyawan exists
-    let existing_karyawan = match KaryawanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(karyawan)) => karyawan,
-        Ok(None) => {
+    let changes = KaryawanChanges {
+        id,
+        nama: Some(payload.nama),
+        gaji: Some(gaji),
+        kantor_id: Some(kantor_id),
+        jabatan_id: Some(jabatan_id),
+        updated_by: Some(user.id),
+        ..Default::default()
+    };
+    let (written, response) = write_karyawan_changes(
+        &db,
+        changes,
+        format!("Karyawan with ID {} updated successfully", id),
+        "Failed to update karyawan",
+    )
+    .await;
+    if written {
+        list_counts.invalidate("karyawan");
+        karyawan_stats.invalidate();
+    }
+    response
+}
+
+/// `PATCH /api/karyawans/:id`: change only the fields present in the body.
+pub async fn patch_karyawan(
+    Path(id_str): Path<String>,
+    State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+    Extension(user): Extension<User>,
+    ExtractJson(payload): ExtractJson<PatchKaryawanRequest>,
+) -> Json<ApiResponse<Karyawan>> {
+    let id = match validate_id(&id_str) {
+        Ok(id) => id,
+        Err(error_msg) => {
             return Json(ApiResponse::error(
-                "Karyawan not found".to_string(),
-                vec!["Karyawan dengan ID tersebut tidak ditemukan".to_string()],
+                "Invalid ID format".to_string(),
+                vec![error_msg],
             ));
         }
-        Err(err) => {
-            return Json(ApiResponse::error(
-                "Failed to find karyawan".to_string(),
-                vec![format!("Database error: {}", err)],
-            ));
+    };
+
+    if let Err(validation_errors) = payload.validate() {
+        return Json(ApiResponse::error(
+            "Validation failed".to_string(),
+            handle_validation_errors(validation_errors),
+        ));
+    }
+
+    let mut errors = Vec::new();
+    let mut parse = |value: &Option<String>, error: &str| match value.as_deref().map(str::parse::<i32>) {
+        None => None,
+        Some(Ok(number)) => Some(number),
+        Some(Err(_)) => {
+            errors.push(error.to_string());
+            None
         }
     };
+    let gaji = parse(&payload.gaji, "Gaji harus berupa angka yang valid");
+    let kantor_id = parse(&payload.kantor_id, "kantor_id harus berupa angka positif yang valid");
+    let jabatan_id = parse(&payload.jabatan_id, "jabatan_id harus berupa angka positif yang valid");
+    if !errors.is_empty() {
+        return Json(ApiResponse::error("Validation failed".to_string(), errors));
+    }
 
-    let mut updated_karyawan: KaryawanActiveModel = existing_karyawan.into();
-    updated_karyawan.nama = Set(payload.nama);
-    updated_karyawan.gaji = Set(gaji);
-    updated_karyawan.kantor_id = Set(kantor_id);
-    updated_karyawan.jabatan_id = Set(jabatan_id);
-    updated_karyawan.updated_by = Set(Some(user.id));
+    let changes = KaryawanChanges {
+        id,
+        nama: payload.nama,
+        gaji,
+        kantor_id,
+        jabatan_id,
+        updated_by: Some(user.id),
+        ..Default::default()
+    };
+    if changes.is_empty() {
+        return Json(ApiResponse::error(
+            "Validation failed".to_string(),
+            vec!["Isi minimal salah satu dari nama, gaji, kantor_id atau jabatan_id".to_string()],
+        ));
+    }
 
-    match updated_karyawan.update(&db).await {
-        Ok(karyawan) => Json(ApiResponse::success(
-            format!("Karyawan with ID {} updated successfully", id),
-            karyawan,
-        )),
-        Err(err) => Json(ApiResponse::error(
-            "Failed to update karyawan".to_string(),
-            vec![format!("Database error: {}", err)],
-        )),
+    let (written, response) = write_karyawan_changes(
+        &db,
+        changes,
+        format!("Karyawan with ID {} updated successfully", id),
+        "Failed to update karyawan",
+    )
+    .await;
+    if written {
+        list_counts.invalidate("karyawan");
+        karyawan_stats.invalidate();
     }
+    response
+}
+
+/// Apply `changes` with one `UPDATE ... WHERE id = ?`, then re-read the row
+/// by primary key for the response. Nothing is read before the write: an id
+/// that matches no row is reported as not found, and a missing kantor/jabatan
+/// is caught by the `fk_karyawan_*` foreign keys. Also returns whether the
+/// row was written, which stays true if only the re-read fails.
+async fn write_karyawan_changes(
+    db: &DatabaseConnection,
+    changes: KaryawanChanges,
+    success_message: String,
+    failure_message: &str,
+) -> (bool, Json<ApiResponse<Karyawan>>) {
+    let not_found = || {
+        Json(ApiResponse::error(
+            "Karyawan not found".to_string(),
+            vec!["Karyawan dengan ID tersebut tidak ditemukan".to_string()],
+        ))
+    };
+
+    match changes.update().exec(db).await {
+        // sqlx connects with CLIENT_FOUND_ROWS, so rows_affected counts
+        // matched rows and saving unchanged values is not a 404.
+        Ok(result) if result.rows_affected == 0 => (false, not_found()),
+        Ok(_) => match KaryawanEntity::find_by_id(changes.id).one(db).await {
+            Ok(Some(karyawan)) => (true, Json(ApiResponse::success(success_message, karyawan))),
+            // Deleted between the UPDATE and the read
+            Ok(None) => (true, not_found()),
+            Err(err) => (
+                true,
+                Json(ApiResponse::error(
+                    "Failed to retrieve updated karyawan".to_string(),
+                    vec![format!("Database error: {}", err)],
+                )),
+            ),
+        },
+        Err(err) => match karyawan_reference_error(&err, changes.kantor_id, changes.jabatan_id) {
+            Some((message, error)) => (false, Json(ApiResponse::error(message, vec![error]))),
+            None => (
+                false,
+                Json(ApiResponse::error(
+                    failure_message.to_string(),
+                    vec![format!("Database error: {}", err)],
+                )),
+            ),
+        },
+    }
+}
+
+/// Current `foto_path` of karyawan `id`, the only column the photo and delete
+/// handlers need to read (to remove the file); `Ok(None)` when there is no
+/// such karyawan.
+async fn find_foto_path(
+    db: &DatabaseConnection,
+    id: i32,
+) -> Result<Option<Option<String>>, DbErr> {
+    KaryawanEntity::find_by_id(id)
+        .select_only()
+        .column(KaryawanColumn::FotoPath)
+        .into_tuple::<Option<String>>()
+        .one(db)
+        .await
 }
 
 pub async fn delete_karyawan(
     Path(id_str): Path<String>,
     State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
 ) -> Json<ApiResponse<()>> {
     // Validasi ID menggunakan function
     let id = match validate_id(&id_str) {
@@ -478,15 +638,17 @@ pub async fn delete_karyawan(
         }
     };
 
-    // Check if karyawan exists
-    let existing_karyawan = match KaryawanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(karyawan)) => karyawan,
-        Ok(None) => {
-            return Json(ApiResponse::error(
-                "Karyawan not found".to_string(),
-                vec!["Karyawan dengan ID tersebut tidak ditemukan".to_string()],
-            ));
-        }
+    let not_found = || {
+        Json(ApiResponse::error(
+            "Karyawan not found".to_string(),
+            vec!["Karyawan dengan ID tersebut tidak ditemukan".to_string()],
+        ))
+    };
+
+    // Only the photo path is read, to remove the file after the row is gone
+    let foto_path = match find_foto_path(&db, id).await {
+        Ok(Some(foto_path)) => foto_path,
+        Ok(None) => return not_found(),
         Err(err) => {
             return Json(ApiResponse::error(
                 "Failed to find karyawan".to_string(),
@@ -495,16 +657,19 @@ pub async fn delete_karyawan(
         }
     };
 
-    // Delete the physical photo file if it exists
-    if let Some(foto_path) = &existing_karyawan.foto_path {
-        let _ = FileUploadService::delete_karyawan_photo(foto_path).await;
-    }
-
-    match existing_karyawan.delete(&db).await {
-        Ok(_) => Json(ApiResponse::success(
-            format!("Karyawan with ID {} deleted successfully", id),
-            (),
-        )),
+    match sync_tombstone::delete_by_id::<KaryawanEntity>(&db, SyncTable::Karyawan, id).await {
+        Ok(result) if result.rows_affected == 0 => not_found(),
+        Ok(_) => {
+            list_counts.invalidate("karyawan");
+            karyawan_stats.invalidate();
+            if let Some(foto_path) = &foto_path {
+                let _ = FileUploadService::delete_karyawan_photo(foto_path).await;
+            }
+            Json(ApiResponse::success(
+                format!("Karyawan with ID {} deleted successfully", id),
+                (),
+            ))
+        }
         Err(err) => Json(ApiResponse::error(
             "Failed to delete karyawan".to_string(),
             vec![format!("Database error: {}", err)],
@@ -514,6 +679,10 @@ pub async fn delete_karyawan(
 
 pub async fn create_karyawan_with_photo(
     State(db): State<DatabaseConnection>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(user_provisioner): State<Arc<UserProvisioner>>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
     Extension(user): Extension<User>,
     mut multipart: Multipart,
 ) -> Json<ApiResponse<Karyawan>> {
@@ -604,19 +773,6 @@ pub async fn create_karyawan_with_photo(
         }
     };
 
-    // Validasi apakah kantor_id ada di database
-    if let Err(error_msg) = validate_kantor_id_exists(kantor_id, &db).await {
-        // Clean up uploaded file if validation fails
-        if let Some(file) = uploaded_file {
-            let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
-        }
-        
-        return Json(ApiResponse::error(
-            "Invalid kantor_id".to_string(),
-            vec![error_msg],
-        ));
-    }
-
     let jabatan_id = match payload.jabatan_id.parse::<i32>() {
         Ok(jabatan_id) => jabatan_id,
         Err(_) => {
@@ -635,18 +791,21 @@ pub async fn create_karyawan_with_photo(
         }
     };
 
-    // Validasi apakah jabatan_id ada di database
-    if let Err(error_msg) = validate_jabatan_id_exists(jabatan_id, &db).await {
-        // Clean up uploaded file if validation fails
-        if let Some(file) = uploaded_file {
-            let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
-        }
-        
-        return Json(ApiResponse::error(
-            "Invalid jabatan_id".to_string(),
-            vec![error_msg],
-        ));
-    }
+    // Kantor, jabatan dan akun user yang sudah ada dicek dalam satu query.
+    // In deferred mode the background provisioner creates the account later
+    let username = (!user_provisioner.is_deferred()).then(|| karyawan_username(&payload.nama));
+    let references =
+        match validate_karyawan_references(kantor_id, jabatan_id, username.as_deref(), &db).await {
+            Ok(references) => references,
+            Err((message, error)) => {
+                // Clean up uploaded file if validation fails
+                if let Some(file) = uploaded_file {
+                    let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
+                }
+
+                return Json(ApiResponse::error(message, vec![error]));
+            }
+        };
 
     let gaji = match payload.gaji.parse::<i32>() {
         Ok(gaji) => gaji,
@@ -663,87 +822,43 @@ pub async fn create_karyawan_with_photo(
         }
     };
 
-    // Auto-create user - generate username from nama (lowercase, remove spaces)
-    let mut user_id = None;
-    let username = payload.nama.to_lowercase().replace(" ", "");
-    
-    // Generate email from username
-    let email = format!("{}@karyawan.local", username);
-    
-    // Check if username already exists
-    let existing_user = UserEntity::find()
-        .filter(crate::models::user::Column::Username.eq(&username))
-        .one(&db)
-        .await;
-    
-    match existing_user {
-        Ok(None) => {
-            // User doesn't exist, create new user
-            let default_password = "12345678";
-            let password_hash = match PasswordService::hash_password(default_password) {
+    // Hash before the transaction so no row locks are held during bcrypt
+    let new_user = match (username, references.existing_user_id) {
+        (Some(username), None) => {
+            let password_hash = match password_pool.hash_password(DEFAULT_KARYAWAN_PASSWORD).await {
                 Ok(hash) => hash,
                 Err(e) => {
                     // Clean up uploaded file if password hashing fails
                     if let Some(file) = &uploaded_file {
                         let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
                     }
-                    
+
                     return Json(ApiResponse::error(
                         "Failed to hash password".to_string(),
                         vec![format!("Error: {}", e)],
                     ));
                 }
             };
-            
-            let new_user = UserActiveModel {
-                username: Set(username.clone()),
-                email: Set(email),
+
+            Some(UserActiveModel {
+                email: Set(karyawan_email(&username)),
+                username: Set(username),
                 password_hash: Set(password_hash),
                 full_name: Set(Some(payload.nama.clone())),
                 is_active: Set(true),
                 ..Default::default()
-            };
-            
-            match new_user.insert(&db).await {
-                Ok(created_user) => {
-                    user_id = Some(created_user.id);
-                }
-                Err(e) => {
-                    // Clean up uploaded file if user creation fails
-                    if let Some(file) = &uploaded_file {
-                        let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
-                    }
-                    
-                    return Json(ApiResponse::error(
-                        "Failed to create user account".to_string(),
-                        vec![format!("Database error: {}", e)],
-                    ));
-                }
-            }
-        }
-        Ok(Some(existing)) => {
-            // User already exists, use existing user_id
-            user_id = Some(existing.id);
-        }
-        Err(e) => {
-            // Clean up uploaded file if database check fails
-            if let Some(file) = &uploaded_file {
-                let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
-            }
-            
-            return Json(ApiResponse::error(
-                "Failed to check existing user".to_string(),
-                vec![format!("Database error: {}", e)],
-            ));
+            })
         }
-    }
+        _ => None,
+    };
 
     let new_karyawan = KaryawanActiveModel {
         nama: Set(payload.nama),
         gaji: Set(gaji),
         kantor_id: Set(kantor_id),
         jabatan_id: Set(jabatan_id),
-        user_id: Set(user_id),
+        user_id: Set(references.existing_user_id),
+        needs_account: Set(new_user.is_none() && references.existing_user_id.is_none()),
         created_by: Set(Some(user.id)),
         updated_by: Set(Some(user.id)),
         foto_path: Set(uploaded_file.as_ref().map(|f| f.file_path.clone())),
@@ -753,19 +868,24 @@ pub async fn create_karyawan_with_photo(
         ..Default::default()
     };
 
-    match new_karyawan.insert(&db).await {
-        Ok(karyawan) => Json(ApiResponse::success(
-            "Karyawan created successfully with photo".to_string(),
-            karyawan,
-        )),
-        Err(err) => {
-            // Clean up uploaded file if database insertion fails
+    match insert_karyawan_with_user(&db, new_user, new_karyawan).await {
+        Ok(karyawan) => {
+            user_provisioner.schedule();
+            list_counts.invalidate("karyawan");
+            karyawan_stats.invalidate();
+            Json(ApiResponse::success(
+                "Karyawan created successfully with photo".to_string(),
+                karyawan,
+            ))
+        }
+        Err((message, err)) => {
+            // The transaction was rolled back; remove the photo it referenced
             if let Some(file) = uploaded_file {
                 let _ = FileUploadService::delete_karyawan_photo(&file.file_path).await;
             }
-            
+
             Json(ApiResponse::error(
-                "Failed to create karyawan".to_string(),
+                message.to_string(),
                 vec![format!("Database error: {}", err)],
             ))
         }
@@ -789,9 +909,9 @@ pub async fn upload_karyawan_photo(
         }
     };
 
-    // Check if karyawan exists
-    let existing_karyawan = match KaryawanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(karyawan)) => karyawan,
+    // Check if karyawan exists; only the old photo path is needed
+    let old_foto_path = match find_foto_path(&db, id).await {
+        Ok(Some(foto_path)) => foto_path,
         Ok(None) => {
             return Json(ApiResponse::error(
                 "Karyawan not found".to_string(),
@@ -816,7 +936,7 @@ pub async fn upload_karyawan_photo(
             match FileUploadService::update_karyawan_photo(
                 field, 
                 id, 
-                existing_karyawan.foto_path.as_deref()
+                old_foto_path.as_deref()
             ).await {
                 Ok(file) => uploaded_file = Some(file),
                 Err(err) => {
@@ -841,23 +961,29 @@ pub async fn upload_karyawan_photo(
     };
 
     // Update database with new photo info
-    let mut updated_karyawan: KaryawanActiveModel = existing_karyawan.into();
-    updated_karyawan.foto_path = Set(Some(uploaded_file.file_path));
-    updated_karyawan.foto_original_name = Set(Some(uploaded_file.original_name));
-    updated_karyawan.foto_size = Set(Some(uploaded_file.size));
-    updated_karyawan.foto_mime_type = Set(Some(uploaded_file.mime_type));
-    updated_karyawan.updated_by = Set(Some(user.id));
-
-    match updated_karyawan.update(&db).await {
-        Ok(karyawan) => Json(ApiResponse::success(
-            format!("Photo uploaded successfully for karyawan ID {}", id),
-            karyawan,
-        )),
-        Err(err) => Json(ApiResponse::error(
-            "Failed to update karyawan with photo info".to_string(),
-            vec![format!("Database error: {}", err)],
-        )),
+    let file_path = uploaded_file.file_path.clone();
+    let changes = KaryawanChanges {
+        id,
+        foto_path: Some(Some(uploaded_file.file_path)),
+        foto_original_name: Some(Some(uploaded_file.original_name)),
+        foto_size: Some(Some(uploaded_file.size)),
+        foto_mime_type: Some(Some(uploaded_file.mime_type)),
+        updated_by: Some(user.id),
+        ..Default::default()
+    };
+    let (written, response) = write_karyawan_changes(
+        &db,
+        changes,
+        format!("Photo uploaded successfully for karyawan ID {}", id),
+        "Failed to update karyawan with photo info",
+    )
+    .await;
+
+    // Don't leave the new file behind if the row could not be updated
+    if !written {
+        let _ = FileUploadService::delete_karyawan_photo(&file_path).await;
     }
+    response
 }
 
 pub async fn delete_karyawan_photo(
@@ -876,9 +1002,9 @@ pub async fn delete_karyawan_photo(
         }
     };
 
-    // Check if karyawan exists
-    let existing_karyawan = match KaryawanEntity::find_by_id(id).one(&db).await {
-        Ok(Some(karyawan)) => karyawan,
+    // Check if karyawan exists; only the photo path is needed
+    let foto_path = match find_foto_path(&db, id).await {
+        Ok(Some(foto_path)) => foto_path,
         Ok(None) => {
             return Json(ApiResponse::error(
                 "Karyawan not found".to_string(),
@@ -894,26 +1020,26 @@ pub async fn delete_karyawan_photo(
     };
 
     // Delete the physical file if it exists
-    if let Some(foto_path) = &existing_karyawan.foto_path {
+    if let Some(foto_path) = &foto_path {
         let _ = FileUploadService::delete_karyawan_photo(foto_path).await;
     }
 
     // Update database to remove photo info
-    let mut updated_karyawan: KaryawanActiveModel = existing_karyawan.into();
-    updated_karyawan.foto_path = Set(None);
-    updated_karyawan.foto_original_name = Set(None);
-    updated_karyawan.foto_size = Set(None);
-    updated_karyawan.foto_mime_type = Set(None);
-    updated_karyawan.updated_by = Set(Some(user.id));
-
-    match updated_karyawan.update(&db).await {
-        Ok(karyawan) => Json(ApiResponse::success(
-            format!("Photo deleted successfully for karyawan ID {}", id),
-            karyawan,
-        )),
-        Err(err) => Json(ApiResponse::error(
-            "Failed to update karyawan after photo deletion".to_string(),
-            vec![format!("Database error: {}", err)],
-        )),
-    }
+    let changes = KaryawanChanges {
+        id,
+        foto_path: Some(None),
+        foto_original_name: Some(None),
+        foto_size: Some(None),
+        foto_mime_type: Some(None),
+        updated_by: Some(user.id),
+        ..Default::default()
+    };
+    let (_, response) = write_karyawan_changes(
+        &db,
+        changes,
+        format!("Photo deleted successfully for karyawan ID {}", id),
+        "Failed to update karyawan after photo deletion",
+    )
+    .await;
+    response
 }
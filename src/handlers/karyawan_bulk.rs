@@ -0,0 +1,769 @@
+use crate::models::{
+    jabatan::{Column as JabatanColumn, Entity as JabatanEntity},
+    kantor::{Column as KantorColumn, Entity as KantorEntity},
+    karyawan::{
+        ActiveModel as KaryawanActiveModel, BulkDeleteResult, BulkReassignRequest,
+        BulkReassignResult, BulkResult, BulkRowResult, BulkSelection, Column as KaryawanColumn,
+        CreateKaryawanRequest, Entity as KaryawanEntity, ImportSummary,
+    },
+    sync::SyncTable,
+    sync_tombstone,
+    user::{Column as UserColumn, Entity as UserEntity, Model as User},
+    ApiResponse,
+};
+use crate::services::count_cache::CountCache;
+use crate::services::csv_codec::CsvDecoder;
+use crate::services::file_upload::FileUploadService;
+use crate::services::password_pool::PasswordPool;
+use crate::services::provisioning::{karyawan_username, UserProvisioner};
+use crate::services::stats_cache::StatsCache;
+use crate::validators::karyawan::{
+    handle_validation_errors, validate_jabatan_id_exists, validate_kantor_id_exists,
+};
+use axum::{
+    body::{Body, Bytes},
+    extract::{Json as ExtractJson, Multipart, State},
+    http::{header, HeaderValue},
+    response::{IntoResponse, Json, Response},
+    Extension,
+};
+use futures_util::stream;
+use sea_orm::{
+    sea_query::Expr, ColumnTrait, Condition, ConnectionTrait, DatabaseConnection, DbErr,
+    EntityTrait, QueryFilter, QuerySelect, Set, Statement, TransactionTrait,
+};
+use std::collections::{HashMap, HashSet};
+use std::io;
+use std::sync::Arc;
+use tokio::sync::mpsc;
+use validator::Validate;
+
+/// Most rows accepted by one bulk request.
+pub const MAX_BULK_ROWS: usize = 5_000;
+/// Rows per multi-row INSERT; keeps each statement far below MySQL's
+/// 65535 placeholder limit and `max_allowed_packet`.
+const INSERT_CHUNK: usize = 500;
+
+/// Largest upload accepted by `POST /api/karyawans/import`.
+pub const MAX_IMPORT_BYTES: usize = 64 * 1024 * 1024;
+/// Longest CSV record accepted by the import.
+const MAX_IMPORT_RECORD_BYTES: usize = 8 * 1024;
+/// Rows whose results are held before they are written out, even when
+/// most of them failed validation and nothing needs inserting.
+const IMPORT_BATCH_ROWS: usize = 2 * INSERT_CHUNK;
+/// Result chunks buffered ahead of the client; when full the import stops
+/// reading the upload until the client catches up.
+const IMPORT_CHANNEL_CHUNKS: usize = 16;
+/// Header names the import reads, in `CreateKaryawanRequest` field order.
+const IMPORT_COLUMNS: [&str; 4] = ["nama", "gaji", "kantor_id", "jabatan_id"];
+
+/// A request row that passed validation.
+struct BulkRow {
+    index: usize,
+    nama: String,
+    gaji: i32,
+    kantor_id: i32,
+    jabatan_id: i32,
+}
+
+/// `POST /api/karyawans/bulk`: create many karyawan at once.
+///
+/// Every row is validated and its kantor/jabatan resolved (one query per
+/// table) before anything is written. If any row fails, nothing is inserted
+/// and the per-row errors are returned. Otherwise all rows are inserted in
+/// chunked multi-row INSERTs inside one transaction. Existing accounts are
+/// linked by username; missing ones are created by the user provisioner in
+/// the background instead of hashing a password per row in the request.
+pub async fn bulk_create_karyawan(
+    State(db): State<DatabaseConnection>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(user_provisioner): State<Arc<UserProvisioner>>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+    Extension(user): Extension<User>,
+    ExtractJson(payload): ExtractJson<Vec<CreateKaryawanRequest>>,
+) -> Json<ApiResponse<BulkResult>> {
+    if payload.is_empty() || payload.len() > MAX_BULK_ROWS {
+        return Json(ApiResponse::error(
+            "Invalid bulk request".to_string(),
+            vec![format!("Jumlah data harus antara 1-{}", MAX_BULK_ROWS)],
+        ));
+    }
+
+    let mut results: Vec<BulkRowResult> = (0..payload.len())
+        .map(|index| BulkRowResult { index, id: None, errors: Vec::new() })
+        .collect();
+
+    let mut rows = Vec::with_capacity(payload.len());
+    for (index, request) in payload.into_iter().enumerate() {
+        match parse_row(index, request) {
+            Ok(row) => rows.push(row),
+            Err(errors) => results[index].errors = errors,
+        }
+    }
+
+    // Resolve every referenced kantor and jabatan with one query per table
+    let kantor_ids: HashSet<i32> = rows.iter().map(|row| row.kantor_id).collect();
+    let jabatan_ids: HashSet<i32> = rows.iter().map(|row| row.jabatan_id).collect();
+    let references = async {
+        let kantors = existing_ids::<KantorEntity>(&db, KantorColumn::Id, kantor_ids).await?;
+        let jabatans = existing_ids::<JabatanEntity>(&db, JabatanColumn::Id, jabatan_ids).await?;
+        Ok::<_, DbErr>((kantors, jabatans))
+    };
+    let (kantors, jabatans) = match references.await {
+        Ok(found) => found,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to validate references".to_string(),
+                vec![format!("Error saat mengecek kantor dan jabatan di database: {}", err)],
+            ));
+        }
+    };
+
+    for row in &rows {
+        let errors = &mut results[row.index].errors;
+        if !kantors.contains(&row.kantor_id) {
+            errors.push(format!("Kantor dengan ID {} tidak ditemukan di database", row.kantor_id));
+        }
+        if !jabatans.contains(&row.jabatan_id) {
+            errors.push(format!("Jabatan dengan ID {} tidak ditemukan di database", row.jabatan_id));
+        }
+    }
+
+    let result = BulkResult::new(results);
+    if result.failed > 0 {
+        let summary = format!(
+            "{} dari {} baris tidak valid; tidak ada data yang disimpan",
+            result.failed,
+            result.rows.len()
+        );
+        return Json(ApiResponse::error_with_data(
+            "Bulk create validation failed".to_string(),
+            result,
+            vec![summary],
+        ));
+    }
+    let mut results = result.rows;
+
+    let (models, missing_accounts) = match active_models(&db, &rows, user.id).await {
+        Ok(built) => built,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to check existing users".to_string(),
+                vec![format!("Database error: {}", err)],
+            ));
+        }
+    };
+
+    let (first_ids, id_step) = match insert_chunks(&db, models).await {
+        Ok(inserted) => inserted,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to create karyawans".to_string(),
+                vec![format!("Database error: {}", err)],
+            ));
+        }
+    };
+
+    // A multi-row INSERT reports the id of its first row; InnoDB assigns
+    // the rows of one such statement ids `id_step` apart.
+    for (chunk, first_id) in rows.chunks(INSERT_CHUNK).zip(first_ids) {
+        for (offset, row) in chunk.iter().enumerate() {
+            results[row.index].id = Some(row_id(first_id, offset, id_step));
+        }
+    }
+
+    list_counts.invalidate("karyawan");
+    karyawan_stats.invalidate();
+    if missing_accounts {
+        user_provisioner.provision_pending(db.clone(), password_pool.clone());
+    }
+
+    Json(ApiResponse::success(
+        format!("{} karyawan created successfully", results.len()),
+        BulkResult::new(results),
+    ))
+}
+
+/// `DELETE /api/karyawans/bulk`: delete every karyawan matching the selection.
+///
+/// The rows are locked and deleted with one set-based DELETE in a
+/// transaction; their photo files are removed afterwards by a background
+/// task so the response does not wait on the filesystem.
+pub async fn bulk_delete_karyawan(
+    State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+    ExtractJson(selection): ExtractJson<BulkSelection>,
+) -> Json<ApiResponse<BulkDeleteResult>> {
+    let condition = match selection.condition(MAX_BULK_ROWS) {
+        Ok(condition) => condition,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid bulk request".to_string(), errors));
+        }
+    };
+
+    let (deleted, rows) = match delete_matching(&db, condition).await {
+        Ok(outcome) => outcome,
+        Err(err) => {
+            return Json(ApiResponse::error(
+                "Failed to delete karyawans".to_string(),
+                vec![format!("Database error: {}", err)],
+            ));
+        }
+    };
+
+    let ids: Vec<i32> = rows.iter().map(|(id, _)| *id).collect();
+    let photos: Vec<String> = rows.into_iter().filter_map(|(_, foto_path)| foto_path).collect();
+    if !photos.is_empty() {
+        tokio::spawn(async move {
+            for foto_path in photos {
+                if let Err(err) = FileUploadService::delete_karyawan_photo(&foto_path).await {
+                    eprintln!("⚠️  Failed to delete photo {}: {}", foto_path, err);
+                }
+            }
+        });
+    }
+
+    let found: HashSet<i32> = ids.iter().copied().collect();
+    let not_found = selection
+        .ids
+        .unwrap_or_default()
+        .into_iter()
+        .filter(|id| !found.contains(id))
+        .collect();
+
+    list_counts.invalidate("karyawan");
+    karyawan_stats.invalidate();
+    Json(ApiResponse::success(
+        format!("{} karyawan deleted successfully", deleted),
+        BulkDeleteResult { deleted, ids, not_found },
+    ))
+}
+
+/// `POST /api/karyawans/bulk/reassign`: move every karyawan matching the
+/// selection to `to_kantor_id` and/or `to_jabatan_id` with a single UPDATE.
+pub async fn bulk_reassign_karyawan(
+    State(db): State<DatabaseConnection>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+    Extension(user): Extension<User>,
+    ExtractJson(payload): ExtractJson<BulkReassignRequest>,
+) -> Json<ApiResponse<BulkReassignResult>> {
+    let condition = match payload.selection.condition(MAX_BULK_ROWS) {
+        Ok(condition) => condition,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid bulk request".to_string(), errors));
+        }
+    };
+
+    if payload.to_kantor_id.is_none() && payload.to_jabatan_id.is_none() {
+        return Json(ApiResponse::error(
+            "Invalid bulk request".to_string(),
+            vec!["Isi minimal salah satu dari to_kantor_id atau to_jabatan_id".to_string()],
+        ));
+    }
+
+    let mut update = KaryawanEntity::update_many()
+        .col_expr(KaryawanColumn::UpdatedBy, Expr::value(user.id))
+        .filter(condition);
+    if let Some(kantor_id) = payload.to_kantor_id {
+        if let Err(error_msg) = validate_kantor_id_exists(kantor_id, &db).await {
+            return Json(ApiResponse::error("Invalid to_kantor_id".to_string(), vec![error_msg]));
+        }
+        update = update.col_expr(KaryawanColumn::KantorId, Expr::value(kantor_id));
+    }
+    if let Some(jabatan_id) = payload.to_jabatan_id {
+        if let Err(error_msg) = validate_jabatan_id_exists(jabatan_id, &db).await {
+            return Json(ApiResponse::error("Invalid to_jabatan_id".to_string(), vec![error_msg]));
+        }
+        update = update.col_expr(KaryawanColumn::JabatanId, Expr::value(jabatan_id));
+    }
+
+    match update.exec(&db).await {
+        Ok(result) => {
+            list_counts.invalidate("karyawan");
+            karyawan_stats.invalidate();
+            Json(ApiResponse::success(
+                format!("{} karyawan reassigned successfully", result.rows_affected),
+                BulkReassignResult { updated: result.rows_affected },
+            ))
+        }
+        Err(err) => Json(ApiResponse::error(
+            "Failed to reassign karyawans".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
+    }
+}
+
+/// `POST /api/karyawans/import`: create karyawan from a CSV upload (field
+/// `file`, header row with `nama,gaji,kantor_id,jabatan_id`; other columns
+/// are ignored, so an export can be imported back).
+///
+/// The upload is decoded chunk by chunk while it arrives. Each row gets the
+/// `CreateKaryawanRequest` validation; valid rows are inserted in batches of
+/// [`INSERT_CHUNK`], each batch committed on its own. The response is NDJSON,
+/// streamed while the upload is still being read: one [`BulkRowResult`] per
+/// row, then an [`ImportSummary`]. Memory stays bounded by one batch no
+/// matter how large the file is.
+pub async fn import_karyawan(
+    State(db): State<DatabaseConnection>,
+    State(password_pool): State<Arc<PasswordPool>>,
+    State(user_provisioner): State<Arc<UserProvisioner>>,
+    State(list_counts): State<Arc<CountCache>>,
+    State(karyawan_stats): State<Arc<StatsCache>>,
+    Extension(user): Extension<User>,
+    multipart: Multipart,
+) -> Response {
+    let (tx, rx) = mpsc::channel(IMPORT_CHANNEL_CHUNKS);
+
+    tokio::spawn(async move {
+        let mut import = CsvImport::new(db.clone(), user.id, tx);
+        let outcome = import.run(multipart).await;
+
+        if import.succeeded > 0 {
+            list_counts.invalidate("karyawan");
+            karyawan_stats.invalidate();
+        }
+        if import.missing_accounts {
+            user_provisioner.provision_pending(db, password_pool);
+        }
+
+        let summary = ImportSummary {
+            succeeded: import.succeeded,
+            failed: import.failed,
+            errors: outcome.err().into_iter().collect(),
+        };
+        let mut line = serde_json::to_vec(&summary).unwrap_or_default();
+        line.push(b'\n');
+        let _ = import.tx.send(Ok(Bytes::from(line))).await;
+    });
+
+    let chunks = stream::unfold(rx, |mut rx| async move {
+        rx.recv().await.map(|chunk| (chunk, rx))
+    });
+    let mut response = Body::from_stream(chunks).into_response();
+    let headers = response.headers_mut();
+    headers.insert(header::CONTENT_TYPE, HeaderValue::from_static("application/x-ndjson"));
+    headers.insert("x-accel-buffering", HeaderValue::from_static("no"));
+    response
+}
+
+/// State of one CSV import: the current batch and the running totals.
+struct CsvImport {
+    db: DatabaseConnection,
+    user_id: i32,
+    tx: mpsc::Sender<Result<Bytes, io::Error>>,
+    /// Position of each of [`IMPORT_COLUMNS`], once the header has been read.
+    columns: Option<[usize; 4]>,
+    next_index: usize,
+    /// Results of the current batch, in row order.
+    pending: Vec<BulkRowResult>,
+    /// Rows of the current batch that passed validation.
+    rows: Vec<BulkRow>,
+    /// Kantor and jabatan ids already found, so later batches skip the lookup.
+    kantors: HashSet<i32>,
+    jabatans: HashSet<i32>,
+    /// `@@auto_increment_increment`, read before the first insert.
+    id_step: Option<i32>,
+    succeeded: usize,
+    failed: usize,
+    missing_accounts: bool,
+}
+
+impl CsvImport {
+    fn new(db: DatabaseConnection, user_id: i32, tx: mpsc::Sender<Result<Bytes, io::Error>>) -> Self {
+        Self {
+            db,
+            user_id,
+            tx,
+            columns: None,
+            next_index: 0,
+            pending: Vec::with_capacity(IMPORT_BATCH_ROWS),
+            rows: Vec::with_capacity(INSERT_CHUNK),
+            kantors: HashSet::new(),
+            jabatans: HashSet::new(),
+            id_step: None,
+            succeeded: 0,
+            failed: 0,
+            missing_accounts: false,
+        }
+    }
+
+    /// Read the `file` field to the end. An `Err` stops the import; batches
+    /// written before it stay committed.
+    async fn run(&mut self, mut multipart: Multipart) -> Result<(), String> {
+        let mut decoder = CsvDecoder::new(MAX_IMPORT_RECORD_BYTES);
+        let mut records = Vec::new();
+
+        loop {
+            let mut field = match multipart.next_field().await {
+                Ok(Some(field)) => field,
+                Ok(None) => return Err("Field 'file' berisi CSV wajib diisi".to_string()),
+                Err(err) => return Err(format!("Gagal membaca upload: {}", err)),
+            };
+            if field.name() != Some("file") {
+                continue;
+            }
+
+            loop {
+                match field.chunk().await {
+                    Ok(Some(chunk)) => decoder.push(&chunk, &mut records)?,
+                    Ok(None) => break,
+                    Err(err) => return Err(format!("Gagal membaca upload: {}", err)),
+                }
+                for record in records.drain(..) {
+                    self.record(record).await?;
+                }
+            }
+
+            decoder.finish(&mut records)?;
+            for record in records.drain(..) {
+                self.record(record).await?;
+            }
+            break;
+        }
+
+        if self.columns.is_none() {
+            return Err("File CSV kosong".to_string());
+        }
+        self.flush().await
+    }
+
+    async fn record(&mut self, record: Vec<String>) -> Result<(), String> {
+        let columns = match self.columns {
+            Some(columns) => columns,
+            None => {
+                self.columns = Some(import_columns(&record)?);
+                return Ok(());
+            }
+        };
+
+        let value = |column: usize| record.get(columns[column]).map(|v| v.trim().to_string());
+        let request = CreateKaryawanRequest {
+            nama: value(0).unwrap_or_default(),
+            gaji: value(1).unwrap_or_default(),
+            kantor_id: value(2).unwrap_or_default(),
+            jabatan_id: value(3).unwrap_or_default(),
+        };
+
+        let index = self.next_index;
+        self.next_index += 1;
+        match parse_row(index, request) {
+            Ok(row) => {
+                self.pending.push(BulkRowResult { index, id: None, errors: Vec::new() });
+                self.rows.push(row);
+            }
+            Err(errors) => self.pending.push(BulkRowResult { index, id: None, errors }),
+        }
+
+        if self.rows.len() >= INSERT_CHUNK || self.pending.len() >= IMPORT_BATCH_ROWS {
+            self.flush().await?;
+        }
+        Ok(())
+    }
+
+    /// Check references for the current batch, insert its valid rows with one
+    /// multi-row INSERT and send its results to the client.
+    async fn flush(&mut self) -> Result<(), String> {
+        let base = match self.pending.first() {
+            Some(first) => first.index,
+            None => return Ok(()),
+        };
+        let rows = std::mem::take(&mut self.rows);
+
+        let kantor_ids: HashSet<i32> = rows
+            .iter()
+            .map(|row| row.kantor_id)
+            .filter(|id| !self.kantors.contains(id))
+            .collect();
+        let jabatan_ids: HashSet<i32> = rows
+            .iter()
+            .map(|row| row.jabatan_id)
+            .filter(|id| !self.jabatans.contains(id))
+            .collect();
+        let kantors = existing_ids::<KantorEntity>(&self.db, KantorColumn::Id, kantor_ids)
+            .await
+            .map_err(|err| format!("Error saat mengecek kantor di database: {}", err))?;
+        let jabatans = existing_ids::<JabatanEntity>(&self.db, JabatanColumn::Id, jabatan_ids)
+            .await
+            .map_err(|err| format!("Error saat mengecek jabatan di database: {}", err))?;
+        self.kantors.extend(kantors);
+        self.jabatans.extend(jabatans);
+
+        let mut valid = Vec::with_capacity(rows.len());
+        for row in rows {
+            let errors = &mut self.pending[row.index - base].errors;
+            if !self.kantors.contains(&row.kantor_id) {
+                errors.push(format!("Kantor dengan ID {} tidak ditemukan di database", row.kantor_id));
+            }
+            if !self.jabatans.contains(&row.jabatan_id) {
+                errors.push(format!("Jabatan dengan ID {} tidak ditemukan di database", row.jabatan_id));
+            }
+            if errors.is_empty() {
+                valid.push(row);
+            }
+        }
+
+        if !valid.is_empty() {
+            let (models, missing_accounts) = active_models(&self.db, &valid, self.user_id)
+                .await
+                .map_err(|err| format!("Database error: {}", err))?;
+            let id_step = match self.id_step {
+                Some(step) => step,
+                None => {
+                    let step = auto_increment_step(&self.db)
+                        .await
+                        .map_err(|err| format!("Database error: {}", err))?;
+                    *self.id_step.insert(step)
+                }
+            };
+            let inserted = KaryawanEntity::insert_many(models)
+                .exec(&self.db)
+                .await
+                .map_err(|err| format!("Database error: {}", err))?;
+            self.missing_accounts |= missing_accounts;
+
+            // Ids `id_step` apart within one multi-row INSERT, as in bulk create
+            for (offset, row) in valid.iter().enumerate() {
+                self.pending[row.index - base].id =
+                    Some(row_id(inserted.last_insert_id, offset, id_step));
+            }
+        }
+
+        let mut lines = Vec::new();
+        for result in self.pending.drain(..) {
+            if result.errors.is_empty() {
+                self.succeeded += 1;
+            } else {
+                self.failed += 1;
+            }
+            if serde_json::to_writer(&mut lines, &result).is_ok() {
+                lines.push(b'\n');
+            }
+        }
+
+        self.tx
+            .send(Ok(Bytes::from(lines)))
+            .await
+            .map_err(|_| "Client memutus koneksi".to_string())
+    }
+}
+
+/// Positions of [`IMPORT_COLUMNS`] in the CSV header (case-insensitive,
+/// BOM tolerated).
+fn import_columns(header: &[String]) -> Result<[usize; 4], String> {
+    let names: Vec<String> = header
+        .iter()
+        .map(|name| name.trim_start_matches('\u{feff}').trim().to_lowercase())
+        .collect();
+
+    let mut columns = [0; 4];
+    for (slot, wanted) in columns.iter_mut().zip(IMPORT_COLUMNS) {
+        *slot = names.iter().position(|name| name == wanted).ok_or_else(|| {
+            format!("Header CSV harus memuat kolom: {}", IMPORT_COLUMNS.join(", "))
+        })?;
+    }
+    Ok(columns)
+}
+
+fn parse_row(index: usize, request: CreateKaryawanRequest) -> Result<BulkRow, Vec<String>> {
+    if let Err(validation_errors) = request.validate() {
+        return Err(handle_validation_errors(validation_errors));
+    }
+
+    match (
+        request.gaji.parse::<i32>(),
+        request.kantor_id.parse::<i32>(),
+        request.jabatan_id.parse::<i32>(),
+    ) {
+        (Ok(gaji), Ok(kantor_id), Ok(jabatan_id)) => Ok(BulkRow {
+            index,
+            nama: request.nama,
+            gaji,
+            kantor_id,
+            jabatan_id,
+        }),
+        _ => Err(vec![
+            "gaji, kantor_id dan jabatan_id harus berupa angka yang valid".to_string(),
+        ]),
+    }
+}
+
+/// Active models for `rows`, linked to the accounts that already exist for
+/// their generated usernames (one query). The flag is set when some rows
+/// still need an account from the user provisioner.
+async fn active_models(
+    db: &DatabaseConnection,
+    rows: &[BulkRow],
+    user_id: i32,
+) -> Result<(Vec<KaryawanActiveModel>, bool), DbErr> {
+    let usernames: HashSet<String> = rows.iter().map(|row| karyawan_username(&row.nama)).collect();
+    let accounts: HashMap<String, i32> = UserEntity::find()
+        .select_only()
+        .column(UserColumn::Username)
+        .column(UserColumn::Id)
+        .filter(UserColumn::Username.is_in(usernames))
+        .into_tuple::<(String, i32)>()
+        .all(db)
+        .await?
+        .into_iter()
+        .collect();
+
+    let mut missing_accounts = false;
+    let models = rows
+        .iter()
+        .map(|row| {
+            let account = accounts.get(&karyawan_username(&row.nama)).copied();
+            missing_accounts |= account.is_none();
+            KaryawanActiveModel {
+                nama: Set(row.nama.clone()),
+                gaji: Set(row.gaji),
+                kantor_id: Set(row.kantor_id),
+                jabatan_id: Set(row.jabatan_id),
+                user_id: Set(account),
+                needs_account: Set(account.is_none()),
+                created_by: Set(Some(user_id)),
+                updated_by: Set(Some(user_id)),
+                ..Default::default()
+            }
+        })
+        .collect();
+    Ok((models, missing_accounts))
+}
+
+/// Which of `ids` exist in `E`, in a single `id IN (...)` query.
+async fn existing_ids<E: EntityTrait>(
+    db: &DatabaseConnection,
+    id_column: E::Column,
+    ids: HashSet<i32>,
+) -> Result<HashSet<i32>, DbErr> {
+    if ids.is_empty() {
+        return Ok(HashSet::new());
+    }
+
+    let found = E::find()
+        .select_only()
+        .column(id_column)
+        .filter(id_column.is_in(ids))
+        .into_tuple::<i32>()
+        .all(db)
+        .await?;
+    Ok(found.into_iter().collect())
+}
+
+/// Lock the rows matching `condition`, delete them with one statement and
+/// return the row count plus each deleted row's id and photo path.
+async fn delete_matching(
+    db: &DatabaseConnection,
+    condition: Condition,
+) -> Result<(u64, Vec<(i32, Option<String>)>), DbErr> {
+    let txn = db.begin().await?;
+
+    let rows: Vec<(i32, Option<String>)> = KaryawanEntity::find()
+        .select_only()
+        .column(KaryawanColumn::Id)
+        .column(KaryawanColumn::FotoPath)
+        .filter(condition.clone())
+        .lock_exclusive()
+        .into_tuple()
+        .all(&txn)
+        .await?;
+    if rows.is_empty() {
+        return Ok((0, rows));
+    }
+
+    let deleted = KaryawanEntity::delete_many()
+        .filter(condition)
+        .exec(&txn)
+        .await?
+        .rows_affected;
+
+    let ids: Vec<i32> = rows.iter().map(|(id, _)| *id).collect();
+    sync_tombstone::record(&txn, SyncTable::Karyawan, &ids).await?;
+
+    txn.commit().await?;
+    Ok((deleted, rows))
+}
+
+/// Insert `models` in chunks of [`INSERT_CHUNK`] inside one transaction and
+/// return the first id of each chunk, with the id step between their rows.
+async fn insert_chunks(
+    db: &DatabaseConnection,
+    models: Vec<KaryawanActiveModel>,
+) -> Result<(Vec<i32>, i32), DbErr> {
+    let txn = db.begin().await?;
+    let id_step = auto_increment_step(&txn).await?;
+    let mut first_ids = Vec::with_capacity(models.len() / INSERT_CHUNK + 1);
+
+    let mut models = models.into_iter().peekable();
+    while models.peek().is_some() {
+        let chunk: Vec<KaryawanActiveModel> = models.by_ref().take(INSERT_CHUNK).collect();
+        let inserted = KaryawanEntity::insert_many(chunk).exec(&txn).await?;
+        first_ids.push(inserted.last_insert_id);
+    }
+
+    txn.commit().await?;
+    Ok((first_ids, id_step))
+}
+
+/// `@@auto_increment_increment`: 1 on a single server, but multi-primary
+/// and Galera setups space ids further apart.
+async fn auto_increment_step<C: ConnectionTrait>(db: &C) -> Result<i32, DbErr> {
+    let statement = Statement::from_string(
+        db.get_database_backend(),
+        "SELECT CAST(@@auto_increment_increment AS SIGNED)".to_string(),
+    );
+    let row = db
+        .query_one(statement)
+        .await?
+        .ok_or_else(|| DbErr::RecordNotFound("@@auto_increment_increment".to_string()))?;
+    let step: i64 = row.try_get_by_index(0)?;
+    Ok(step.max(1) as i32)
+}
+
+/// Id of the row at `offset` in a multi-row INSERT whose first row got `first_id`.
+fn row_id(first_id: i32, offset: usize, id_step: i32) -> i32 {
+    first_id + offset as i32 * id_step
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn request(nama: &str, gaji: &str) -> CreateKaryawanRequest {
+        CreateKaryawanRequest {
+            nama: nama.to_string(),
+            gaji: gaji.to_string(),
+            kantor_id: "1".to_string(),
+            jabatan_id: "2".to_string(),
+        }
+    }
+
+    #[test]
+    fn test_parse_row() {
+        let row = parse_row(3, request("Budi Santoso", "5000000")).unwrap();
+        assert_eq!((row.index, row.gaji, row.kantor_id, row.jabatan_id), (3, 5_000_000, 1, 2));
+
+        let errors = parse_row(0, request("B", "10")).err().unwrap();
+        assert_eq!(errors.len(), 2);
+    }
+
+    #[test]
+    fn test_row_id_uses_increment() {
+        assert_eq!(row_id(41, 2, 1), 43);
+        assert_eq!(row_id(41, 2, 3), 47);
+    }
+
+    #[test]
+    fn test_import_columns() {
+        let header: Vec<String> = ["\u{feff}ID", "Nama", "gaji", "kantor_nama", "kantor_id", "jabatan_id"]
+            .iter()
+            .map(|name| name.to_string())
+            .collect();
+        assert_eq!(import_columns(&header), Ok([1, 2, 4, 5]));
+
+        let header = vec!["nama".to_string(), "gaji".to_string()];
+        assert!(import_columns(&header).is_err());
+    }
+}
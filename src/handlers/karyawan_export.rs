@@ -0,0 +1,278 @@
+use crate::database::ReadConnection;
+use crate::handlers::karyawan::{with_kantor_columns, KaryawanWithKantor};
+use crate::models::{
+    karyawan::{Column as KaryawanColumn, Entity as KaryawanEntity, KaryawanListQuery},
+    ApiResponse,
+};
+use crate::services::csv_codec;
+use axum::{
+    body::{Body, Bytes},
+    extract::{Query, State},
+    http::{header, HeaderValue},
+    response::{IntoResponse, Json, Response},
+};
+use futures_util::{stream, StreamExt};
+use sea_orm::{DatabaseConnection, EntityTrait, QueryFilter, Select};
+use serde::Deserialize;
+use std::io;
+use tokio::sync::mpsc;
+
+/// Bytes collected before a chunk is handed to the response body.
+const EXPORT_CHUNK_BYTES: usize = 32 * 1024;
+/// Chunks buffered between the query task and the client. Once the client
+/// stops reading, the task waits here instead of pulling more rows.
+const EXPORT_CHANNEL_CHUNKS: usize = 4;
+
+const CSV_HEADER: &str = "id,nama,gaji,kantor_id,kantor_nama,jabatan_id,jabatan_nama,\
+foto_path,foto_original_name,foto_size,foto_mime_type,user_id,created_by,updated_by,\
+created_at,updated_at\n";
+
+#[derive(Debug, Default, Deserialize)]
+pub struct ExportQuery {
+    pub format: Option<String>,
+}
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+enum ExportFormat {
+    Ndjson,
+    Csv,
+}
+
+impl ExportFormat {
+    fn parse(value: Option<&str>) -> Option<Self> {
+        match value.map(str::trim).filter(|v| !v.is_empty()) {
+            None | Some("ndjson") => Some(Self::Ndjson),
+            Some("csv") => Some(Self::Csv),
+            _ => None,
+        }
+    }
+
+    fn content_type(self) -> &'static str {
+        match self {
+            Self::Ndjson => "application/x-ndjson",
+            Self::Csv => "text/csv; charset=utf-8",
+        }
+    }
+
+    fn file_name(self) -> &'static str {
+        match self {
+            Self::Ndjson => "karyawan.ndjson",
+            Self::Csv => "karyawan.csv",
+        }
+    }
+
+    fn write_row(self, buf: &mut Vec<u8>, row: &KaryawanWithKantor) {
+        match self {
+            Self::Ndjson => {
+                // Serializing plain fields into a Vec cannot fail.
+                if serde_json::to_writer(&mut *buf, row).is_ok() {
+                    buf.push(b'\n');
+                }
+            }
+            Self::Csv => write_csv_row(buf, row),
+        }
+    }
+}
+
+/// `GET /api/karyawans/export?format=ndjson|csv`: every karyawan matching
+/// the list filters, with kantor and jabatan names.
+///
+/// Rows are read from a database cursor and written to a chunked body as
+/// they arrive, so memory use does not grow with the table. A bounded
+/// channel between the query and the body gives backpressure: a slow client
+/// slows the query down instead of piling rows up in memory.
+pub async fn export_karyawan(
+    State(ReadConnection(db)): State<ReadConnection>,
+    Query(export_query): Query<ExportQuery>,
+    Query(list_query): Query<KaryawanListQuery>,
+) -> Response {
+    let format = ExportFormat::parse(export_query.format.as_deref());
+    let (format, filter) = match (format, list_query.resolve()) {
+        (Some(format), Ok(filter)) => (format, filter),
+        (format, filter) => {
+            let mut errors: Vec<String> = filter.err().unwrap_or_default();
+            if format.is_none() {
+                errors.push("format harus ndjson atau csv".to_string());
+            }
+            return Json(ApiResponse::<()>::error(
+                "Invalid export parameters".to_string(),
+                errors,
+            ))
+            .into_response();
+        }
+    };
+
+    let select = with_kantor_columns(
+        filter
+            .sort
+            .order(KaryawanEntity::find().filter(filter.condition()), KaryawanColumn::Id),
+    );
+
+    let (tx, mut rx) = mpsc::channel(EXPORT_CHANNEL_CHUNKS);
+    tokio::spawn(stream_rows(db, select, format, tx));
+
+    // Wait for the first chunk so a query that fails to start still gets
+    // the usual JSON error instead of a broken download.
+    let first = match rx.recv().await {
+        Some(Err(err)) => {
+            return Json(ApiResponse::<()>::error(
+                "Failed to export karyawans".to_string(),
+                vec![format!("Database error: {}", err)],
+            ))
+            .into_response();
+        }
+        first => first,
+    };
+
+    let chunks = stream::iter(first).chain(stream::unfold(rx, |mut rx| async move {
+        rx.recv().await.map(|chunk| (chunk, rx))
+    }));
+
+    let mut response = Body::from_stream(chunks).into_response();
+    let headers = response.headers_mut();
+    headers.insert(header::CONTENT_TYPE, HeaderValue::from_static(format.content_type()));
+    if let Ok(disposition) =
+        HeaderValue::from_str(&format!("attachment; filename=\"{}\"", format.file_name()))
+    {
+        headers.insert(header::CONTENT_DISPOSITION, disposition);
+    }
+    // Stop nginx from buffering the whole download before forwarding it.
+    headers.insert("x-accel-buffering", HeaderValue::from_static("no"));
+    response
+}
+
+/// Read `select` row by row and send it to `tx` in `EXPORT_CHUNK_BYTES`
+/// chunks. Returns early when the client disconnects (the receiver is
+/// dropped), which also releases the database connection.
+async fn stream_rows(
+    db: DatabaseConnection,
+    select: Select<KaryawanEntity>,
+    format: ExportFormat,
+    tx: mpsc::Sender<Result<Bytes, io::Error>>,
+) {
+    let mut buf = Vec::with_capacity(EXPORT_CHUNK_BYTES * 2);
+    if format == ExportFormat::Csv {
+        buf.extend_from_slice(CSV_HEADER.as_bytes());
+    }
+
+    let mut rows = match select.into_model::<KaryawanWithKantor>().stream(&db).await {
+        Ok(rows) => rows,
+        Err(err) => {
+            let _ = tx.send(Err(io::Error::new(io::ErrorKind::Other, err.to_string()))).await;
+            return;
+        }
+    };
+
+    while let Some(row) = rows.next().await {
+        match row {
+            Ok(row) => format.write_row(&mut buf, &row),
+            Err(err) => {
+                // Headers are already sent; failing the body makes the
+                // client see a truncated download rather than a short file.
+                eprintln!("⚠️  Karyawan export aborted: {}", err);
+                let _ = tx.send(Err(io::Error::new(io::ErrorKind::Other, err.to_string()))).await;
+                return;
+            }
+        }
+
+        if buf.len() >= EXPORT_CHUNK_BYTES {
+            let chunk = Bytes::from(std::mem::replace(
+                &mut buf,
+                Vec::with_capacity(EXPORT_CHUNK_BYTES * 2),
+            ));
+            if tx.send(Ok(chunk)).await.is_err() {
+                return;
+            }
+        }
+    }
+
+    if !buf.is_empty() {
+        let _ = tx.send(Ok(Bytes::from(buf))).await;
+    }
+}
+
+fn write_csv_row(buf: &mut Vec<u8>, row: &KaryawanWithKantor) {
+    let fields = [
+        row.id.to_string(),
+        row.nama.clone(),
+        row.gaji.to_string(),
+        row.kantor_id.to_string(),
+        row.kantor_nama.clone().unwrap_or_default(),
+        row.jabatan_id.to_string(),
+        row.jabatan_nama.clone().unwrap_or_default(),
+        row.foto_path.clone().unwrap_or_default(),
+        row.foto_original_name.clone().unwrap_or_default(),
+        row.foto_size.map(|size| size.to_string()).unwrap_or_default(),
+        row.foto_mime_type.clone().unwrap_or_default(),
+        row.user_id.map(|id| id.to_string()).unwrap_or_default(),
+        row.created_by.map(|id| id.to_string()).unwrap_or_default(),
+        row.updated_by.map(|id| id.to_string()).unwrap_or_default(),
+        row.created_at.to_rfc3339(),
+        row.updated_at.to_rfc3339(),
+    ];
+
+    for (i, field) in fields.iter().enumerate() {
+        if i > 0 {
+            buf.push(b',');
+        }
+        csv_codec::write_field(buf, field);
+    }
+    buf.push(b'\n');
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use chrono::{FixedOffset, TimeZone};
+
+    fn row() -> KaryawanWithKantor {
+        let at = FixedOffset::east_opt(0)
+            .unwrap()
+            .with_ymd_and_hms(2025, 11, 3, 8, 0, 0)
+            .unwrap();
+        KaryawanWithKantor {
+            id: 7,
+            nama: "Budi, \"BS\" Santoso".to_string(),
+            gaji: 5_000_000,
+            kantor_id: 1,
+            kantor_nama: Some("Pusat".to_string()),
+            jabatan_id: 2,
+            jabatan_nama: None,
+            foto_path: None,
+            foto_original_name: None,
+            foto_size: None,
+            foto_mime_type: None,
+            user_id: Some(9),
+            created_by: None,
+            updated_by: None,
+            created_at: at,
+            updated_at: at,
+        }
+    }
+
+    #[test]
+    fn test_csv_row_is_quoted() {
+        let mut buf = Vec::new();
+        ExportFormat::Csv.write_row(&mut buf, &row());
+        assert_eq!(
+            String::from_utf8(buf).unwrap(),
+            "7,\"Budi, \"\"BS\"\" Santoso\",5000000,1,Pusat,2,,,,,,9,,,\
+2025-11-03T08:00:00+00:00,2025-11-03T08:00:00+00:00\n"
+        );
+        assert_eq!(CSV_HEADER.matches(',').count(), 15);
+    }
+
+    #[test]
+    fn test_ndjson_row_and_format_param() {
+        let mut buf = Vec::new();
+        ExportFormat::Ndjson.write_row(&mut buf, &row());
+        let line = String::from_utf8(buf).unwrap();
+        assert!(line.ends_with("}\n") && line.matches('\n').count() == 1);
+        let value: serde_json::Value = serde_json::from_str(line.trim_end()).unwrap();
+        assert_eq!(value["kantor_nama"], "Pusat");
+
+        assert_eq!(ExportFormat::parse(None), Some(ExportFormat::Ndjson));
+        assert_eq!(ExportFormat::parse(Some("csv")), Some(ExportFormat::Csv));
+        assert_eq!(ExportFormat::parse(Some("xlsx")), None);
+    }
+}
@@ -0,0 +1,50 @@
+use axum::{extract::State, response::Json};
+use serde::Serialize;
+
+use crate::{
+    database::{DatabasePoolStats, ReadReplicaStats},
+    models::ApiResponse,
+    services::{
+        count_cache::CountCacheStats,
+        stats_cache::StatsCacheStats,
+        login_throttle::LoginThrottleStats, password_pool::PasswordPoolStats,
+        provisioning::ProvisioningStats, refresh::RefreshStoreStats, revocation::EpochTableStats,
+        user_cache::UserCacheStats,
+    },
+    state::AppState,
+};
+
+/// Point-in-time counters from the in-process caches and pools.
+#[derive(Debug, Serialize)]
+pub struct MetricsSnapshot {
+    pub user_cache: UserCacheStats,
+    pub password_pool: PasswordPoolStats,
+    pub user_provisioning: ProvisioningStats,
+    pub auth_epochs: EpochTableStats,
+    pub refresh_tokens: RefreshStoreStats,
+    pub login_throttle: LoginThrottleStats,
+    pub database_pool: DatabasePoolStats,
+    pub read_replica: ReadReplicaStats,
+    pub list_counts: CountCacheStats,
+    pub karyawan_stats: StatsCacheStats,
+}
+
+pub async fn get_metrics(State(state): State<AppState>) -> Json<ApiResponse<MetricsSnapshot>> {
+    let snapshot = MetricsSnapshot {
+        user_cache: state.user_cache.stats(),
+        password_pool: state.password_pool.stats(),
+        user_provisioning: state.user_provisioner.stats(),
+        auth_epochs: state.epochs.stats(),
+        refresh_tokens: state.refresh_tokens.stats(),
+        login_throttle: state.login_throttle.stats(),
+        database_pool: state.db_pool.stats(&state.db),
+        read_replica: state.read_replica.stats(),
+        list_counts: state.list_counts.stats(),
+        karyawan_stats: state.karyawan_stats.stats(),
+    };
+
+    Json(ApiResponse::success(
+        "Runtime metrics retrieved successfully".to_string(),
+        snapshot,
+    ))
+}
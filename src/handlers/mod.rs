@@ -1,5 +1,10 @@
 pub mod karyawan;
+pub mod karyawan_bulk;
+pub mod karyawan_export;
 pub mod health;
 pub mod kantor;
 pub mod auth;
-pub mod jabatan;
\ No newline at end of file
+pub mod jabatan;
+pub mod metrics;
+pub mod search;
+pub mod sync;
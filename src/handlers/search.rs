@@ -0,0 +1,43 @@
+use crate::database::ReadConnection;
+use crate::models::{
+    search::{SearchHit, SearchQuery},
+    ApiResponse,
+};
+use axum::{
+    extract::{Query, State},
+    response::Json,
+};
+use sea_orm::{ConnectionTrait, FromQueryResult};
+
+/// `GET /api/search?q=`: karyawan (by nama) and kantor (by nama and alamat)
+/// matching every word of `q`, most relevant first, keyset-paginated.
+pub async fn search(
+    State(ReadConnection(db)): State<ReadConnection>,
+    Query(query): Query<SearchQuery>,
+) -> Json<ApiResponse<Vec<SearchHit>>> {
+    let request = match query.resolve() {
+        Ok(request) => request,
+        Err(errors) => {
+            return Json(ApiResponse::error(
+                "Invalid search parameters".to_string(),
+                errors,
+            ));
+        }
+    };
+
+    let statement = request.statement(db.get_database_backend());
+    match SearchHit::find_by_statement(statement).all(&db).await {
+        Ok(hits) => {
+            let (hits, meta) = request.finish(hits);
+            Json(ApiResponse::paginated(
+                "Search results retrieved successfully".to_string(),
+                hits,
+                meta,
+            ))
+        }
+        Err(err) => Json(ApiResponse::error(
+            "Failed to search".to_string(),
+            vec![format!("Database error: {}", err)],
+        )),
+    }
+}
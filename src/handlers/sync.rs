@@ -0,0 +1,197 @@
+use crate::models::{
+    jabatan::{Column as JabatanColumn, Entity as JabatanEntity, Model as Jabatan},
+    kantor::{Column as KantorColumn, Entity as KantorEntity, Model as Kantor},
+    karyawan::{Column as KaryawanColumn, Entity as KaryawanEntity, Model as Karyawan},
+    sync::{
+        SyncChanges, SyncQuery, SyncRequest, SyncTable, SYNC_SETTLE_SECONDS,
+        TOMBSTONE_RETENTION_DAYS,
+    },
+    sync_tombstone::{self, Column as TombstoneColumn, Entity as TombstoneEntity},
+    ApiResponse,
+};
+use axum::{
+    extract::{Query, State},
+    response::Json,
+};
+use sea_orm::{
+    prelude::DateTimeWithTimeZone, ColumnTrait, Condition, ConnectionTrait, DatabaseConnection,
+    DbErr, EntityTrait, QueryFilter, QueryOrder, QuerySelect, Statement,
+};
+
+/// `GET /api/karyawans/changes?since=`: karyawan changed or deleted since
+/// the token.
+pub async fn get_karyawan_changes(
+    State(db): State<DatabaseConnection>,
+    Query(query): Query<SyncQuery>,
+) -> Json<ApiResponse<SyncChanges<Karyawan>>> {
+    changes::<KaryawanEntity>(
+        &db,
+        SyncTable::Karyawan,
+        query,
+        (KaryawanColumn::UpdatedAt, KaryawanColumn::Id),
+        |row| (row.updated_at, row.id),
+    )
+    .await
+}
+
+/// `GET /api/kantors/changes?since=`: kantor changed or deleted since the token.
+pub async fn get_kantor_changes(
+    State(db): State<DatabaseConnection>,
+    Query(query): Query<SyncQuery>,
+) -> Json<ApiResponse<SyncChanges<Kantor>>> {
+    changes::<KantorEntity>(
+        &db,
+        SyncTable::Kantor,
+        query,
+        (KantorColumn::UpdatedAt, KantorColumn::Id),
+        |row| (row.updated_at, row.id),
+    )
+    .await
+}
+
+/// `GET /api/jabatans/changes?since=`: jabatan changed or deleted since the token.
+pub async fn get_jabatan_changes(
+    State(db): State<DatabaseConnection>,
+    Query(query): Query<SyncQuery>,
+) -> Json<ApiResponse<SyncChanges<Jabatan>>> {
+    changes::<JabatanEntity>(
+        &db,
+        SyncTable::Jabatan,
+        query,
+        (JabatanColumn::UpdatedAt, JabatanColumn::Id),
+        |row| (row.updated_at, row.id),
+    )
+    .await
+}
+
+/// One page of `table`'s changes feed.
+///
+/// Reads the primary: a replica that lags by more than
+/// [`SYNC_SETTLE_SECONDS`] would let the token move past rows it has not
+/// received yet, and clients would never see them.
+async fn changes<E: EntityTrait>(
+    db: &DatabaseConnection,
+    table: SyncTable,
+    query: SyncQuery,
+    (updated_at, id): (E::Column, E::Column),
+    position: fn(&E::Model) -> (DateTimeWithTimeZone, i32),
+) -> Json<ApiResponse<SyncChanges<E::Model>>> {
+    let request = match query.resolve(table) {
+        Ok(request) => request,
+        Err(errors) => {
+            return Json(ApiResponse::error("Invalid sync parameters".to_string(), errors));
+        }
+    };
+
+    let failed = |err: DbErr| {
+        Json(ApiResponse::error(
+            "Failed to retrieve changes".to_string(),
+            vec![format!("Database error: {}", err)],
+        ))
+    };
+
+    let until = match settled_until(db).await {
+        Ok(until) => until,
+        Err(err) => return failed(err),
+    };
+
+    if request.since.as_ref().map_or(false, |token| token.is_expired(until)) {
+        return Json(ApiResponse::error(
+            "Sync token expired".to_string(),
+            vec![format!(
+                "Token lebih lama dari {} hari; sinkronkan ulang tanpa parameter since",
+                TOMBSTONE_RETENTION_DAYS
+            )],
+        ));
+    }
+
+    let rows = match changed_rows::<E>(db, &request, until, updated_at, id).await {
+        Ok(rows) => rows,
+        Err(err) => return failed(err),
+    };
+    let tombstones = match deleted_since(db, &request, table, until).await {
+        Ok(tombstones) => tombstones,
+        Err(err) => return failed(err),
+    };
+
+    Json(ApiResponse::success(
+        "Changes retrieved successfully".to_string(),
+        request.finish(table, until, rows, tombstones, position),
+    ))
+}
+
+/// Upper bound of this poll: the database clock minus the settle delay.
+/// Taken from the database so app server clock skew cannot matter.
+async fn settled_until(db: &DatabaseConnection) -> Result<DateTimeWithTimeZone, DbErr> {
+    let statement = Statement::from_string(
+        db.get_database_backend(),
+        format!("SELECT NOW() - INTERVAL {} SECOND", SYNC_SETTLE_SECONDS),
+    );
+    let row = db
+        .query_one(statement)
+        .await?
+        .ok_or_else(|| DbErr::RecordNotFound("NOW()".to_string()))?;
+    // sqlx runs MySQL sessions in UTC.
+    let until: chrono::NaiveDateTime = row.try_get_by_index(0)?;
+    Ok(until.and_utc().fixed_offset())
+}
+
+/// Rows with `(updated_at, id)` after the token and `updated_at < until`,
+/// read in index order.
+async fn changed_rows<E: EntityTrait>(
+    db: &DatabaseConnection,
+    request: &SyncRequest,
+    until: DateTimeWithTimeZone,
+    updated_at: E::Column,
+    id: E::Column,
+) -> Result<Vec<E::Model>, DbErr> {
+    let mut select = E::find().filter(updated_at.lt(until));
+    if let Some(token) = &request.since {
+        if let Some(after) = token.updated_at {
+            select = select.filter(
+                Condition::any()
+                    .add(updated_at.gt(after))
+                    .add(Condition::all().add(updated_at.eq(after)).add(id.gt(token.id))),
+            );
+        }
+    }
+
+    select
+        .order_by_asc(updated_at)
+        .order_by_asc(id)
+        .limit(request.fetch_limit())
+        .all(db)
+        .await
+}
+
+/// Tombstones of `table` after the token with `deleted_at < until`. A first
+/// sync has nothing to remove, so it reads none.
+async fn deleted_since(
+    db: &DatabaseConnection,
+    request: &SyncRequest,
+    table: SyncTable,
+    until: DateTimeWithTimeZone,
+) -> Result<Vec<sync_tombstone::Model>, DbErr> {
+    let token = match &request.since {
+        Some(token) => token,
+        None => return Ok(Vec::new()),
+    };
+
+    TombstoneEntity::find()
+        .filter(TombstoneColumn::TableName.eq(table.as_str()))
+        .filter(TombstoneColumn::DeletedAt.lt(until))
+        .filter(
+            Condition::any()
+                .add(TombstoneColumn::DeletedAt.gt(token.deleted_at))
+                .add(
+                    Condition::all()
+                        .add(TombstoneColumn::DeletedAt.eq(token.deleted_at))
+                        .add(TombstoneColumn::Id.gt(token.tombstone_id)),
+                ),
+        )
+        .order_by_asc(TombstoneColumn::DeletedAt)
+        .order_by_asc(TombstoneColumn::Id)
+        .limit(request.fetch_limit())
+        .all(db)
+        .await
+}
@@ -0,0 +1,9 @@
+// Library target shared by the server binary and the Criterion benchmarks.
+pub mod database;
+pub mod handlers;
+pub mod middleware;
+pub mod models;
+pub mod routes;
+pub mod services;
+pub mod state;
+pub mod validators;
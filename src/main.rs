@@ -4,22 +4,17 @@ use std::{env, net::SocketAddr};
 use tower_http::cors::{CorsLayer, Any};
 use axum::http::{Method, HeaderValue, HeaderName};
 
-// Import modules
-mod database;
-mod handlers;
-mod models;
-mod routes;
-mod validators;
-mod services;
-mod middleware;
-
-use database::establish_connection;
-use handlers::health::health_check;
-use routes::{create_kantor_routes, create_karyawan_routes, public_auth_routes, auth_routes, jabatan_routes};
-use middleware::auth::jwt_auth_layer;
-use middleware::security::{security_headers, csrf_protection};
-use middleware::logger::request_logger;  // Import logger middleware
-use services::file_upload::FileUploadService;  // Import file upload service
+// Import modules from the library crate
+use my_axum_app::database::{establish_connection, ReadReplica};
+use my_axum_app::handlers::health::health_check;
+use my_axum_app::handlers::metrics::get_metrics;
+use my_axum_app::routes::{create_kantor_routes, create_karyawan_routes, public_auth_routes, auth_routes, jabatan_routes, search_routes};
+use my_axum_app::middleware::auth::{jwt_auth_layer, jwt_auth_layer_with_user_row};
+use my_axum_app::middleware::security::{security_headers, csrf_protection};
+use my_axum_app::middleware::logger::request_logger;  // Import logger middleware
+use my_axum_app::services::auth::JwtService;
+use my_axum_app::services::file_upload::FileUploadService;  // Import file upload service
+use my_axum_app::state::AppState;
 
 // Helper function to get CORS origins from environment variables
 // Returns (origins, is_wildcard)
@@ -94,6 +89,48 @@ async fn main() {
         }
     };
 
+    // Build the JWT service once; the HMAC key is reused by every request
+    let jwt_service = match JwtService::new() {
+        Ok(service) => service,
+        Err(err) => {
+            eprintln!("❌ Failed to initialize JWT service: {}", err);
+            std::process::exit(1);
+        }
+    };
+
+    // Optional read replica for GET handlers (DATABASE_READ_URL)
+    let read_replica = match ReadReplica::connect_from_env().await {
+        Ok(replica) => replica,
+        Err(err) => {
+            eprintln!("❌ Failed to configure read replica: {}", err);
+            std::process::exit(1);
+        }
+    };
+
+    let state = AppState::new(db, jwt_service).with_read_replica(read_replica);
+    state.read_replica.spawn();
+
+    // Load the revocation epoch table before serving stateless tokens
+    if state.epochs.is_stateless() {
+        if let Err(err) = state.epochs.refresh(&state.db).await {
+            eprintln!("❌ Failed to load auth epoch table: {}", err);
+            std::process::exit(1);
+        }
+        state.epochs.spawn(state.db.clone());
+        println!("✅ Stateless JWT verification enabled");
+    }
+
+    // Sample connection pool acquire latency for /metrics
+    state.db_pool.spawn(state.db.clone());
+
+    // Sweep expired refresh-token sessions in the background
+    state.refresh_tokens.spawn();
+
+    // Start the deferred user provisioning worker (no-op in sync mode)
+    state
+        .user_provisioner
+        .spawn(state.db.clone(), state.password_pool.clone());
+
     // Initialize upload directories
     if let Err(err) = FileUploadService::init_directories().await {
         eprintln!("⚠️  Warning: Failed to initialize upload directories: {}", err);
@@ -103,25 +140,39 @@ async fn main() {
     let app = Router::new()
         .route("/", get(|| async { "Hello, World!" }))
         .route("/health", get(health_check))
+        // Runtime metrics expose cache and pool internals (auth required)
+        .route(
+            "/metrics",
+            get(get_metrics).layer(from_fn_with_state(state.clone(), jwt_auth_layer))
+        )
         .nest_service("/uploads", tower_http::services::ServeDir::new("uploads"))
         // Public authentication routes (no auth required)
-        .nest("/api/auth", public_auth_routes())
+        .nest("/api/auth", public_auth_routes(state.clone()))
         // Protected authentication routes (auth required)  
-        .nest("/api/user", auth_routes())
+        .nest(
+            "/api/user",
+            auth_routes()
+                .layer(from_fn_with_state(state.clone(), jwt_auth_layer_with_user_row))
+        )
         // Protected API routes (auth required)
         .nest(
             "/api/karyawans", 
             create_karyawan_routes()
-                .layer(from_fn_with_state(db.clone(), jwt_auth_layer))
+                .layer(from_fn_with_state(state.clone(), jwt_auth_layer))
         )
         .nest(
             "/api/kantors", 
             create_kantor_routes()
-                .layer(from_fn_with_state(db.clone(), jwt_auth_layer))
+                .layer(from_fn_with_state(state.clone(), jwt_auth_layer))
         )
         .nest(
             "/api/jabatans", 
-            jabatan_routes(db.clone())
+            jabatan_routes(state.clone())
+        )
+        .nest(
+            "/api/search",
+            search_routes()
+                .layer(from_fn_with_state(state.clone(), jwt_auth_layer))
         )
         // Logging middleware (logs all requests)
         .layer(from_fn(request_logger))
@@ -140,6 +191,7 @@ async fn main() {
                         Method::GET,
                         Method::POST,
                         Method::PUT,
+                        Method::PATCH,
                         Method::DELETE,
                         Method::OPTIONS,
                     ])
@@ -158,6 +210,7 @@ async fn main() {
                         Method::GET,
                         Method::POST,
                         Method::PUT,
+                        Method::PATCH,
                         Method::DELETE,
                         Method::OPTIONS,
                     ])
@@ -170,7 +223,7 @@ async fn main() {
                     .allow_credentials(true)
             }
         })
-        .with_state(db);
+        .with_state(state);
 
     // Get host and port from environment or use defaults
     let host = env::var("HOST").unwrap_or_else(|_| "0.0.0.0".to_string());
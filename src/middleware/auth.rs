@@ -5,109 +5,211 @@ use axum::{
     response::Response,
     Json,
 };
-use sea_orm::{DatabaseConnection, EntityTrait};
+use sea_orm::EntityTrait;
 
 use crate::{
-    models::{common::ApiResponse, user::Entity as UserEntity},
-    services::auth::JwtService,
+    models::{
+        common::ApiResponse,
+        user::{Entity as UserEntity, Model as User},
+    },
+    services::{auth::ClaimsRef, revocation::Revocation},
+    state::AppState,
 };
 
+type AuthError = (StatusCode, Json<ApiResponse<()>>);
+
+/// Authenticate the bearer token and put the `User` into request extensions.
+///
+/// In the default stateful mode the user row is loaded (through the user
+/// cache). With `AUTH_MODE=stateless` the user is built from the token claims
+/// and checked against the in-memory epoch table only, so the database stays
+/// off the request path.
 pub async fn jwt_auth_layer(
-    State(db): State<DatabaseConnection>,
+    State(state): State<AppState>,
     request: Request,
     next: Next,
-) -> Result<Response, (StatusCode, Json<ApiResponse<()>>)> {
-    // Try to extract authorization header
-    let auth_header = request
-        .headers()
-        .get(axum::http::header::AUTHORIZATION)
-        .and_then(|header| header.to_str().ok())
-        .and_then(|header| {
-            if header.starts_with("Bearer ") {
-                Some(header.trim_start_matches("Bearer "))
-            } else {
-                None
-            }
-        });
+) -> Result<Response, AuthError> {
+    if state.epochs.is_stateless() {
+        authenticate_stateless(&state, request, next).await
+    } else {
+        authenticate_stateful(&state, request, next).await
+    }
+}
+
+/// Like [`jwt_auth_layer`], but always loads the user row.
+///
+/// Used for routes that return profile data the claims do not carry.
+pub async fn jwt_auth_layer_with_user_row(
+    State(state): State<AppState>,
+    request: Request,
+    next: Next,
+) -> Result<Response, AuthError> {
+    authenticate_stateful(&state, request, next).await
+}
+
+async fn authenticate_stateful(
+    state: &AppState,
+    request: Request,
+    next: Next,
+) -> Result<Response, AuthError> {
+    let token = bearer_token(&request)?;
 
-    let token = match auth_header {
-        Some(token) => token,
-        None => {
-            return Err((
+    // Verify and extract user ID from token
+    let user_id = match state.jwt.extract_user_id(token) {
+        Ok(id) => id,
+        Err(_) => {
+            return Err(auth_error(
                 StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["Missing authorization header".to_string()],
-                )),
+                "Unauthorized",
+                "Invalid or expired token",
             ));
         }
     };
 
-    // Initialize JWT service
-    let jwt_service = match JwtService::new() {
-        Ok(service) => service,
-        Err(_) => {
-            return Err((
-                StatusCode::INTERNAL_SERVER_ERROR,
-                Json(ApiResponse::error(
-                    "Authentication error".to_string(),
-                    vec!["JWT service initialization failed".to_string()],
-                )),
-            ));
-        }
+    // Fetch user from the cache, falling back to the database
+    let user = match state.user_cache.get(user_id) {
+        Some(user) => user,
+        None => match UserEntity::find_by_id(user_id).one(&state.db).await {
+            Ok(Some(user)) => {
+                state.user_cache.insert(user.clone());
+                user
+            }
+            Ok(None) => {
+                return Err(auth_error(
+                    StatusCode::UNAUTHORIZED,
+                    "Unauthorized",
+                    "User not found",
+                ));
+            }
+            Err(_) => {
+                return Err(auth_error(
+                    StatusCode::INTERNAL_SERVER_ERROR,
+                    "Authentication error",
+                    "Database error",
+                ));
+            }
+        },
     };
 
-    // Verify and extract user ID from token
-    let user_id = match jwt_service.extract_user_id(token) {
-        Ok(id) => id,
+    // Check if user is active
+    if !user.is_active {
+        return Err(auth_error(
+            StatusCode::FORBIDDEN,
+            "Forbidden",
+            "Account is not active",
+        ));
+    }
+
+    // Add user to request extensions
+    let mut request = request;
+    request.extensions_mut().insert(user);
+
+    Ok(next.run(request).await)
+}
+
+async fn authenticate_stateless(
+    state: &AppState,
+    request: Request,
+    next: Next,
+) -> Result<Response, AuthError> {
+    let token = bearer_token(&request)?;
+
+    let verified = state.jwt.verify_with(token, |claims| {
+        let user_id = claims
+            .sub
+            .parse::<i32>()
+            .map_err(|e| anyhow::anyhow!("Invalid user ID in token: {}", e))?;
+        match (claims.is_active, claims.security_epoch) {
+            (Some(is_active), Some(epoch)) => {
+                let user = user_from_claims(user_id, epoch, claims);
+                Ok((user_id, is_active, epoch, user))
+            }
+            // Tokens issued before stateless mode existed carry no epoch
+            _ => Err(anyhow::anyhow!("Token has no security epoch")),
+        }
+    });
+
+    let (user_id, is_active, epoch, user) = match verified {
+        Ok(verified) => verified,
         Err(_) => {
-            return Err((
+            return Err(auth_error(
                 StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["Invalid or expired token".to_string()],
-                )),
+                "Unauthorized",
+                "Invalid or expired token",
             ));
         }
     };
 
-    // Fetch user from database
-    let user = match UserEntity::find_by_id(user_id).one(&db).await {
-        Ok(Some(user)) => user,
-        Ok(None) => {
-            return Err((
+    match state.epochs.check(user_id, epoch, is_active) {
+        Ok(()) => {}
+        Err(Revocation::Revoked) => {
+            return Err(auth_error(
                 StatusCode::UNAUTHORIZED,
-                Json(ApiResponse::error(
-                    "Unauthorized".to_string(),
-                    vec!["User not found".to_string()],
-                )),
+                "Unauthorized",
+                "Token has been revoked",
             ));
         }
-        Err(_) => {
-            return Err((
-                StatusCode::INTERNAL_SERVER_ERROR,
-                Json(ApiResponse::error(
-                    "Authentication error".to_string(),
-                    vec!["Database error".to_string()],
-                )),
+        Err(Revocation::Inactive) => {
+            return Err(auth_error(
+                StatusCode::FORBIDDEN,
+                "Forbidden",
+                "Account is not active",
+            ));
+        }
+        Err(Revocation::Deleted) => {
+            return Err(auth_error(
+                StatusCode::UNAUTHORIZED,
+                "Unauthorized",
+                "User not found",
             ));
         }
-    };
-
-    // Check if user is active
-    if !user.is_active {
-        return Err((
-            StatusCode::FORBIDDEN,
-            Json(ApiResponse::error(
-                "Forbidden".to_string(),
-                vec!["Account is not active".to_string()],
-            )),
-        ));
     }
 
-    // Add user to request extensions
     let mut request = request;
     request.extensions_mut().insert(user);
 
     Ok(next.run(request).await)
-}
\ No newline at end of file
+}
+
+/// Build the request user from token claims. Fields the token does not carry
+/// (password hash, full name) are left empty; timestamps are set to `iat`.
+fn user_from_claims(user_id: i32, epoch: i32, claims: ClaimsRef<'_>) -> User {
+    let issued_at = chrono::DateTime::from_timestamp(claims.iat, 0)
+        .map(|issued_at| issued_at.naive_utc())
+        .unwrap_or_default();
+
+    User {
+        id: user_id,
+        username: claims.username.into_owned(),
+        email: claims.email.into_owned(),
+        password_hash: String::new(),
+        full_name: None,
+        is_active: true,
+        security_epoch: epoch,
+        created_at: issued_at,
+        updated_at: issued_at,
+    }
+}
+
+fn bearer_token(request: &Request) -> Result<&str, AuthError> {
+    // Try to extract authorization header
+    request
+        .headers()
+        .get(axum::http::header::AUTHORIZATION)
+        .and_then(|header| header.to_str().ok())
+        .and_then(|header| header.strip_prefix("Bearer "))
+        .ok_or_else(|| {
+            auth_error(
+                StatusCode::UNAUTHORIZED,
+                "Unauthorized",
+                "Missing authorization header",
+            )
+        })
+}
+
+fn auth_error(status: StatusCode, message: &str, error: &str) -> AuthError {
+    (
+        status,
+        Json(ApiResponse::error(message.to_string(), vec![error.to_string()])),
+    )
+}
@@ -1,3 +1,5 @@
 pub mod auth;
 pub mod security;
-pub mod logger;
\ No newline at end of file
+pub mod logger;
+pub mod overload;
+pub mod throttle;
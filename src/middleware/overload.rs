@@ -0,0 +1,20 @@
+use axum::{
+    http::{header::RETRY_AFTER, HeaderValue, StatusCode},
+    response::Response,
+};
+
+/// Adds `Retry-After` to 503 responses.
+///
+/// Applied to the auth routes, where a 503 means the password hashing pool is
+/// saturated and the client should back off briefly instead of retrying hot.
+pub async fn retry_after_on_unavailable(mut response: Response) -> Response {
+    if response.status() == StatusCode::SERVICE_UNAVAILABLE
+        && !response.headers().contains_key(RETRY_AFTER)
+    {
+        response
+            .headers_mut()
+            .insert(RETRY_AFTER, HeaderValue::from_static("1"));
+    }
+
+    response
+}
@@ -0,0 +1,88 @@
+use axum::{
+    extract::{ConnectInfo, Request, State},
+    http::{header::RETRY_AFTER, HeaderMap, HeaderValue, StatusCode},
+    middleware::Next,
+    response::{IntoResponse, Response},
+    Json,
+};
+use std::net::{IpAddr, SocketAddr};
+use std::sync::Arc;
+use std::time::Duration;
+
+use crate::{models::common::ApiResponse, services::login_throttle::LoginThrottle};
+
+/// Client address as seen by the login throttle, available to handlers as an
+/// `Extension<ClientIp>`.
+#[derive(Debug, Clone, Copy)]
+pub struct ClientIp(pub IpAddr);
+
+/// Reject clients over their failed-login budget before the body is read.
+///
+/// Also adds `Retry-After` to 429 responses produced by the handlers (the
+/// per-account limit is checked there, once the username is known).
+pub async fn login_throttle_layer(
+    State(throttle): State<Arc<LoginThrottle>>,
+    ConnectInfo(addr): ConnectInfo<SocketAddr>,
+    mut request: Request,
+    next: Next,
+) -> Response {
+    let ip = if throttle.trusts_proxy(addr.ip()) {
+        forwarded_ip(request.headers()).unwrap_or_else(|| addr.ip())
+    } else {
+        addr.ip()
+    };
+
+    if let Err(retry_after) = throttle.check_ip(ip) {
+        let mut response = (
+            StatusCode::TOO_MANY_REQUESTS,
+            Json(ApiResponse::<()>::error(
+                "Too many attempts".to_string(),
+                vec![too_many_attempts_message(retry_after)],
+            )),
+        )
+            .into_response();
+        set_retry_after(&mut response, retry_after);
+        return response;
+    }
+
+    request.extensions_mut().insert(ClientIp(ip));
+    let mut response = next.run(request).await;
+
+    if response.status() == StatusCode::TOO_MANY_REQUESTS
+        && !response.headers().contains_key(RETRY_AFTER)
+    {
+        set_retry_after(&mut response, throttle.window());
+    }
+
+    response
+}
+
+/// Indonesian error text shared with the handlers.
+pub fn too_many_attempts_message(retry_after: Duration) -> String {
+    format!(
+        "Terlalu banyak percobaan, coba lagi dalam {} detik",
+        retry_after.as_secs().max(1)
+    )
+}
+
+/// The proxy appends the address it saw last, so the rightmost
+/// `X-Forwarded-For` entry is the one a client cannot spoof.
+fn forwarded_ip(headers: &HeaderMap) -> Option<IpAddr> {
+    headers
+        .get("x-forwarded-for")
+        .and_then(|value| value.to_str().ok())
+        .and_then(|value| value.rsplit(',').next())
+        .or_else(|| {
+            headers
+                .get("x-real-ip")
+                .and_then(|value| value.to_str().ok())
+        })
+        .and_then(|value| value.trim().parse().ok())
+}
+
+fn set_retry_after(response: &mut Response, retry_after: Duration) {
+    let seconds = retry_after.as_secs().max(1).to_string();
+    if let Ok(value) = HeaderValue::from_str(&seconds) {
+        response.headers_mut().insert(RETRY_AFTER, value);
+    }
+}
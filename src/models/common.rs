@@ -1,11 +1,16 @@
 use serde::{Deserialize, Serialize};
 
+use super::pagination::PageMeta;
+
 #[derive(Serialize, Deserialize, Debug)]
 pub struct ApiResponse<T> {
     pub success: bool,
     pub message: String,
     pub data: Option<T>,
     pub errors: Option<Vec<String>>,
+    /// Only present on paginated list responses.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub page: Option<PageMeta>,
 }
 
 impl<T> ApiResponse<T> {
@@ -15,6 +20,17 @@ impl<T> ApiResponse<T> {
             message,
             data: Some(data),
             errors: None,
+            page: None,
+        }
+    }
+
+    pub fn paginated(message: String, data: T, page: PageMeta) -> Self {
+        Self {
+            success: true,
+            message,
+            data: Some(data),
+            errors: None,
+            page: Some(page),
         }
     }
     
@@ -24,6 +40,19 @@ impl<T> ApiResponse<T> {
             message,
             data: None,
             errors: Some(errors),
+            page: None,
+        }
+    }
+
+    /// Error response that still carries data, e.g. per-row results of a
+    /// rejected bulk request.
+    pub fn error_with_data(message: String, data: T, errors: Vec<String>) -> Self {
+        Self {
+            success: false,
+            message,
+            data: Some(data),
+            errors: Some(errors),
+            page: None,
         }
     }
 }
\ No newline at end of file
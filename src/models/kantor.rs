@@ -1,7 +1,10 @@
 use sea_orm::entity::prelude::*;
+use sea_orm::{DbBackend, FromQueryResult, Statement, Value};
 use serde::{Deserialize, Serialize};
 use validator::Validate;
 
+use crate::validators::kantor::{validate_latitude, validate_longitude};
+
 #[derive(Clone, Debug, PartialEq, DeriveEntityModel, Serialize, Deserialize)]
 #[sea_orm(table_name = "kantor")]
 pub struct Model {
@@ -90,3 +93,197 @@ pub struct UpdateKantorRequest {
     #[validate(custom(function = "crate::validators::kantor::validate_latitude"))]
     pub latitude: f64,
 }
+
+/// Mean Earth radius (IUGG) used for kantor distances, in metres.
+pub const EARTH_RADIUS_M: f64 = 6_371_008.8;
+/// `radius` used when the client does not send one, in metres.
+pub const DEFAULT_NEARBY_RADIUS_M: f64 = 5_000.0;
+/// Largest `radius` accepted; keeps the bounding box selective.
+pub const MAX_NEARBY_RADIUS_M: f64 = 100_000.0;
+pub const DEFAULT_NEARBY_LIMIT: u64 = 10;
+pub const MAX_NEARBY_LIMIT: u64 = 100;
+
+/// Raw `GET /api/kantors/nearby` parameters, kept as strings like `PageQuery`.
+#[derive(Debug, Default, Deserialize)]
+pub struct NearbyKantorQuery {
+    pub lat: Option<String>,
+    pub lon: Option<String>,
+    /// Metres.
+    pub radius: Option<String>,
+    pub limit: Option<String>,
+}
+
+/// Validated [`NearbyKantorQuery`].
+#[derive(Debug, Clone, PartialEq)]
+pub struct NearbyKantorRequest {
+    pub latitude: f64,
+    pub longitude: f64,
+    pub radius_m: f64,
+    pub limit: u64,
+}
+
+/// A kantor with its great-circle distance from the requested point.
+#[derive(Serialize, Deserialize, Debug, Clone, PartialEq, FromQueryResult)]
+pub struct KantorDistance {
+    pub id: i32,
+    pub nama: String,
+    pub alamat: String,
+    pub longitude: Decimal,
+    pub latitude: Decimal,
+    pub distance_m: f64,
+}
+
+impl NearbyKantorQuery {
+    pub fn resolve(&self) -> Result<NearbyKantorRequest, Vec<String>> {
+        let mut errors = Vec::new();
+        let mut number = |value: &Option<String>, required: bool, error: &str| {
+            match value.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+                None if !required => None,
+                Some(value) => match value.parse::<f64>() {
+                    Ok(number) if number.is_finite() => Some(number),
+                    _ => {
+                        errors.push(error.to_string());
+                        None
+                    }
+                },
+                None => {
+                    errors.push(error.to_string());
+                    None
+                }
+            }
+        };
+
+        let latitude = number(&self.lat, true, "lat wajib diisi dan harus berupa angka");
+        let longitude = number(&self.lon, true, "lon wajib diisi dan harus berupa angka");
+        let radius_m = number(&self.radius, false, "radius harus berupa angka (meter)");
+        let limit = number(&self.limit, false, "limit harus berupa angka");
+
+        let range_errors = [
+            latitude.and_then(|value| validate_latitude(value).err()),
+            longitude.and_then(|value| validate_longitude(value).err()),
+        ];
+        for error in range_errors.into_iter().flatten() {
+            errors.push(error.message.map(|msg| msg.to_string()).unwrap_or_default());
+        }
+
+        let radius_m = radius_m.unwrap_or(DEFAULT_NEARBY_RADIUS_M);
+        if radius_m <= 0.0 || radius_m > MAX_NEARBY_RADIUS_M {
+            errors.push(format!("radius harus antara 1-{} meter", MAX_NEARBY_RADIUS_M));
+        }
+
+        let limit = limit.unwrap_or(DEFAULT_NEARBY_LIMIT as f64);
+        if limit.fract() != 0.0 || limit < 1.0 || limit > MAX_NEARBY_LIMIT as f64 {
+            errors.push(format!("limit harus berupa angka antara 1-{}", MAX_NEARBY_LIMIT));
+        }
+
+        match (latitude, longitude) {
+            (Some(latitude), Some(longitude)) if errors.is_empty() => Ok(NearbyKantorRequest {
+                latitude,
+                longitude,
+                radius_m,
+                limit: limit as u64,
+            }),
+            _ => Err(errors),
+        }
+    }
+}
+
+impl NearbyKantorRequest {
+    /// `(min_lon, min_lat, max_lon, max_lat)` of a box containing every
+    /// point within `radius_m`. Near a pole, or when the circle crosses the
+    /// antimeridian, the box spans all longitudes instead of wrapping.
+    pub fn bounding_box(&self) -> (f64, f64, f64, f64) {
+        let angular = self.radius_m / EARTH_RADIUS_M;
+        let dlat = angular.to_degrees();
+        let (min_lat, max_lat) = (self.latitude - dlat, self.latitude + dlat);
+        if min_lat <= -90.0 || max_lat >= 90.0 {
+            return (-180.0, min_lat.max(-90.0), 180.0, max_lat.min(90.0));
+        }
+
+        // Widest longitude offset of the circle, reached north or south of
+        // the centre rather than on its parallel.
+        let dlon = (angular.sin() / self.latitude.to_radians().cos()).asin().to_degrees();
+        let (min_lon, max_lon) = (self.longitude - dlon, self.longitude + dlon);
+        if min_lon < -180.0 || max_lon > 180.0 {
+            (-180.0, min_lat, 180.0, max_lat)
+        } else {
+            (min_lon, min_lat, max_lon, max_lat)
+        }
+    }
+
+    /// Kantor within `radius_m`, nearest first.
+    ///
+    /// `MBRContains` on the bounding box is answered by the SPATIAL index on
+    /// `location`, so only kantor inside the box are read; those are then
+    /// filtered and ordered by the exact haversine distance
+    /// (`ST_Distance_Sphere`).
+    pub fn statement(&self, backend: DbBackend) -> Statement {
+        let (min_lon, min_lat, max_lon, max_lat) = self.bounding_box();
+        let distance = "ST_Distance_Sphere(location, POINT(?, ?), ?)";
+        let sql = format!(
+            "SELECT id, nama, alamat, longitude, latitude, {d} AS distance_m FROM kantor \
+             WHERE MBRContains(ST_MakeEnvelope(POINT(?, ?), POINT(?, ?)), location) \
+             AND {d} <= ? ORDER BY distance_m, id LIMIT {limit}",
+            d = distance,
+            limit = self.limit,
+        );
+        let (lon, lat) = (self.longitude, self.latitude);
+        let values = [
+            lon, lat, EARTH_RADIUS_M,
+            min_lon, min_lat, max_lon, max_lat,
+            lon, lat, EARTH_RADIUS_M, self.radius_m,
+        ]
+        .into_iter()
+        .map(Value::from);
+
+        Statement::from_sql_and_values(backend, sql, values)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn request(latitude: f64, longitude: f64, radius_m: f64) -> NearbyKantorRequest {
+        NearbyKantorRequest { latitude, longitude, radius_m, limit: 10 }
+    }
+
+    #[test]
+    fn test_resolve_nearby_query() {
+        let query = NearbyKantorQuery {
+            lat: Some("-6.2".to_string()),
+            lon: Some("106.8".to_string()),
+            ..Default::default()
+        };
+        assert_eq!(query.resolve().unwrap(), request(-6.2, 106.8, DEFAULT_NEARBY_RADIUS_M));
+
+        let invalid = NearbyKantorQuery {
+            lat: Some("91".to_string()),
+            lon: None,
+            radius: Some("0".to_string()),
+            limit: Some("2.5".to_string()),
+        };
+        assert_eq!(invalid.resolve().unwrap_err().len(), 4);
+    }
+
+    #[test]
+    fn test_bounding_box() {
+        // One degree of latitude is ~111.2 km everywhere.
+        let (min_lon, min_lat, max_lon, max_lat) = request(0.0, 100.0, 111_195.0).bounding_box();
+        assert!((max_lat - 1.0).abs() < 1e-3 && (min_lat + 1.0).abs() < 1e-3);
+        assert!((max_lon - 101.0).abs() < 1e-3 && (min_lon - 99.0).abs() < 1e-3);
+
+        // Longitude degrees shrink with latitude, so the box widens.
+        let (min_lon, _, max_lon, _) = request(60.0, 10.0, 111_195.0).bounding_box();
+        assert!(max_lon - min_lon > 3.9);
+
+        // Near a pole or the antimeridian every longitude is searched.
+        assert_eq!(request(89.9, 0.0, 50_000.0).bounding_box().0, -180.0);
+        let (min_lon, _, max_lon, _) = request(0.0, 179.9, 50_000.0).bounding_box();
+        assert_eq!((min_lon, max_lon), (-180.0, 180.0));
+
+        let statement = request(-6.2, 106.8, 5_000.0).statement(DbBackend::MySql);
+        let placeholders = statement.sql.matches('?').count();
+        assert_eq!(statement.values.map(|values| values.0.len()), Some(placeholders));
+    }
+}
@@ -1,7 +1,11 @@
 use sea_orm::entity::prelude::*;
+use sea_orm::sea_query::{Expr, LikeExpr};
+use sea_orm::{Condition, Set, UpdateMany, Value};
 use serde::{Deserialize, Serialize};
 use validator::Validate;
 
+use super::pagination::{Cursor, SortKey};
+
 #[derive(Clone, Debug, PartialEq, DeriveEntityModel, Eq, Serialize, Deserialize)]
 #[sea_orm(table_name = "karyawan")]
 pub struct Model {
@@ -16,6 +20,9 @@ pub struct Model {
     pub foto_size: Option<i64>,
     pub foto_mime_type: Option<String>,
     pub user_id: Option<i32>,
+    /// Waiting for the user provisioner to link an account. Internal.
+    #[serde(skip)]
+    pub needs_account: bool,
     pub created_by: Option<i32>,
     pub updated_by: Option<i32>,
     pub created_at: DateTimeWithTimeZone,
@@ -102,3 +109,450 @@ pub struct UpdateKaryawanRequest {
     #[validate(custom(function = "crate::validators::karyawan::validate_jabatan_id"))]
     pub jabatan_id: String,
 }
+
+/// Body of `PATCH /api/karyawans/:id`: only the fields present are changed.
+#[derive(Serialize, Deserialize, Debug, Default, Validate)]
+pub struct PatchKaryawanRequest {
+    #[validate(length(min = 2, max = 50, message = "Nama harus antara 2-50 karakter"))]
+    pub nama: Option<String>,
+
+    #[validate(custom(function = "crate::validators::karyawan::validate_gaji"))]
+    pub gaji: Option<String>,
+
+    #[validate(custom(function = "crate::validators::karyawan::validate_kantor_id"))]
+    pub kantor_id: Option<String>,
+
+    #[validate(custom(function = "crate::validators::karyawan::validate_jabatan_id"))]
+    pub jabatan_id: Option<String>,
+}
+
+/// Columns written by a single-row update, so the write needs no SELECT
+/// before it. `None` columns are left untouched; for the photo columns
+/// `Some(None)` clears the value.
+#[derive(Serialize, Deserialize, Debug, Default, Clone, PartialEq)]
+pub struct KaryawanChanges {
+    pub id: i32,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub nama: Option<String>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub gaji: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub kantor_id: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub jabatan_id: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub foto_path: Option<Option<String>>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub foto_original_name: Option<Option<String>>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub foto_size: Option<Option<i64>>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub foto_mime_type: Option<Option<String>>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub updated_by: Option<i32>,
+}
+
+impl KaryawanChanges {
+    /// True when no data column is set (`updated_by` alone is not a change).
+    pub fn is_empty(&self) -> bool {
+        self.nama.is_none()
+            && self.gaji.is_none()
+            && self.kantor_id.is_none()
+            && self.jabatan_id.is_none()
+            && self.foto_path.is_none()
+            && self.foto_original_name.is_none()
+            && self.foto_size.is_none()
+            && self.foto_mime_type.is_none()
+    }
+
+    /// `UPDATE karyawan SET <set columns> WHERE id = ?`.
+    pub fn update(&self) -> UpdateMany<Entity> {
+        let mut model = ActiveModel::default();
+        if let Some(nama) = &self.nama {
+            model.nama = Set(nama.clone());
+        }
+        if let Some(gaji) = self.gaji {
+            model.gaji = Set(gaji);
+        }
+        if let Some(kantor_id) = self.kantor_id {
+            model.kantor_id = Set(kantor_id);
+        }
+        if let Some(jabatan_id) = self.jabatan_id {
+            model.jabatan_id = Set(jabatan_id);
+        }
+        if let Some(foto_path) = &self.foto_path {
+            model.foto_path = Set(foto_path.clone());
+        }
+        if let Some(foto_original_name) = &self.foto_original_name {
+            model.foto_original_name = Set(foto_original_name.clone());
+        }
+        if let Some(foto_size) = self.foto_size {
+            model.foto_size = Set(foto_size);
+        }
+        if let Some(foto_mime_type) = &self.foto_mime_type {
+            model.foto_mime_type = Set(foto_mime_type.clone());
+        }
+        if let Some(updated_by) = self.updated_by {
+            model.updated_by = Set(Some(updated_by));
+        }
+
+        Entity::update_many()
+            .set(model)
+            .filter(Column::Id.eq(self.id))
+    }
+}
+
+/// Outcome of one row of a bulk request, in request order.
+#[derive(Serialize, Deserialize, Debug, Clone, PartialEq)]
+pub struct BulkRowResult {
+    pub index: usize,
+    pub id: Option<i32>,
+    #[serde(default, skip_serializing_if = "Vec::is_empty")]
+    pub errors: Vec<String>,
+}
+
+#[derive(Serialize, Deserialize, Debug)]
+pub struct BulkResult {
+    pub succeeded: usize,
+    pub failed: usize,
+    pub rows: Vec<BulkRowResult>,
+}
+
+/// Last line of a CSV import response. `errors` is set when the import
+/// stopped early; rows reported before that were committed.
+#[derive(Serialize, Deserialize, Debug)]
+pub struct ImportSummary {
+    pub succeeded: usize,
+    pub failed: usize,
+    #[serde(default, skip_serializing_if = "Vec::is_empty")]
+    pub errors: Vec<String>,
+}
+
+impl BulkResult {
+    pub fn new(rows: Vec<BulkRowResult>) -> Self {
+        let failed = rows.iter().filter(|row| !row.errors.is_empty()).count();
+        Self {
+            succeeded: rows.len() - failed,
+            failed,
+            rows,
+        }
+    }
+}
+
+/// Rows targeted by a bulk delete or reassign: explicit `ids` and/or every
+/// karyawan of a kantor or jabatan. At least one selector is required.
+#[derive(Serialize, Deserialize, Debug, Default, Clone)]
+pub struct BulkSelection {
+    pub ids: Option<Vec<i32>>,
+    pub kantor_id: Option<i32>,
+    pub jabatan_id: Option<i32>,
+}
+
+impl BulkSelection {
+    /// WHERE clause for the selection; `max_ids` bounds the `ids` list.
+    pub fn condition(&self, max_ids: usize) -> Result<Condition, Vec<String>> {
+        let mut errors = Vec::new();
+        let mut condition = Condition::all();
+
+        if let Some(ids) = &self.ids {
+            if ids.is_empty() || ids.len() > max_ids {
+                errors.push(format!("ids harus berisi 1-{} ID", max_ids));
+            } else if ids.iter().any(|id| *id <= 0) {
+                errors.push("ID harus berupa angka positif yang valid".to_string());
+            } else {
+                condition = condition.add(Column::Id.is_in(ids.iter().copied()));
+            }
+        }
+        if let Some(kantor_id) = self.kantor_id {
+            condition = condition.add(Column::KantorId.eq(kantor_id));
+        }
+        if let Some(jabatan_id) = self.jabatan_id {
+            condition = condition.add(Column::JabatanId.eq(jabatan_id));
+        }
+
+        if self.ids.is_none() && self.kantor_id.is_none() && self.jabatan_id.is_none() {
+            errors.push("Isi minimal salah satu dari ids, kantor_id atau jabatan_id".to_string());
+        }
+
+        if errors.is_empty() {
+            Ok(condition)
+        } else {
+            Err(errors)
+        }
+    }
+}
+
+#[derive(Serialize, Deserialize, Debug)]
+pub struct BulkReassignRequest {
+    #[serde(flatten)]
+    pub selection: BulkSelection,
+    pub to_kantor_id: Option<i32>,
+    pub to_jabatan_id: Option<i32>,
+}
+
+#[derive(Serialize, Deserialize, Debug)]
+pub struct BulkDeleteResult {
+    pub deleted: u64,
+    pub ids: Vec<i32>,
+    /// Requested ids that did not exist.
+    #[serde(default, skip_serializing_if = "Vec::is_empty")]
+    pub not_found: Vec<i32>,
+}
+
+#[derive(Serialize, Deserialize, Debug)]
+pub struct BulkReassignResult {
+    pub updated: u64,
+}
+
+/// Filters and sort accepted by the karyawan list endpoints, next to the
+/// pagination parameters. Kept as strings for the same reason as `PageQuery`.
+#[derive(Debug, Default, Deserialize)]
+pub struct KaryawanListQuery {
+    pub kantor_id: Option<String>,
+    pub jabatan_id: Option<String>,
+    pub gaji_min: Option<String>,
+    pub gaji_max: Option<String>,
+    pub nama: Option<String>,
+    pub sort: Option<String>,
+}
+
+/// Validated [`KaryawanListQuery`].
+#[derive(Debug, Clone)]
+pub struct KaryawanFilter {
+    pub kantor_id: Option<i32>,
+    pub jabatan_id: Option<i32>,
+    pub gaji_min: Option<i32>,
+    pub gaji_max: Option<i32>,
+    /// Matches names starting with this text.
+    pub nama: Option<String>,
+    pub sort: SortKey<Column>,
+}
+
+/// Columns a karyawan list may be sorted on; prefix with `-` for descending.
+pub const KARYAWAN_SORT_COLUMNS: [&str; 5] = ["id", "nama", "gaji", "created_at", "updated_at"];
+
+impl KaryawanListQuery {
+    pub fn resolve(&self) -> Result<KaryawanFilter, Vec<String>> {
+        let mut errors = Vec::new();
+
+        let kantor_id = parse_param(&self.kantor_id, "kantor_id", 1, &mut errors);
+        let jabatan_id = parse_param(&self.jabatan_id, "jabatan_id", 1, &mut errors);
+        let gaji_min = parse_param(&self.gaji_min, "gaji_min", 0, &mut errors);
+        let gaji_max = parse_param(&self.gaji_max, "gaji_max", 0, &mut errors);
+        if let (Some(min), Some(max)) = (gaji_min, gaji_max) {
+            if min > max {
+                errors.push("gaji_min tidak boleh lebih besar dari gaji_max".to_string());
+            }
+        }
+
+        let nama = self
+            .nama
+            .as_deref()
+            .map(str::trim)
+            .filter(|value| !value.is_empty())
+            .map(str::to_string);
+        if nama.as_ref().map_or(false, |value| value.chars().count() > 50) {
+            errors.push("nama maksimal 50 karakter".to_string());
+        }
+
+        let sort = match self.sort.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => SortKey::by_id(),
+            Some(value) => match karyawan_sort(value) {
+                Some(sort) => sort,
+                None => {
+                    errors.push(format!(
+                        "sort harus salah satu dari: {} (awali dengan - untuk urutan menurun)",
+                        KARYAWAN_SORT_COLUMNS.join(", ")
+                    ));
+                    SortKey::by_id()
+                }
+            },
+        };
+
+        if errors.is_empty() {
+            Ok(KaryawanFilter { kantor_id, jabatan_id, gaji_min, gaji_max, nama, sort })
+        } else {
+            Err(errors)
+        }
+    }
+}
+
+impl KaryawanFilter {
+    /// WHERE clause for the filters; each one can use an index on `karyawan`.
+    pub fn condition(&self) -> Condition {
+        let mut condition = Condition::all();
+        if let Some(kantor_id) = self.kantor_id {
+            condition = condition.add(Column::KantorId.eq(kantor_id));
+        }
+        if let Some(jabatan_id) = self.jabatan_id {
+            condition = condition.add(Column::JabatanId.eq(jabatan_id));
+        }
+        if let Some(gaji_min) = self.gaji_min {
+            condition = condition.add(Column::Gaji.gte(gaji_min));
+        }
+        if let Some(gaji_max) = self.gaji_max {
+            condition = condition.add(Column::Gaji.lte(gaji_max));
+        }
+        if let Some(nama) = &self.nama {
+            // Escape LIKE wildcards so the input is matched literally; a
+            // constant prefix lets MySQL range-scan idx_karyawan_nama.
+            let pattern = nama.replace('!', "!!").replace('%', "!%").replace('_', "!_");
+            condition = condition.add(
+                Expr::col((Entity, Column::Nama))
+                    .like(LikeExpr::new(format!("{}%", pattern)).escape('!')),
+            );
+        }
+        condition
+    }
+
+    /// Identifies the filter in count cache keys.
+    pub fn cache_key(&self) -> String {
+        format!(
+            "karyawan?kantor_id={:?}&jabatan_id={:?}&gaji_min={:?}&gaji_max={:?}&nama={:?}",
+            self.kantor_id, self.jabatan_id, self.gaji_min, self.gaji_max, self.nama
+        )
+    }
+
+    /// Cursor pointing after `row` in the current sort order.
+    pub fn cursor<R: KaryawanRow>(&self, row: &R) -> Cursor {
+        let key = match self.sort.name {
+            "nama" => Some(row.nama().to_string()),
+            "gaji" => Some(row.gaji().to_string()),
+            "created_at" => Some(row.created_at().to_rfc3339()),
+            "updated_at" => Some(row.updated_at().to_rfc3339()),
+            _ => None,
+        };
+        self.sort.cursor(row.id(), key)
+    }
+}
+
+/// Fields every karyawan list projection carries, so cursors can be built
+/// from either the plain model or a joined row.
+pub trait KaryawanRow {
+    fn id(&self) -> i32;
+    fn nama(&self) -> &str;
+    fn gaji(&self) -> i32;
+    fn created_at(&self) -> &DateTimeWithTimeZone;
+    fn updated_at(&self) -> &DateTimeWithTimeZone;
+}
+
+impl KaryawanRow for Model {
+    fn id(&self) -> i32 {
+        self.id
+    }
+
+    fn nama(&self) -> &str {
+        &self.nama
+    }
+
+    fn gaji(&self) -> i32 {
+        self.gaji
+    }
+
+    fn created_at(&self) -> &DateTimeWithTimeZone {
+        &self.created_at
+    }
+
+    fn updated_at(&self) -> &DateTimeWithTimeZone {
+        &self.updated_at
+    }
+}
+
+fn parse_param(value: &Option<String>, name: &str, min: i32, errors: &mut Vec<String>) -> Option<i32> {
+    let value = value.as_deref().map(str::trim).filter(|v| !v.is_empty())?;
+    match value.parse::<i32>() {
+        Ok(number) if number >= min => Some(number),
+        _ => {
+            errors.push(format!("{} harus berupa angka minimal {}", name, min));
+            None
+        }
+    }
+}
+
+fn karyawan_sort(value: &str) -> Option<SortKey<Column>> {
+    let (descending, name) = match value.strip_prefix('-') {
+        Some(name) => (true, name),
+        None => (false, value),
+    };
+
+    let (name, column, parse_key): (&'static str, Option<Column>, fn(&str) -> Option<Value>) =
+        match name {
+            "id" => ("id", None, |_| None),
+            "nama" => ("nama", Some(Column::Nama), |key| Some(key.to_string().into())),
+            "gaji" => ("gaji", Some(Column::Gaji), |key| key.parse::<i32>().ok().map(Into::into)),
+            "created_at" => ("created_at", Some(Column::CreatedAt), parse_timestamp_key),
+            "updated_at" => ("updated_at", Some(Column::UpdatedAt), parse_timestamp_key),
+            _ => return None,
+        };
+
+    Some(SortKey { name, column, descending, parse_key })
+}
+
+fn parse_timestamp_key(key: &str) -> Option<Value> {
+    DateTimeWithTimeZone::parse_from_rfc3339(key).ok().map(Into::into)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_list_query_resolve() {
+        let query = KaryawanListQuery {
+            kantor_id: Some("2".to_string()),
+            gaji_min: Some("5000000".to_string()),
+            nama: Some(" Bud ".to_string()),
+            sort: Some("-gaji".to_string()),
+            ..Default::default()
+        };
+        let filter = query.resolve().unwrap();
+        assert_eq!(filter.kantor_id, Some(2));
+        assert_eq!(filter.nama.as_deref(), Some("Bud"));
+        assert_eq!(filter.sort.param(), "-gaji");
+        assert!((filter.sort.parse_key)("7000000").is_some());
+
+        let invalid = KaryawanListQuery {
+            kantor_id: Some("0".to_string()),
+            gaji_min: Some("9".to_string()),
+            gaji_max: Some("1".to_string()),
+            sort: Some("foto_path".to_string()),
+            ..Default::default()
+        };
+        assert_eq!(invalid.resolve().unwrap_err().len(), 3);
+    }
+
+    #[test]
+    fn test_changes_update_only_set_columns() {
+        use sea_orm::{DbBackend, QueryTrait};
+
+        let changes = KaryawanChanges {
+            id: 7,
+            nama: Some("Budi".to_string()),
+            foto_path: Some(None),
+            updated_by: Some(3),
+            ..Default::default()
+        };
+        let sql = changes.update().build(DbBackend::MySql).to_string();
+        assert!(sql.starts_with("UPDATE `karyawan` SET"), "{}", sql);
+        assert!(sql.contains("`nama` = 'Budi'") && sql.contains("`foto_path` = NULL"), "{}", sql);
+        assert!(!sql.contains("`gaji`") && !sql.contains("`kantor_id`"), "{}", sql);
+        assert!(sql.ends_with("WHERE `karyawan`.`id` = 7"), "{}", sql);
+
+        let json = serde_json::to_value(&changes).unwrap();
+        assert_eq!(json, serde_json::json!({ "id": 7, "nama": "Budi", "foto_path": null, "updated_by": 3 }));
+        assert!(!changes.is_empty());
+        assert!(KaryawanChanges { id: 7, updated_by: Some(3), ..Default::default() }.is_empty());
+    }
+
+    #[test]
+    fn test_bulk_selection_condition() {
+        assert!(BulkSelection::default().condition(10).is_err());
+
+        let by_ids = BulkSelection { ids: Some(vec![1, 2]), ..Default::default() };
+        assert!(by_ids.condition(10).is_ok());
+        assert!(by_ids.condition(1).is_err());
+
+        let by_kantor = BulkSelection { kantor_id: Some(3), ..Default::default() };
+        assert!(by_kantor.condition(10).is_ok());
+    }
+}
@@ -3,5 +3,10 @@ pub mod kantor;
 pub mod common;
 pub mod user;
 pub mod jabatan;
+pub mod pagination;
+pub mod search;
+pub mod stats;
+pub mod sync;
+pub mod sync_tombstone;
 
 pub use common::ApiResponse; 
\ No newline at end of file
@@ -0,0 +1,311 @@
+use base64::{engine::general_purpose, Engine as _};
+use sea_orm::{
+    ColumnTrait, Condition, EntityTrait, Order, QueryFilter, QueryOrder, QuerySelect, Select, Value,
+};
+use serde::{Deserialize, Serialize};
+
+/// Page size used when the client does not send `limit`.
+pub const DEFAULT_PAGE_SIZE: u64 = 50;
+/// Largest `limit` a client may ask for.
+pub const MAX_PAGE_SIZE: u64 = 200;
+
+/// Raw list query parameters.
+///
+/// Kept as strings so that malformed values produce the usual
+/// `ApiResponse` error instead of the extractor's plain-text rejection.
+#[derive(Debug, Default, Deserialize)]
+pub struct PageQuery {
+    pub limit: Option<String>,
+    pub cursor: Option<String>,
+    pub include_total: Option<String>,
+}
+
+/// Validated page request.
+#[derive(Debug, Clone, PartialEq)]
+pub struct PageRequest {
+    pub limit: u64,
+    pub after: Option<Cursor>,
+    pub include_total: bool,
+}
+
+/// Position after the last row of a page: the row's `id` and, for lists
+/// sorted on another column, that column's value.
+///
+/// Encoded as base64url JSON so more keys can be added without breaking
+/// cursors already held by clients.
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
+pub struct Cursor {
+    pub id: i32,
+    /// `sort` parameter the cursor was issued for; absent for the default `id` order.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub sort: Option<String>,
+    /// Sort column value of the last row.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub key: Option<String>,
+}
+
+/// A whitelisted list ordering, always followed by `id` as the tie-breaker.
+#[derive(Debug, Clone)]
+pub struct SortKey<C> {
+    /// Public name of the sort, e.g. `gaji`.
+    pub name: &'static str,
+    /// `None` sorts on `id` alone.
+    pub column: Option<C>,
+    pub descending: bool,
+    /// Turns a cursor `key` back into a value comparable with `column`.
+    pub parse_key: fn(&str) -> Option<Value>,
+}
+
+impl<C> SortKey<C> {
+    /// Ascending `id`, the order used when the client sends no `sort`.
+    pub fn by_id() -> Self {
+        Self {
+            name: "id",
+            column: None,
+            descending: false,
+            parse_key: |_| None,
+        }
+    }
+
+    /// The `sort` parameter value for this ordering, e.g. `-gaji`.
+    pub fn param(&self) -> String {
+        if self.descending {
+            format!("-{}", self.name)
+        } else {
+            self.name.to_string()
+        }
+    }
+
+    fn is_default(&self) -> bool {
+        self.column.is_none() && !self.descending
+    }
+
+    /// Cursor pointing after a row with this `id` and sort column value.
+    pub fn cursor(&self, id: i32, key: Option<String>) -> Cursor {
+        Cursor {
+            id,
+            sort: if self.is_default() { None } else { Some(self.param()) },
+            key: self.column.as_ref().and(key),
+        }
+    }
+}
+
+impl<C: ColumnTrait> SortKey<C> {
+    /// `ORDER BY column, id` in this sort's direction.
+    pub fn order<E: EntityTrait<Column = C>>(&self, select: Select<E>, id_column: C) -> Select<E> {
+        let order = if self.descending { Order::Desc } else { Order::Asc };
+        let select = match self.column {
+            Some(column) => select.order_by(column, order.clone()),
+            None => select,
+        };
+        select.order_by(id_column, order)
+    }
+}
+
+impl Cursor {
+    pub fn encode(&self) -> String {
+        let json = serde_json::to_vec(self).unwrap_or_default();
+        general_purpose::URL_SAFE_NO_PAD.encode(json)
+    }
+
+    pub fn new(id: i32) -> Self {
+        Self { id, sort: None, key: None }
+    }
+
+    pub fn decode(value: &str) -> Option<Self> {
+        let json = general_purpose::URL_SAFE_NO_PAD.decode(value.trim()).ok()?;
+        serde_json::from_slice(&json).ok()
+    }
+}
+
+/// Pagination details returned next to `data` in list responses.
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct PageMeta {
+    pub limit: u64,
+    pub next_cursor: Option<String>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub total: Option<u64>,
+}
+
+impl PageQuery {
+    pub fn resolve(&self) -> Result<PageRequest, Vec<String>> {
+        let mut errors = Vec::new();
+
+        let limit = match self.limit.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => DEFAULT_PAGE_SIZE,
+            Some(value) => match value.parse::<u64>() {
+                Ok(limit) if (1..=MAX_PAGE_SIZE).contains(&limit) => limit,
+                _ => {
+                    errors.push(format!("limit harus berupa angka antara 1-{}", MAX_PAGE_SIZE));
+                    DEFAULT_PAGE_SIZE
+                }
+            },
+        };
+
+        let after = match self.cursor.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => None,
+            Some(value) => match Cursor::decode(value) {
+                Some(cursor) => Some(cursor),
+                None => {
+                    errors.push("cursor tidak valid".to_string());
+                    None
+                }
+            },
+        };
+
+        let include_total = matches!(
+            self.include_total.as_deref().map(str::trim),
+            Some("true") | Some("1")
+        );
+
+        if errors.is_empty() {
+            Ok(PageRequest { limit, after, include_total })
+        } else {
+            Err(errors)
+        }
+    }
+}
+
+impl PageRequest {
+    /// Restrict `select` to this page: `id > cursor ORDER BY id LIMIT limit + 1`.
+    ///
+    /// Seeks through the primary key index, so every page costs the same no
+    /// matter how deep the client has paged.
+    pub fn apply<E: EntityTrait>(&self, select: Select<E>, id_column: E::Column) -> Select<E> {
+        let select = match &self.after {
+            Some(cursor) => select.filter(id_column.gt(cursor.id)),
+            None => select,
+        };
+
+        select.order_by_asc(id_column).limit(self.fetch_limit())
+    }
+
+    /// [`PageRequest::apply`] for a list ordered by `sort`: seeks past
+    /// `(sort column, id)` of the cursor so an index on the sort column (which
+    /// InnoDB extends with the primary key) serves both the filter and the order.
+    ///
+    /// Fails when the cursor was issued for a different `sort`.
+    pub fn apply_sorted<E: EntityTrait>(
+        &self,
+        select: Select<E>,
+        id_column: E::Column,
+        sort: &SortKey<E::Column>,
+    ) -> Result<Select<E>, String> {
+        let select = match &self.after {
+            None => select,
+            Some(cursor) => {
+                let cursor_sort = cursor.sort.clone().unwrap_or_else(|| "id".to_string());
+                if cursor_sort != sort.param() {
+                    return Err("cursor tidak cocok dengan parameter sort".to_string());
+                }
+
+                let after_id = if sort.descending {
+                    id_column.lt(cursor.id)
+                } else {
+                    id_column.gt(cursor.id)
+                };
+                match sort.column {
+                    None => select.filter(after_id),
+                    Some(column) => {
+                        let key = cursor
+                            .key
+                            .as_deref()
+                            .and_then(sort.parse_key)
+                            .ok_or_else(|| "cursor tidak valid".to_string())?;
+                        let after_key = if sort.descending {
+                            column.lt(key.clone())
+                        } else {
+                            column.gt(key.clone())
+                        };
+                        select.filter(
+                            Condition::any()
+                                .add(after_key)
+                                .add(Condition::all().add(column.eq(key)).add(after_id)),
+                        )
+                    }
+                }
+            }
+        };
+
+        Ok(sort.order(select, id_column).limit(self.fetch_limit()))
+    }
+
+    /// Rows to fetch: one more than the page so we know whether a next page exists.
+    pub fn fetch_limit(&self) -> u64 {
+        self.limit + 1
+    }
+
+    /// Trim the extra row fetched by [`PageRequest::fetch_limit`] and build
+    /// the page metadata; `cursor_of` builds the cursor pointing after a row.
+    pub fn finish<T>(
+        &self,
+        mut rows: Vec<T>,
+        cursor_of: impl Fn(&T) -> Cursor,
+        total: Option<u64>,
+    ) -> (Vec<T>, PageMeta) {
+        let has_more = rows.len() as u64 > self.limit;
+        rows.truncate(self.limit as usize);
+
+        let next_cursor = if has_more {
+            rows.last().map(|row| cursor_of(row).encode())
+        } else {
+            None
+        };
+
+        (
+            rows,
+            PageMeta {
+                limit: self.limit,
+                next_cursor,
+                total,
+            },
+        )
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_cursor_round_trip() {
+        let cursor = Cursor::new(42);
+        assert_eq!(Cursor::decode(&cursor.encode()), Some(cursor));
+        assert_eq!(Cursor::decode("not-a-cursor"), None);
+
+        let sort = SortKey::<()> {
+            name: "gaji",
+            column: Some(()),
+            descending: true,
+            parse_key: |_| None,
+        };
+        let cursor = sort.cursor(7, Some("5000000".to_string()));
+        assert_eq!(cursor.sort.as_deref(), Some("-gaji"));
+        assert_eq!(Cursor::decode(&cursor.encode()), Some(cursor));
+        assert_eq!(SortKey::<()>::by_id().cursor(7, None), Cursor::new(7));
+    }
+
+    #[test]
+    fn test_resolve_and_finish() {
+        let query = PageQuery {
+            limit: Some("2".to_string()),
+            cursor: Some(Cursor::new(10).encode()),
+            include_total: Some("true".to_string()),
+        };
+        let page = query.resolve().unwrap();
+        assert_eq!(page.limit, 2);
+        assert_eq!(page.after, Some(Cursor::new(10)));
+        assert!(page.include_total);
+
+        let (rows, meta) = page.finish(vec![11, 12, 13], |id| Cursor::new(*id), Some(3));
+        assert_eq!(rows, vec![11, 12]);
+        assert_eq!(meta.next_cursor, Some(Cursor::new(12).encode()));
+
+        let (_, meta) = page.finish(vec![11], |id| Cursor::new(*id), None);
+        assert_eq!(meta.next_cursor, None);
+
+        assert_eq!(PageQuery::default().resolve().unwrap().limit, DEFAULT_PAGE_SIZE);
+        let too_big = PageQuery { limit: Some("1000".to_string()), ..Default::default() };
+        assert!(too_big.resolve().is_err());
+    }
+}
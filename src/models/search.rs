@@ -0,0 +1,319 @@
+use base64::{engine::general_purpose, Engine as _};
+use sea_orm::{DbBackend, FromQueryResult, Statement, Value};
+use serde::{Deserialize, Serialize};
+
+use super::pagination::{PageMeta, PageQuery};
+
+/// Shortest word the ngram FULLTEXT indexes can match (MySQL's default
+/// `ngram_token_size`); shorter words in `q` are ignored.
+pub const MIN_TERM_CHARS: usize = 2;
+/// Longest `q` accepted.
+pub const MAX_QUERY_CHARS: usize = 100;
+
+/// Raw `GET /api/search` parameters, kept as strings like `PageQuery`.
+#[derive(Debug, Default, Deserialize)]
+pub struct SearchQuery {
+    pub q: Option<String>,
+    /// `karyawan` or `kantor`; both when absent.
+    #[serde(rename = "type")]
+    pub kind: Option<String>,
+    pub limit: Option<String>,
+    pub cursor: Option<String>,
+}
+
+/// Entity a search hit comes from. Declared in name order, which is also the
+/// tie-breaker between hits with equal scores.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord, Serialize, Deserialize)]
+#[serde(rename_all = "lowercase")]
+pub enum SearchKind {
+    Kantor,
+    Karyawan,
+}
+
+/// One search result. `alamat` is only set for kantor, `kantor_id` only for
+/// karyawan.
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize, FromQueryResult)]
+pub struct SearchHit {
+    #[serde(rename = "type")]
+    pub kind: String,
+    pub id: i32,
+    pub nama: String,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    pub alamat: Option<String>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    pub kantor_id: Option<i32>,
+    /// FULLTEXT relevance; higher is better.
+    pub score: f64,
+}
+
+/// Position after the last hit of a page in `(score DESC, type, id)` order.
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
+pub struct SearchCursor {
+    pub score: f64,
+    #[serde(rename = "type")]
+    pub kind: SearchKind,
+    pub id: i32,
+}
+
+/// Validated [`SearchQuery`].
+#[derive(Debug, Clone, PartialEq)]
+pub struct SearchRequest {
+    /// Boolean-mode expression requiring every word of `q`.
+    pub against: String,
+    pub kinds: Vec<SearchKind>,
+    pub limit: u64,
+    pub after: Option<SearchCursor>,
+}
+
+impl SearchKind {
+    fn parse(value: &str) -> Option<Self> {
+        match value {
+            "kantor" => Some(Self::Kantor),
+            "karyawan" => Some(Self::Karyawan),
+            _ => None,
+        }
+    }
+
+    fn as_str(self) -> &'static str {
+        match self {
+            Self::Kantor => "kantor",
+            Self::Karyawan => "karyawan",
+        }
+    }
+
+    /// (table, FULLTEXT columns, alamat column, kantor_id column). The column
+    /// list must be exactly the one of the index for MATCH to use it.
+    fn source(self) -> (&'static str, &'static str, &'static str, &'static str) {
+        match self {
+            Self::Kantor => ("kantor", "nama, alamat", "alamat", "NULL"),
+            Self::Karyawan => ("karyawan", "nama", "NULL", "kantor_id"),
+        }
+    }
+}
+
+impl SearchCursor {
+    pub fn encode(&self) -> String {
+        let json = serde_json::to_vec(self).unwrap_or_default();
+        general_purpose::URL_SAFE_NO_PAD.encode(json)
+    }
+
+    pub fn decode(value: &str) -> Option<Self> {
+        let json = general_purpose::URL_SAFE_NO_PAD.decode(value.trim()).ok()?;
+        serde_json::from_slice(&json).ok()
+    }
+}
+
+impl SearchQuery {
+    pub fn resolve(&self) -> Result<SearchRequest, Vec<String>> {
+        let mut errors = Vec::new();
+
+        let q = self.q.as_deref().map(str::trim).unwrap_or_default();
+        // Splitting on anything but letters and digits also drops the
+        // boolean-mode operators (+ - " * ...) a client might send.
+        let terms: Vec<&str> = q
+            .split(|c: char| !c.is_alphanumeric())
+            .filter(|term| term.chars().count() >= MIN_TERM_CHARS)
+            .collect();
+        if q.chars().count() > MAX_QUERY_CHARS {
+            errors.push(format!("q maksimal {} karakter", MAX_QUERY_CHARS));
+        } else if terms.is_empty() {
+            errors.push(format!(
+                "q harus berisi minimal satu kata dengan {} karakter atau lebih",
+                MIN_TERM_CHARS
+            ));
+        }
+
+        let kinds = match self.kind.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => vec![SearchKind::Kantor, SearchKind::Karyawan],
+            Some(value) => match SearchKind::parse(value) {
+                Some(kind) => vec![kind],
+                None => {
+                    errors.push("type harus karyawan atau kantor".to_string());
+                    Vec::new()
+                }
+            },
+        };
+
+        let page = PageQuery {
+            limit: self.limit.clone(),
+            ..Default::default()
+        };
+        let limit = match page.resolve() {
+            Ok(page) => page.limit,
+            Err(page_errors) => {
+                errors.extend(page_errors);
+                0
+            }
+        };
+
+        let after = match self.cursor.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => None,
+            Some(value) => match SearchCursor::decode(value) {
+                Some(cursor) => Some(cursor),
+                None => {
+                    errors.push("cursor tidak valid".to_string());
+                    None
+                }
+            },
+        };
+
+        if errors.is_empty() {
+            let against = terms
+                .iter()
+                .map(|term| format!("+{}", term))
+                .collect::<Vec<_>>()
+                .join(" ");
+            Ok(SearchRequest { against, kinds, limit, after })
+        } else {
+            Err(errors)
+        }
+    }
+}
+
+impl SearchRequest {
+    /// One `MATCH ... AGAINST` SELECT per entity, each already cut to the
+    /// page, merged with `UNION ALL` and ordered by relevance.
+    ///
+    /// Rows are found through the FULLTEXT indexes; only the matching rows
+    /// are scored and sorted. Later pages seek past the cursor's
+    /// `(score, type, id)` instead of using OFFSET.
+    pub fn statement(&self, backend: DbBackend) -> Statement {
+        let fetch_limit = self.limit + 1;
+        let mut values: Vec<Value> = Vec::new();
+
+        let selects: Vec<String> = self
+            .kinds
+            .iter()
+            .map(|&kind| {
+                let (table, columns, alamat, kantor_id) = kind.source();
+                let matched = format!("MATCH({}) AGAINST(? IN BOOLEAN MODE)", columns);
+                values.push(self.against.clone().into());
+                values.push(self.against.clone().into());
+
+                let after = match &self.after {
+                    None => String::new(),
+                    Some(cursor) => {
+                        let score = || Value::from(cursor.score);
+                        if kind == cursor.kind {
+                            values.extend([self.against.clone().into(), score()]);
+                            values.extend([self.against.clone().into(), score()]);
+                            values.push(cursor.id.into());
+                            format!(" AND ({m} < ? OR ({m} = ? AND id > ?))", m = matched)
+                        } else {
+                            values.extend([self.against.clone().into(), score()]);
+                            let op = if kind > cursor.kind { "<=" } else { "<" };
+                            format!(" AND {} {} ?", matched, op)
+                        }
+                    }
+                };
+
+                format!(
+                    "SELECT '{kind}' AS kind, id, nama, {alamat} AS alamat, {kantor_id} AS kantor_id, \
+                     {m} AS score FROM {table} WHERE {m}{after} \
+                     ORDER BY score DESC, id LIMIT {limit}",
+                    kind = kind.as_str(),
+                    alamat = alamat,
+                    kantor_id = kantor_id,
+                    m = matched,
+                    table = table,
+                    after = after,
+                    limit = fetch_limit,
+                )
+            })
+            .collect();
+
+        let sql = match selects.as_slice() {
+            [select] => select.clone(),
+            _ => format!(
+                "({}) ORDER BY score DESC, kind, id LIMIT {}",
+                selects.join(") UNION ALL ("),
+                fetch_limit
+            ),
+        };
+
+        Statement::from_sql_and_values(backend, sql, values)
+    }
+
+    /// Trim the extra hit fetched by [`SearchRequest::statement`] and build
+    /// the page metadata.
+    pub fn finish(&self, mut hits: Vec<SearchHit>) -> (Vec<SearchHit>, PageMeta) {
+        let has_more = hits.len() as u64 > self.limit;
+        hits.truncate(self.limit as usize);
+
+        let next_cursor = if has_more {
+            hits.last().and_then(|hit| {
+                let cursor = SearchCursor {
+                    score: hit.score,
+                    kind: SearchKind::parse(&hit.kind)?,
+                    id: hit.id,
+                };
+                Some(cursor.encode())
+            })
+        } else {
+            None
+        };
+
+        (
+            hits,
+            PageMeta {
+                limit: self.limit,
+                next_cursor,
+                total: None,
+            },
+        )
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn query(q: &str) -> SearchQuery {
+        SearchQuery {
+            q: Some(q.to_string()),
+            ..Default::default()
+        }
+    }
+
+    #[test]
+    fn test_resolve_builds_boolean_expression() {
+        let request = query(" budi +santoso* a ").resolve().unwrap();
+        assert_eq!(request.against, "+budi +santoso");
+        assert_eq!(request.kinds, vec![SearchKind::Kantor, SearchKind::Karyawan]);
+
+        let errors = SearchQuery {
+            kind: Some("jabatan".to_string()),
+            limit: Some("0".to_string()),
+            cursor: Some("x".to_string()),
+            ..query("a -")
+        }
+        .resolve()
+        .unwrap_err();
+        assert_eq!(errors.len(), 4, "{:?}", errors);
+    }
+
+    #[test]
+    fn test_statement_seeks_past_cursor() {
+        let cursor = SearchCursor { score: 1.5, kind: SearchKind::Kantor, id: 9 };
+        assert_eq!(SearchCursor::decode(&cursor.encode()), Some(cursor.clone()));
+
+        let request = SearchRequest {
+            against: "+budi".to_string(),
+            kinds: vec![SearchKind::Kantor, SearchKind::Karyawan],
+            limit: 20,
+            after: Some(cursor),
+        };
+        let statement = request.statement(DbBackend::MySql);
+        assert!(statement.sql.contains(
+            "FROM kantor WHERE MATCH(nama, alamat) AGAINST(? IN BOOLEAN MODE) AND \
+             (MATCH(nama, alamat) AGAINST(? IN BOOLEAN MODE) < ? OR"
+        ));
+        assert!(statement.sql.contains(
+            "FROM karyawan WHERE MATCH(nama) AGAINST(? IN BOOLEAN MODE) AND \
+             MATCH(nama) AGAINST(? IN BOOLEAN MODE) <= ?"
+        ));
+        assert!(statement.sql.ends_with(") ORDER BY score DESC, kind, id LIMIT 21"));
+        let placeholders = statement.sql.matches('?').count();
+        assert_eq!(statement.values.map(|values| values.0.len()), Some(placeholders));
+    }
+}
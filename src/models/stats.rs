@@ -0,0 +1,65 @@
+use sea_orm::{
+    prelude::Decimal, ConnectionTrait, DbErr, FromQueryResult, Statement,
+};
+use serde::{Deserialize, Serialize};
+
+/// Dimension karyawan are aggregated by in the stats endpoints.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
+pub enum StatsGroup {
+    Kantor,
+    Jabatan,
+}
+
+/// Headcount and gaji aggregates of the karyawan in one kantor or jabatan.
+/// Groups without karyawan are included with `headcount` 0 and no min/max.
+#[derive(Serialize, Deserialize, Debug, Clone, PartialEq, FromQueryResult)]
+pub struct GroupStats {
+    pub id: i32,
+    pub nama: String,
+    pub headcount: i64,
+    pub total_gaji: i64,
+    pub avg_gaji: Option<Decimal>,
+    pub min_gaji: Option<i32>,
+    pub max_gaji: Option<i32>,
+}
+
+impl StatsGroup {
+    /// One GROUP BY over `karyawan`; with `idx_karyawan_<group>_gaji` the
+    /// karyawan side is read from the index alone.
+    fn sql(self) -> String {
+        let (table, name_column, key_column) = match self {
+            Self::Kantor => ("kantor", "nama", "kantor_id"),
+            Self::Jabatan => ("jabatan", "nama_jabatan", "jabatan_id"),
+        };
+        format!(
+            "SELECT g.id AS id, g.{name} AS nama, COUNT(k.id) AS headcount, \
+             CAST(COALESCE(SUM(k.gaji), 0) AS SIGNED) AS total_gaji, \
+             ROUND(AVG(k.gaji), 2) AS avg_gaji, MIN(k.gaji) AS min_gaji, MAX(k.gaji) AS max_gaji \
+             FROM {table} g LEFT JOIN karyawan k ON k.{key} = g.id \
+             GROUP BY g.id, g.{name} ORDER BY g.id",
+            name = name_column,
+            table = table,
+            key = key_column,
+        )
+    }
+}
+
+impl GroupStats {
+    pub async fn load<C: ConnectionTrait>(db: &C, group: StatsGroup) -> Result<Vec<Self>, DbErr> {
+        let statement = Statement::from_string(db.get_database_backend(), group.sql());
+        Self::find_by_statement(statement).all(db).await
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_group_sql() {
+        let sql = StatsGroup::Jabatan.sql();
+        assert!(sql.contains("g.nama_jabatan AS nama"));
+        assert!(sql.contains("FROM jabatan g LEFT JOIN karyawan k ON k.jabatan_id = g.id"));
+        assert!(sql.ends_with("GROUP BY g.id, g.nama_jabatan ORDER BY g.id"));
+    }
+}
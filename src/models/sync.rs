@@ -0,0 +1,250 @@
+use base64::{engine::general_purpose, Engine as _};
+use chrono::Duration;
+use sea_orm::prelude::DateTimeWithTimeZone;
+use serde::{Deserialize, Serialize};
+
+use super::sync_tombstone;
+
+/// Rows per page when the client does not send `limit`.
+pub const DEFAULT_SYNC_LIMIT: u64 = 500;
+/// Largest `limit` a client may ask for.
+pub const MAX_SYNC_LIMIT: u64 = 1_000;
+/// Changes younger than this are left for the next poll. `updated_at` is
+/// set when a statement starts, not when it commits; the delay lets slower
+/// transactions commit before the feed moves past their timestamp.
+pub const SYNC_SETTLE_SECONDS: u32 = 2;
+/// Days tombstones are kept; older tokens must start a full sync.
+pub const TOMBSTONE_RETENTION_DAYS: i64 = 30;
+
+/// A table with a `GET /api/<table>/changes` feed.
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize, Deserialize)]
+#[serde(rename_all = "lowercase")]
+pub enum SyncTable {
+    Karyawan,
+    Kantor,
+    Jabatan,
+}
+
+impl SyncTable {
+    pub fn as_str(self) -> &'static str {
+        match self {
+            Self::Karyawan => "karyawan",
+            Self::Kantor => "kantor",
+            Self::Jabatan => "jabatan",
+        }
+    }
+}
+
+/// Raw changes parameters, kept as strings like `PageQuery`.
+#[derive(Debug, Default, Deserialize)]
+pub struct SyncQuery {
+    pub since: Option<String>,
+    pub limit: Option<String>,
+}
+
+/// Validated [`SyncQuery`].
+#[derive(Debug, Clone, PartialEq)]
+pub struct SyncRequest {
+    /// `None` for a first sync: every row is returned and no tombstones.
+    pub since: Option<SyncToken>,
+    pub limit: u64,
+}
+
+/// Where a client is in one table's feed: after the last changed row, in
+/// `(updated_at, id)` order, and after the last tombstone, in
+/// `(deleted_at, id)` order. Encoded like the list cursors.
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
+pub struct SyncToken {
+    pub table: SyncTable,
+    /// Absent until the client has received a row.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub updated_at: Option<DateTimeWithTimeZone>,
+    #[serde(default)]
+    pub id: i32,
+    pub deleted_at: DateTimeWithTimeZone,
+    #[serde(default)]
+    pub tombstone_id: i64,
+}
+
+/// One page of a changes feed. Clients upsert `changed`, remove `deleted`,
+/// store `next_token`, and poll again right away while `has_more`.
+#[derive(Debug, Clone, Serialize)]
+pub struct SyncChanges<T> {
+    pub changed: Vec<T>,
+    pub deleted: Vec<i32>,
+    pub next_token: String,
+    pub has_more: bool,
+}
+
+impl SyncToken {
+    pub fn encode(&self) -> String {
+        let json = serde_json::to_vec(self).unwrap_or_default();
+        general_purpose::URL_SAFE_NO_PAD.encode(json)
+    }
+
+    pub fn decode(value: &str) -> Option<Self> {
+        let json = general_purpose::URL_SAFE_NO_PAD.decode(value.trim()).ok()?;
+        serde_json::from_slice(&json).ok()
+    }
+
+    /// Whether tombstones this token still needs may have been pruned.
+    pub fn is_expired(&self, until: DateTimeWithTimeZone) -> bool {
+        self.deleted_at < until - Duration::days(TOMBSTONE_RETENTION_DAYS)
+    }
+}
+
+impl SyncQuery {
+    pub fn resolve(&self, table: SyncTable) -> Result<SyncRequest, Vec<String>> {
+        let mut errors = Vec::new();
+
+        let limit = match self.limit.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => DEFAULT_SYNC_LIMIT,
+            Some(value) => match value.parse::<u64>() {
+                Ok(limit) if (1..=MAX_SYNC_LIMIT).contains(&limit) => limit,
+                _ => {
+                    errors.push(format!("limit harus berupa angka antara 1-{}", MAX_SYNC_LIMIT));
+                    DEFAULT_SYNC_LIMIT
+                }
+            },
+        };
+
+        let since = match self.since.as_deref().map(str::trim).filter(|v| !v.is_empty()) {
+            None => None,
+            Some(value) => match SyncToken::decode(value) {
+                Some(token) if token.table == table => Some(token),
+                Some(_) => {
+                    errors.push(format!("since bukan token untuk {}", table.as_str()));
+                    None
+                }
+                None => {
+                    errors.push("since tidak valid".to_string());
+                    None
+                }
+            },
+        };
+
+        if errors.is_empty() {
+            Ok(SyncRequest { since, limit })
+        } else {
+            Err(errors)
+        }
+    }
+}
+
+impl SyncRequest {
+    /// Rows to fetch: one more than the page so we know whether more follow.
+    pub fn fetch_limit(&self) -> u64 {
+        self.limit + 1
+    }
+
+    /// Build the page from rows and tombstones fetched up to `until` with
+    /// [`SyncRequest::fetch_limit`]; `position` gives a row's `(updated_at, id)`.
+    pub fn finish<T>(
+        &self,
+        table: SyncTable,
+        until: DateTimeWithTimeZone,
+        mut rows: Vec<T>,
+        mut tombstones: Vec<sync_tombstone::Model>,
+        position: impl Fn(&T) -> (DateTimeWithTimeZone, i32),
+    ) -> SyncChanges<T> {
+        let more_rows = rows.len() as u64 > self.limit;
+        let more_tombstones = tombstones.len() as u64 > self.limit;
+        rows.truncate(self.limit as usize);
+        tombstones.truncate(self.limit as usize);
+
+        let (updated_at, id) = match rows.last().map(&position) {
+            Some((updated_at, id)) => (Some(updated_at), id),
+            None => match &self.since {
+                Some(token) => (token.updated_at, token.id),
+                None => (None, 0),
+            },
+        };
+
+        // Once every tombstone before `until` has been sent, the next poll
+        // starts at `until` itself; this also keeps the token of a client
+        // that polls regularly from expiring while nothing is deleted.
+        let (deleted_at, tombstone_id) = match tombstones.last() {
+            Some(tombstone) if more_tombstones => (tombstone.deleted_at, tombstone.id),
+            _ => (until, 0),
+        };
+
+        let next_token = SyncToken {
+            table,
+            updated_at,
+            id,
+            deleted_at,
+            tombstone_id,
+        };
+
+        SyncChanges {
+            changed: rows,
+            deleted: tombstones.iter().map(|tombstone| tombstone.record_id).collect(),
+            next_token: next_token.encode(),
+            has_more: more_rows || more_tombstones,
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use chrono::{FixedOffset, TimeZone};
+
+    fn at(minute: u32) -> DateTimeWithTimeZone {
+        FixedOffset::east_opt(0)
+            .unwrap()
+            .with_ymd_and_hms(2025, 11, 7, 8, minute, 0)
+            .unwrap()
+    }
+
+    fn tombstone(id: i64, record_id: i32, minute: u32) -> sync_tombstone::Model {
+        sync_tombstone::Model {
+            id,
+            table_name: "kantor".to_string(),
+            record_id,
+            deleted_at: at(minute),
+        }
+    }
+
+    #[test]
+    fn test_resolve_since() {
+        let first = SyncQuery::default().resolve(SyncTable::Kantor).unwrap();
+        assert_eq!(first, SyncRequest { since: None, limit: DEFAULT_SYNC_LIMIT });
+
+        let token = SyncToken {
+            table: SyncTable::Karyawan,
+            updated_at: Some(at(1)),
+            id: 4,
+            deleted_at: at(2),
+            tombstone_id: 0,
+        };
+        assert_eq!(SyncToken::decode(&token.encode()), Some(token.clone()));
+
+        let query = SyncQuery { since: Some(token.encode()), limit: Some("0".to_string()) };
+        assert_eq!(query.resolve(SyncTable::Kantor).unwrap_err().len(), 2);
+        assert!(!token.is_expired(at(3)));
+        assert!(token.is_expired(at(2) + Duration::days(TOMBSTONE_RETENTION_DAYS + 1)));
+    }
+
+    #[test]
+    fn test_finish_advances_token() {
+        let request = SyncRequest { since: None, limit: 2 };
+        let rows = vec![(at(1), 5), (at(1), 7), (at(3), 2)];
+        let page = request.finish(SyncTable::Kantor, at(10), rows, Vec::new(), |row| *row);
+        assert_eq!(page.changed.len(), 2);
+        assert!(page.has_more);
+        let token = SyncToken::decode(&page.next_token).unwrap();
+        assert_eq!((token.updated_at, token.id), (Some(at(1)), 7));
+        assert_eq!((token.deleted_at, token.tombstone_id), (at(10), 0));
+
+        // Nothing changed: the row position is kept, tombstones are paged.
+        let request = SyncRequest { since: Some(token), limit: 2 };
+        let tombstones = vec![tombstone(1, 3, 11), tombstone(2, 8, 11), tombstone(3, 9, 12)];
+        let page = request.finish(SyncTable::Kantor, at(20), Vec::<(_, i32)>::new(), tombstones, |row| *row);
+        assert_eq!(page.deleted, vec![3, 8]);
+        assert!(page.has_more);
+        let token = SyncToken::decode(&page.next_token).unwrap();
+        assert_eq!((token.updated_at, token.id), (Some(at(1)), 7));
+        assert_eq!((token.deleted_at, token.tombstone_id), (at(11), 2));
+    }
+}
@@ -0,0 +1,76 @@
+use sea_orm::entity::prelude::*;
+use sea_orm::{
+    ConnectionTrait, DatabaseConnection, DeleteResult, Set, Statement, TransactionTrait,
+};
+use serde::{Deserialize, Serialize};
+
+use super::sync::{SyncTable, TOMBSTONE_RETENTION_DAYS};
+
+/// Most expired tombstones removed by one delete, so a delete never waits
+/// on a large purge.
+const PRUNE_BATCH: u32 = 1_000;
+
+/// A row deleted from a synced table, reported by the changes endpoints.
+#[derive(Clone, Debug, PartialEq, Eq, DeriveEntityModel, Serialize, Deserialize)]
+#[sea_orm(table_name = "sync_tombstones")]
+pub struct Model {
+    #[sea_orm(primary_key)]
+    pub id: i64,
+    pub table_name: String,
+    pub record_id: i32,
+    pub deleted_at: DateTimeWithTimeZone,
+}
+
+#[derive(Copy, Clone, Debug, EnumIter, DeriveRelation)]
+pub enum Relation {}
+
+impl ActiveModelBehavior for ActiveModel {}
+
+/// Record that `ids` were deleted from `table`. Run it on the transaction
+/// that deletes the rows, so a delete and its tombstone commit together.
+///
+/// Also drops tombstones older than [`TOMBSTONE_RETENTION_DAYS`]; tokens
+/// that old are refused anyway, so the table stays small.
+pub async fn record<C: ConnectionTrait>(db: &C, table: SyncTable, ids: &[i32]) -> Result<(), DbErr> {
+    if ids.is_empty() {
+        return Ok(());
+    }
+
+    let tombstones = ids.iter().map(|&id| ActiveModel {
+        table_name: Set(table.as_str().to_string()),
+        record_id: Set(id),
+        ..Default::default()
+    });
+    Entity::insert_many(tombstones).exec(db).await?;
+
+    db.execute(Statement::from_sql_and_values(
+        db.get_database_backend(),
+        format!(
+            "DELETE FROM sync_tombstones WHERE deleted_at < NOW() - INTERVAL ? DAY LIMIT {}",
+            PRUNE_BATCH
+        ),
+        [TOMBSTONE_RETENTION_DAYS.into()],
+    ))
+    .await?;
+
+    Ok(())
+}
+
+/// `E::delete_by_id(id)` and its tombstone in one transaction.
+pub async fn delete_by_id<E>(
+    db: &DatabaseConnection,
+    table: SyncTable,
+    id: i32,
+) -> Result<DeleteResult, DbErr>
+where
+    E: EntityTrait,
+    i32: Into<<E::PrimaryKey as PrimaryKeyTrait>::ValueType>,
+{
+    let txn = db.begin().await?;
+    let result = E::delete_by_id(id).exec(&txn).await?;
+    if result.rows_affected > 0 {
+        record(&txn, table, &[id]).await?;
+    }
+    txn.commit().await?;
+    Ok(result)
+}
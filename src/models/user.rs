@@ -14,6 +14,7 @@ pub struct Model {
     pub password_hash: String,
     pub full_name: Option<String>,
     pub is_active: bool,
+    pub security_epoch: i32,
     pub created_at: DateTime,
     pub updated_at: DateTime,
 }
@@ -58,11 +59,27 @@ pub struct UserResponse {
     pub created_at: DateTime,
 }
 
+#[derive(Debug, Deserialize, Validate)]
+pub struct RefreshRequest {
+    #[validate(length(min = 1, max = 256, message = "Refresh token tidak valid"))]
+    pub refresh_token: String,
+}
+
 #[derive(Debug, Serialize)]
 pub struct LoginResponse {
     pub user: UserResponse,
     pub token: String,
     pub expires_in: i64,
+    pub refresh_token: String,
+    pub refresh_expires_in: i64,
+}
+
+#[derive(Debug, Serialize)]
+pub struct TokenResponse {
+    pub token: String,
+    pub expires_in: i64,
+    pub refresh_token: String,
+    pub refresh_expires_in: i64,
 }
 
 impl From<Model> for UserResponse {
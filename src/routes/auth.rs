@@ -1,18 +1,29 @@
 use axum::{
+    middleware::{from_fn_with_state, map_response},
     routing::{get, post},
     Router,
 };
-use sea_orm::DatabaseConnection;
+use crate::state::AppState;
 
 use crate::handlers::auth;
+use crate::middleware::overload::retry_after_on_unavailable;
+use crate::middleware::throttle::login_throttle_layer;
 
-pub fn public_auth_routes() -> Router<DatabaseConnection> {
-    Router::new()
+pub fn public_auth_routes(state: AppState) -> Router<AppState> {
+    // Credential endpoints run bcrypt, so they sit behind the login throttle
+    let credential_routes = Router::new()
         .route("/register", post(auth::register))
         .route("/login", post(auth::login))
+        .layer(from_fn_with_state(state.login_throttle.clone(), login_throttle_layer));
+
+    Router::new()
+        .route("/refresh", post(auth::refresh))
+        .route("/logout", post(auth::logout))
+        .merge(credential_routes)
+        .layer(map_response(retry_after_on_unavailable))
 }
 
-pub fn auth_routes() -> Router<DatabaseConnection> {
+pub fn auth_routes() -> Router<AppState> {
     Router::new()
         .route("/me", get(auth::me))
-}
\ No newline at end of file
+}
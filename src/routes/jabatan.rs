@@ -3,17 +3,21 @@ use axum::{
     Router,
     middleware::from_fn_with_state,
 };
-use sea_orm::DatabaseConnection;
 
 use crate::handlers::jabatan::{
-    get_all_jabatan, get_jabatan_by_id, create_jabatan, update_jabatan, delete_jabatan,
+    get_all_jabatan, get_jabatan_by_id, get_jabatan_stats, create_jabatan, update_jabatan,
+    delete_jabatan,
 };
+use crate::handlers::sync::get_jabatan_changes;
 use crate::middleware::auth::jwt_auth_layer;
+use crate::state::AppState;
 
-pub fn jabatan_routes(db: DatabaseConnection) -> Router<DatabaseConnection> {
+pub fn jabatan_routes(state: AppState) -> Router<AppState> {
     Router::new()
         .route("/", get(get_all_jabatan).post(create_jabatan))
+        .route("/stats", get(get_jabatan_stats))
+        .route("/changes", get(get_jabatan_changes))
         .route("/:id", get(get_jabatan_by_id).put(update_jabatan).delete(delete_jabatan))
-        .layer(from_fn_with_state(db.clone(), jwt_auth_layer))
-        .with_state(db)
+        .layer(from_fn_with_state(state.clone(), jwt_auth_layer))
+        .with_state(state)
 }
@@ -2,18 +2,24 @@ use axum::{
     routing::{get, post, put, delete},
     Router,
 };
-use sea_orm::DatabaseConnection;
+use crate::state::AppState;
 use crate::handlers::kantor::{
     get_all_kantor,
     get_kantor_by_id,
+    get_kantor_stats,
+    get_nearby_kantor,
     create_kantor,
     update_kantor,
     delete_kantor,
 };
+use crate::handlers::sync::get_kantor_changes;
 
-pub fn create_kantor_routes() -> Router<DatabaseConnection> {
+pub fn create_kantor_routes() -> Router<AppState> {
     Router::new()
         .route("/", get(get_all_kantor))
+        .route("/stats", get(get_kantor_stats))
+        .route("/nearby", get(get_nearby_kantor))
+        .route("/changes", get(get_kantor_changes))
         .route("/:id", get(get_kantor_by_id))
         .route("/", post(create_kantor))
         .route("/:id", put(update_kantor))
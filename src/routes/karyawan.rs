@@ -1,8 +1,9 @@
 use axum::{
-    routing::{get, post, put, delete},
+    extract::DefaultBodyLimit,
+    routing::{get, post, put, patch, delete},
     Router,
 };
-use sea_orm::DatabaseConnection;
+use crate::state::AppState;
 use crate::handlers::karyawan::{
     get_all_karyawan,
     get_all_karyawan_with_kantor,
@@ -13,19 +14,36 @@ use crate::handlers::karyawan::{
     upload_karyawan_photo,
     delete_karyawan_photo,
     update_karyawan,
+    patch_karyawan,
     delete_karyawan,
 };
+use crate::handlers::karyawan_bulk::{
+    bulk_create_karyawan, bulk_delete_karyawan, bulk_reassign_karyawan, import_karyawan,
+    MAX_IMPORT_BYTES,
+};
+use crate::handlers::karyawan_export::export_karyawan;
+use crate::handlers::sync::get_karyawan_changes;
 
-pub fn create_karyawan_routes() -> Router<DatabaseConnection> {
+pub fn create_karyawan_routes() -> Router<AppState> {
     Router::new()
         .route("/", get(get_all_karyawan))
         .route("/with-kantor", get(get_all_karyawan_with_kantor))
+        .route("/export", get(export_karyawan))
+        .route("/changes", get(get_karyawan_changes))
         .route("/:id", get(get_karyawan_by_id))
         .route("/:id/with-kantor", get(get_karyawan_with_kantor_by_id))
         .route("/", post(create_karyawan))
+        .route("/bulk", post(bulk_create_karyawan))
+        .route("/bulk", delete(bulk_delete_karyawan))
+        .route("/bulk/reassign", post(bulk_reassign_karyawan))
+        .route(
+            "/import",
+            post(import_karyawan).layer(DefaultBodyLimit::max(MAX_IMPORT_BYTES)),
+        )
         .route("/with-photo", post(create_karyawan_with_photo))
         .route("/:id/photo", post(upload_karyawan_photo))
         .route("/:id/photo", delete(delete_karyawan_photo))
         .route("/:id", put(update_karyawan))
+        .route("/:id", patch(patch_karyawan))
         .route("/:id", delete(delete_karyawan))
 }
\ No newline at end of file
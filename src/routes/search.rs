@@ -0,0 +1,7 @@
+use axum::{routing::get, Router};
+use crate::state::AppState;
+use crate::handlers::search::search;
+
+pub fn search_routes() -> Router<AppState> {
+    Router::new().route("/", get(search))
+}
@@ -5,7 +5,10 @@ use chrono::{Duration, Utc};
 use hmac::{Hmac, Mac};
 use serde::{Deserialize, Serialize};
 use sha2::Sha256;
+use std::borrow::Cow;
 use std::env;
+use std::sync::OnceLock;
+use std::time::{Duration as StdDuration, Instant};
 
 type HmacSha256 = Hmac<Sha256>;
 
@@ -22,10 +25,54 @@ pub struct Claims {
     pub email: String,
     pub exp: i64,     // Expiry timestamp
     pub iat: i64,     // Issued at timestamp
+    // Account state at issue time, used by the stateless auth mode.
+    // Optional so that tokens issued before these claims existed still parse.
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub is_active: Option<bool>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub security_epoch: Option<i32>,
 }
 
+/// Longest base64url claims segment we decode; anything above this is rejected
+/// before touching the decoder so verification can stay on the stack.
+const MAX_CLAIMS_SEGMENT_LEN: usize = 1024;
+const CLAIMS_BUFFER_LEN: usize = MAX_CLAIMS_SEGMENT_LEN / 4 * 3 + 3;
+/// An HS256 signature is 32 bytes (43 base64url chars); leave slack for the
+/// decoder's conservative output-size check.
+const SIGNATURE_BUFFER_LEN: usize = 48;
+
+/// Claims borrowed straight from the decoded token buffer.
+///
+/// Only valid inside the closure passed to [`JwtService::verify_with`]; use
+/// [`JwtService::verify_token`] when an owned [`Claims`] is needed.
+#[derive(Debug, Deserialize)]
+pub struct ClaimsRef<'a> {
+    #[serde(borrow)]
+    pub sub: Cow<'a, str>,
+    #[serde(borrow)]
+    pub username: Cow<'a, str>,
+    #[serde(borrow)]
+    pub email: Cow<'a, str>,
+    pub exp: i64,
+    pub iat: i64,
+    #[serde(default)]
+    pub is_active: Option<bool>,
+    #[serde(default)]
+    pub security_epoch: Option<i32>,
+}
+
+/// Prefix mixed into refresh-token signatures so they can never validate as
+/// the signature of a JWT (or the other way round).
+const REFRESH_TOKEN_CONTEXT: &[u8] = b"refresh.";
+
+/// HS256 token service.
+///
+/// Built once at startup and shared through `AppState`; the HMAC key schedule
+/// is computed in the constructor and cloned per call instead of being rebuilt
+/// from `JWT_SECRET` on every request.
 pub struct JwtService {
-    secret: String,
+    mac: HmacSha256,
+    expire_seconds: i64,
 }
 
 impl JwtService {
@@ -34,15 +81,37 @@ impl JwtService {
             "your-256-bit-secret-key-here-make-sure-it-is-long-enough-for-security".to_string()
         });
 
-        Ok(Self { secret })
+        let mut service = Self::with_secret(secret.as_bytes(), Self::get_token_expiry_hours())?;
+        if let Some(minutes) = Self::get_access_token_expiry_minutes() {
+            service.expire_seconds = minutes * 60;
+        }
+        Ok(service)
+    }
+
+    pub fn with_secret(secret: &[u8], expire_hours: i64) -> Result<Self> {
+        let mac = HmacSha256::new_from_slice(secret)
+            .map_err(|e| anyhow::anyhow!("Invalid secret key: {}", e))?;
+
+        Ok(Self {
+            mac,
+            expire_seconds: expire_hours * 3600,
+        })
+    }
+
+    /// Lifetime of an access token in seconds.
+    pub fn expiry_seconds(&self) -> i64 {
+        self.expire_seconds
     }
 
-    pub fn generate_token(&self, user_id: i32, username: &str, email: &str) -> Result<String> {
+    pub fn generate_token(
+        &self,
+        user_id: i32,
+        username: &str,
+        email: &str,
+        is_active: bool,
+        security_epoch: i32,
+    ) -> Result<String> {
         let now = Utc::now();
-        let expire_hours = env::var("JWT_EXPIRE_HOURS")
-            .unwrap_or_else(|_| "24".to_string())
-            .parse::<i64>()
-            .unwrap_or(24);
 
         let header = JwtHeader {
             alg: "HS256".to_string(),
@@ -53,8 +122,10 @@ impl JwtService {
             sub: user_id.to_string(),
             username: username.to_string(),
             email: email.to_string(),
-            exp: (now + Duration::hours(expire_hours)).timestamp(),
+            exp: (now + Duration::seconds(self.expire_seconds)).timestamp(),
             iat: now.timestamp(),
+            is_active: Some(is_active),
+            security_epoch: Some(security_epoch),
         };
 
         let header_json = serde_json::to_string(&header)?;
@@ -65,8 +136,7 @@ impl JwtService {
 
         let message = format!("{}.{}", header_encoded, claims_encoded);
 
-        let mut mac = HmacSha256::new_from_slice(self.secret.as_bytes())
-            .map_err(|e| anyhow::anyhow!("Invalid secret key: {}", e))?;
+        let mut mac = self.mac.clone();
         mac.update(message.as_bytes());
         let signature = mac.finalize().into_bytes();
         let signature_encoded = general_purpose::URL_SAFE_NO_PAD.encode(&signature);
@@ -74,38 +144,42 @@ impl JwtService {
         Ok(format!("{}.{}", message, signature_encoded))
     }
 
-    pub fn verify_token(&self, token: &str) -> Result<Claims> {
-        let parts: Vec<&str> = token.split('.').collect();
-        if parts.len() != 3 {
-            return Err(anyhow::anyhow!("Invalid token format"));
-        }
-
-        let header_data = parts[0];
-        let claims_data = parts[1];
-        let signature_data = parts[2];
+    /// Verify `token` and hand the borrowed claims to `f`.
+    ///
+    /// The success path does not allocate: the token is split in place, the
+    /// signature and claims are decoded into stack buffers and the claims are
+    /// deserialized as borrowed slices.
+    pub fn verify_with<T>(
+        &self,
+        token: &str,
+        f: impl FnOnce(ClaimsRef<'_>) -> Result<T>,
+    ) -> Result<T> {
+        let (header_data, claims_data, signature_data) = split_token(token)?;
 
         // Verify signature
-        let message = format!("{}.{}", header_data, claims_data);
-        let mut mac = HmacSha256::new_from_slice(self.secret.as_bytes())
-            .map_err(|e| anyhow::anyhow!("Invalid secret key: {}", e))?;
-        mac.update(message.as_bytes());
+        let mut mac = self.mac.clone();
+        mac.update(header_data.as_bytes());
+        mac.update(b".");
+        mac.update(claims_data.as_bytes());
 
-        let expected_signature = mac.finalize().into_bytes();
-        let provided_signature = general_purpose::URL_SAFE_NO_PAD
-            .decode(signature_data)
+        let mut signature = [0u8; SIGNATURE_BUFFER_LEN];
+        let signature_len = general_purpose::URL_SAFE_NO_PAD
+            .decode_slice(signature_data, &mut signature)
             .map_err(|e| anyhow::anyhow!("Invalid signature encoding: {}", e))?;
 
-        if expected_signature[..] != provided_signature[..] {
-            return Err(anyhow::anyhow!("Invalid signature"));
-        }
+        mac.verify_slice(&signature[..signature_len])
+            .map_err(|_| anyhow::anyhow!("Invalid signature"))?;
 
         // Decode claims
-        let claims_bytes = general_purpose::URL_SAFE_NO_PAD
-            .decode(claims_data)
+        if claims_data.len() > MAX_CLAIMS_SEGMENT_LEN {
+            return Err(anyhow::anyhow!("Invalid claims: token too large"));
+        }
+
+        let mut claims_buffer = [0u8; CLAIMS_BUFFER_LEN];
+        let claims_len = general_purpose::URL_SAFE_NO_PAD
+            .decode_slice(claims_data, &mut claims_buffer)
             .map_err(|e| anyhow::anyhow!("Invalid claims encoding: {}", e))?;
-        let claims_json = String::from_utf8(claims_bytes)
-            .map_err(|e| anyhow::anyhow!("Invalid claims UTF-8: {}", e))?;
-        let claims: Claims = serde_json::from_str(&claims_json)
+        let claims: ClaimsRef<'_> = serde_json::from_slice(&claims_buffer[..claims_len])
             .map_err(|e| anyhow::anyhow!("Invalid claims JSON: {}", e))?;
 
         // Check expiration
@@ -114,13 +188,72 @@ impl JwtService {
             return Err(anyhow::anyhow!("Token has expired"));
         }
 
-        Ok(claims)
+        f(claims)
+    }
+
+    pub fn verify_token(&self, token: &str) -> Result<Claims> {
+        self.verify_with(token, |claims| {
+            Ok(Claims {
+                sub: claims.sub.into_owned(),
+                username: claims.username.into_owned(),
+                email: claims.email.into_owned(),
+                exp: claims.exp,
+                iat: claims.iat,
+                is_active: claims.is_active,
+                security_epoch: claims.security_epoch,
+            })
+        })
     }
 
     pub fn extract_user_id(&self, token: &str) -> Result<i32> {
-        let claims = self.verify_token(token)?;
-        claims.sub.parse::<i32>()
-            .map_err(|e| anyhow::anyhow!("Invalid user ID in token: {}", e))
+        self.verify_with(token, |claims| {
+            claims.sub.parse::<i32>()
+                .map_err(|e| anyhow::anyhow!("Invalid user ID in token: {}", e))
+        })
+    }
+
+    /// Sign a refresh token for session `family` at rotation `generation`.
+    ///
+    /// The token is `<family>.<generation>.<signature>`; it carries no claims,
+    /// the session itself lives in `RefreshStore`.
+    pub fn generate_refresh_token(&self, family: &str, generation: u32) -> String {
+        let payload = format!("{}.{}", family, generation);
+
+        let mut mac = self.mac.clone();
+        mac.update(REFRESH_TOKEN_CONTEXT);
+        mac.update(payload.as_bytes());
+        let signature = mac.finalize().into_bytes();
+        let signature_encoded = general_purpose::URL_SAFE_NO_PAD.encode(&signature);
+
+        format!("{}.{}", payload, signature_encoded)
+    }
+
+    /// Check the signature of a refresh token and return its family and generation.
+    ///
+    /// This is a single HMAC over a few dozen bytes; whether the session is still
+    /// live is decided by `RefreshStore::rotate`.
+    pub fn verify_refresh_token<'a>(&self, token: &'a str) -> Result<(&'a str, u32)> {
+        let (family, generation, signature_data) = split_token(token)?;
+
+        let mut mac = self.mac.clone();
+        mac.update(REFRESH_TOKEN_CONTEXT);
+        mac.update(family.as_bytes());
+        mac.update(b".");
+        mac.update(generation.as_bytes());
+
+        let mut signature = [0u8; SIGNATURE_BUFFER_LEN];
+        let signature_len = general_purpose::URL_SAFE_NO_PAD
+            .decode_slice(signature_data, &mut signature)
+            .map_err(|e| anyhow::anyhow!("Invalid signature encoding: {}", e))?;
+
+        mac.verify_slice(&signature[..signature_len])
+            .map_err(|_| anyhow::anyhow!("Invalid signature"))?;
+
+        let generation = generation
+            .parse::<u32>()
+            .map_err(|e| anyhow::anyhow!("Invalid refresh token generation: {}", e))?;
+
+        Ok((family, generation))
     }
 
     pub fn get_token_expiry_hours() -> i64 {
@@ -129,16 +262,96 @@ impl JwtService {
             .parse::<i64>()
             .unwrap_or(24)
     }
+
+    /// `JWT_ACCESS_EXPIRE_MINUTES` overrides `JWT_EXPIRE_HOURS` when set, so
+    /// deployments using refresh tokens can hand out short access tokens.
+    pub fn get_access_token_expiry_minutes() -> Option<i64> {
+        env::var("JWT_ACCESS_EXPIRE_MINUTES")
+            .ok()
+            .and_then(|value| value.trim().parse::<i64>().ok())
+            .filter(|minutes| *minutes > 0)
+    }
+}
+
+/// Split `header.claims.signature` without collecting into a `Vec`.
+fn split_token(token: &str) -> Result<(&str, &str, &str)> {
+    let mut parts = token.splitn(3, '.');
+    match (parts.next(), parts.next(), parts.next()) {
+        (Some(header), Some(claims), Some(signature)) if !signature.contains('.') => {
+            Ok((header, claims, signature))
+        }
+        _ => Err(anyhow::anyhow!("Invalid token format")),
+    }
 }
 
+/// Range accepted by the bcrypt crate.
+const MIN_BCRYPT_COST: u32 = 4;
+const MAX_BCRYPT_COST: u32 = 31;
+
+static BCRYPT_COST: OnceLock<u32> = OnceLock::new();
+
 pub struct PasswordService;
 
 impl PasswordService {
+    /// Hash with the configured cost, see [`PasswordService::cost`].
     pub fn hash_password(password: &str) -> Result<String> {
-        hash(password, DEFAULT_COST)
+        Self::hash_password_with_cost(password, Self::cost())
+    }
+
+    pub fn hash_password_with_cost(password: &str, cost: u32) -> Result<String> {
+        hash(password, cost)
             .map_err(|e| anyhow::anyhow!("Failed to hash password: {}", e))
     }
 
+    /// Target bcrypt cost from `BCRYPT_COST` (default `DEFAULT_COST`, 12),
+    /// read once per process.
+    pub fn cost() -> u32 {
+        *BCRYPT_COST.get_or_init(|| {
+            env::var("BCRYPT_COST")
+                .ok()
+                .and_then(|value| value.trim().parse::<u32>().ok())
+                .unwrap_or(DEFAULT_COST)
+                .clamp(MIN_BCRYPT_COST, MAX_BCRYPT_COST)
+        })
+    }
+
+    /// Cost encoded in a stored hash (`$2b$<cost>$...`).
+    pub fn hash_cost(hash: &str) -> Option<u32> {
+        hash.split('$').nth(2)?.parse::<u32>().ok()
+    }
+
+    /// Whether a stored hash was made with a cost other than the target, so
+    /// that a successful login should re-hash the password.
+    pub fn needs_rehash(hash: &str) -> bool {
+        Self::hash_cost(hash).map_or(false, |cost| cost != Self::cost())
+    }
+
+    /// Time one hash per cost, from the minimum upwards, until a cost exceeds
+    /// `target`. Returns the highest cost that stayed within `target` (or the
+    /// minimum if none did) together with the measured timings.
+    pub fn calibrate_cost(target: StdDuration) -> Result<(u32, Vec<(u32, StdDuration)>)> {
+        let mut timings = Vec::new();
+        let mut chosen = MIN_BCRYPT_COST;
+
+        for cost in MIN_BCRYPT_COST..=MAX_BCRYPT_COST {
+            // Best of three, to keep scheduler noise out of the estimate
+            let mut best = StdDuration::MAX;
+            for _ in 0..3 {
+                let started = Instant::now();
+                Self::hash_password_with_cost("calibration-password", cost)?;
+                best = best.min(started.elapsed());
+            }
+            timings.push((cost, best));
+
+            if best > target {
+                break;
+            }
+            chosen = cost;
+        }
+
+        Ok((chosen, timings))
+    }
+
     pub fn verify_password(password: &str, hash: &str) -> Result<bool> {
         verify(password, hash)
             .map_err(|e| anyhow::anyhow!("Failed to verify password: {}", e))
@@ -158,15 +371,27 @@ mod tests {
         assert!(!PasswordService::verify_password("wrong_password", &hash).unwrap());
     }
 
+    #[test]
+    fn test_hash_cost() {
+        let hash = PasswordService::hash_password_with_cost("test_password_123", 4).unwrap();
+        assert_eq!(PasswordService::hash_cost(&hash), Some(4));
+        assert_eq!(PasswordService::hash_cost("not-a-bcrypt-hash"), None);
+
+        assert_eq!(PasswordService::needs_rehash(&hash), PasswordService::cost() != 4);
+        assert!(!PasswordService::needs_rehash("not-a-bcrypt-hash"));
+    }
+
     #[test]
     fn test_jwt_token() {
         let jwt_service = JwtService::new().unwrap();
-        let token = jwt_service.generate_token(1, "testuser", "test@example.com").unwrap();
+        let token = jwt_service.generate_token(1, "testuser", "test@example.com", true, 0).unwrap();
         
         let claims = jwt_service.verify_token(&token).unwrap();
         assert_eq!(claims.sub, "1");
         assert_eq!(claims.username, "testuser");
         assert_eq!(claims.email, "test@example.com");
+        assert_eq!(claims.is_active, Some(true));
+        assert_eq!(claims.security_epoch, Some(0));
         
         let user_id = jwt_service.extract_user_id(&token).unwrap();
         assert_eq!(user_id, 1);
@@ -178,5 +403,41 @@ mod tests {
         
         assert!(jwt_service.verify_token("invalid.token").is_err());
         assert!(jwt_service.verify_token("invalid.token.format").is_err());
+        assert!(jwt_service.verify_token("a.b.c.d").is_err());
+    }
+
+    #[test]
+    fn test_tampered_token() {
+        let jwt_service = JwtService::with_secret(b"first-secret-key-for-testing-only", 1).unwrap();
+        let other_service = JwtService::with_secret(b"other-secret-key-for-testing-only", 1).unwrap();
+        let token = jwt_service.generate_token(7, "testuser", "test@example.com", true, 0).unwrap();
+
+        assert!(other_service.verify_token(&token).is_err());
+
+        let (message, _) = token.rsplit_once('.').unwrap();
+        let forged = format!("{}.{}", message, "A".repeat(43));
+        assert!(jwt_service.verify_token(&forged).is_err());
+    }
+
+    #[test]
+    fn test_expired_token() {
+        let jwt_service = JwtService::with_secret(b"expired-secret-key-for-testing", -1).unwrap();
+        let token = jwt_service.generate_token(1, "testuser", "test@example.com", true, 0).unwrap();
+
+        assert!(jwt_service.verify_token(&token).is_err());
+    }
+
+    #[test]
+    fn test_refresh_token() {
+        let jwt_service = JwtService::with_secret(b"refresh-secret-key-for-testing", 1).unwrap();
+        let token = jwt_service.generate_refresh_token("0f9c2d", 3);
+
+        assert_eq!(jwt_service.verify_refresh_token(&token).unwrap(), ("0f9c2d", 3));
+
+        // A refresh token is not a JWT and a bumped generation breaks the signature
+        assert!(jwt_service.verify_token(&token).is_err());
+        let (_, signature) = token.rsplit_once('.').unwrap();
+        let forged = format!("0f9c2d.4.{}", signature);
+        assert!(jwt_service.verify_refresh_token(&forged).is_err());
     }
 }
\ No newline at end of file
@@ -0,0 +1,127 @@
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::future::Future;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+
+/// Short-lived cache of `COUNT(*)` results for paginated lists.
+///
+/// A full count scans the table, so list endpoints only compute it on
+/// `include_total=true` and share the result for `LIST_COUNT_CACHE_SECONDS`.
+/// Keys name the table (and, for filtered lists, the filter).
+pub struct CountCache {
+    ttl: Duration,
+    entries: Mutex<HashMap<String, (u64, Instant)>>,
+    hits: AtomicU64,
+    misses: AtomicU64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct CountCacheStats {
+    pub entries: usize,
+    pub ttl_seconds: u64,
+    pub hits: u64,
+    pub misses: u64,
+}
+
+impl CountCache {
+    pub fn new(ttl: Duration) -> Self {
+        Self {
+            ttl,
+            entries: Mutex::new(HashMap::new()),
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `LIST_COUNT_CACHE_SECONDS` (default 30, 0 disables caching).
+    pub fn from_env() -> Self {
+        let ttl_seconds = env::var("LIST_COUNT_CACHE_SECONDS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(30);
+
+        Self::new(Duration::from_secs(ttl_seconds))
+    }
+
+    /// Return the cached count for `key`, or run `count` and cache its result.
+    pub async fn get_or_count<F, E>(&self, key: &str, count: F) -> Result<u64, E>
+    where
+        F: Future<Output = Result<u64, E>>,
+    {
+        if let Some(total) = self.get(key) {
+            self.hits.fetch_add(1, Ordering::Relaxed);
+            return Ok(total);
+        }
+
+        self.misses.fetch_add(1, Ordering::Relaxed);
+        let total = count.await?;
+        if !self.ttl.is_zero() {
+            let mut entries = self.entries.lock().unwrap();
+            let ttl = self.ttl;
+            entries.retain(|_, (_, counted_at)| counted_at.elapsed() < ttl);
+            entries.insert(key.to_string(), (total, Instant::now()));
+        }
+        Ok(total)
+    }
+
+    /// [`CountCache::get_or_count`] when `wanted`, otherwise `Ok(None)`
+    /// without touching the database.
+    pub async fn total_if<F, E>(&self, wanted: bool, key: &str, count: F) -> Result<Option<u64>, E>
+    where
+        F: Future<Output = Result<u64, E>>,
+    {
+        if !wanted {
+            return Ok(None);
+        }
+        self.get_or_count(key, count).await.map(Some)
+    }
+
+    fn get(&self, key: &str) -> Option<u64> {
+        let entries = self.entries.lock().unwrap();
+        match entries.get(key) {
+            Some((total, counted_at)) if counted_at.elapsed() < self.ttl => Some(*total),
+            _ => None,
+        }
+    }
+
+    /// Drop every cached count whose key starts with `prefix`, e.g. after a
+    /// write to that table.
+    pub fn invalidate(&self, prefix: &str) {
+        self.entries
+            .lock()
+            .unwrap()
+            .retain(|key, _| !key.starts_with(prefix));
+    }
+
+    pub fn stats(&self) -> CountCacheStats {
+        CountCacheStats {
+            entries: self.entries.lock().unwrap().len(),
+            ttl_seconds: self.ttl.as_secs(),
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[tokio::test]
+    async fn test_count_is_cached_until_invalidated() {
+        let cache = CountCache::new(Duration::from_secs(60));
+
+        let total: Result<u64, ()> = cache.get_or_count("karyawan", async { Ok(7) }).await;
+        assert_eq!(total, Ok(7));
+        let total: Result<u64, ()> = cache.get_or_count("karyawan", async { Ok(8) }).await;
+        assert_eq!(total, Ok(7));
+
+        cache.invalidate("karyawan");
+        let total: Result<u64, ()> = cache.get_or_count("karyawan", async { Ok(8) }).await;
+        assert_eq!(total, Ok(8));
+        assert_eq!(cache.stats().hits, 1);
+    }
+}
@@ -0,0 +1,182 @@
+/// Incremental RFC 4180 reader.
+///
+/// Bytes are pushed in as they arrive (e.g. multipart chunks) and complete
+/// records come out, so a file never has to be held in memory. Handles
+/// quoted fields with commas, doubled quotes and line breaks, CRLF line
+/// endings and chunk boundaries anywhere, including inside a UTF-8 sequence.
+/// Blank lines are skipped.
+pub struct CsvDecoder {
+    record: Vec<String>,
+    field: Vec<u8>,
+    /// Current field was opened with a quote.
+    quoted: bool,
+    in_quotes: bool,
+    /// Just saw a quote inside a quoted field: either the closing quote or
+    /// the first half of an escaped `""`.
+    after_quote: bool,
+    record_bytes: usize,
+    max_record_bytes: usize,
+}
+
+impl CsvDecoder {
+    /// `max_record_bytes` bounds a single record, so an unterminated quote
+    /// cannot make the decoder buffer the rest of the file.
+    pub fn new(max_record_bytes: usize) -> Self {
+        Self {
+            record: Vec::new(),
+            field: Vec::new(),
+            quoted: false,
+            in_quotes: false,
+            after_quote: false,
+            record_bytes: 0,
+            max_record_bytes,
+        }
+    }
+
+    /// Decode `bytes` and append every record they complete to `out`.
+    pub fn push(&mut self, bytes: &[u8], out: &mut Vec<Vec<String>>) -> Result<(), String> {
+        for &byte in bytes {
+            self.record_bytes += 1;
+            if self.record_bytes > self.max_record_bytes {
+                return Err(format!(
+                    "Baris CSV melebihi {} byte (tanda kutip tidak ditutup?)",
+                    self.max_record_bytes
+                ));
+            }
+
+            if self.in_quotes {
+                if byte == b'"' {
+                    self.in_quotes = false;
+                    self.after_quote = true;
+                } else {
+                    self.field.push(byte);
+                }
+                continue;
+            }
+
+            if self.after_quote {
+                self.after_quote = false;
+                if byte == b'"' {
+                    self.field.push(b'"');
+                    self.in_quotes = true;
+                    continue;
+                }
+            }
+
+            match byte {
+                b',' => self.end_field(),
+                b'\n' => {
+                    self.end_field();
+                    self.end_record(out);
+                }
+                b'\r' => {}
+                b'"' if self.field.is_empty() && !self.quoted => {
+                    self.quoted = true;
+                    self.in_quotes = true;
+                }
+                _ => self.field.push(byte),
+            }
+        }
+        Ok(())
+    }
+
+    /// Flush the last record when the input does not end with a newline.
+    pub fn finish(&mut self, out: &mut Vec<Vec<String>>) -> Result<(), String> {
+        if self.in_quotes {
+            return Err("Tanda kutip di akhir file CSV tidak ditutup".to_string());
+        }
+        if !self.field.is_empty() || !self.record.is_empty() || self.quoted {
+            self.end_field();
+            self.end_record(out);
+        }
+        Ok(())
+    }
+
+    fn end_field(&mut self) {
+        self.record.push(String::from_utf8_lossy(&self.field).into_owned());
+        self.field.clear();
+        self.quoted = false;
+        self.after_quote = false;
+    }
+
+    fn end_record(&mut self, out: &mut Vec<Vec<String>>) {
+        let record = std::mem::take(&mut self.record);
+        self.record_bytes = 0;
+        if !(record.len() == 1 && record[0].is_empty()) {
+            out.push(record);
+        }
+    }
+}
+
+/// Append `field` to `buf` with RFC 4180 quoting: fields containing a comma,
+/// quote or line break are wrapped in quotes with inner quotes doubled.
+pub fn write_field(buf: &mut Vec<u8>, field: &str) {
+    if field.contains([',', '"', '\n', '\r']) {
+        buf.push(b'"');
+        buf.extend_from_slice(field.replace('"', "\"\"").as_bytes());
+        buf.push(b'"');
+    } else {
+        buf.extend_from_slice(field.as_bytes());
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const INPUT: &str = "nama,gaji\r\n\"Santoso, Budi\",5000000\n\n\"Ani \"\"A\"\"\nÄ\",\n";
+
+    fn expected() -> Vec<Vec<String>> {
+        vec![
+            vec!["nama".to_string(), "gaji".to_string()],
+            vec!["Santoso, Budi".to_string(), "5000000".to_string()],
+            vec!["Ani \"A\"\nÄ".to_string(), String::new()],
+        ]
+    }
+
+    #[test]
+    fn test_decode_across_chunk_boundaries() {
+        for chunk_size in [1, 2, 3, 7, INPUT.len()] {
+            let mut decoder = CsvDecoder::new(1024);
+            let mut records = Vec::new();
+            for chunk in INPUT.as_bytes().chunks(chunk_size) {
+                decoder.push(chunk, &mut records).unwrap();
+            }
+            decoder.finish(&mut records).unwrap();
+            assert_eq!(records, expected(), "chunk size {}", chunk_size);
+        }
+    }
+
+    #[test]
+    fn test_finish_and_limits() {
+        let mut decoder = CsvDecoder::new(1024);
+        let mut records = Vec::new();
+        decoder.push(b"a,b\n1,2", &mut records).unwrap();
+        decoder.finish(&mut records).unwrap();
+        assert_eq!(records.len(), 2);
+
+        let mut decoder = CsvDecoder::new(1024);
+        decoder.push(b"\"open", &mut records).unwrap();
+        assert!(decoder.finish(&mut records).is_err());
+
+        let mut decoder = CsvDecoder::new(8);
+        assert!(decoder.push(b"\"0123456789", &mut records).is_err());
+    }
+
+    #[test]
+    fn test_write_field_round_trip() {
+        let mut buf = Vec::new();
+        for (i, field) in ["plain", "a,b", "say \"hi\"", "two\nlines"].iter().enumerate() {
+            if i > 0 {
+                buf.push(b',');
+            }
+            write_field(&mut buf, field);
+        }
+        buf.push(b'\n');
+
+        let mut decoder = CsvDecoder::new(1024);
+        let mut records = Vec::new();
+        decoder.push(&buf, &mut records).unwrap();
+        assert_eq!(records, vec![vec!["plain", "a,b", "say \"hi\"", "two\nlines"]]);
+    }
+}
@@ -0,0 +1,384 @@
+use serde::Serialize;
+use std::borrow::Borrow;
+use std::collections::hash_map::RandomState;
+use std::collections::HashMap;
+use std::env;
+use std::hash::{BuildHasher, Hash};
+use std::net::IpAddr;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+
+const SHARD_COUNT: usize = 16;
+/// Longest account key we keep; longer inputs are truncated so an attacker
+/// cannot grow the table with huge usernames.
+const MAX_ACCOUNT_KEY_LEN: usize = 255;
+/// Peers whose `X-Forwarded-For` is trusted by default: loopback and the
+/// private ranges a reverse proxy (e.g. the nginx container) connects from.
+const DEFAULT_TRUSTED_PROXIES: &str = "127.0.0.0/8,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16";
+
+/// Fixed-window failure counter.
+struct Window {
+    failures: u32,
+    started_at: Instant,
+}
+
+/// Sharded map of failure windows with a bounded number of entries.
+struct WindowMap<K> {
+    shards: Vec<Mutex<HashMap<K, Window>>>,
+    hasher: RandomState,
+    shard_capacity: usize,
+}
+
+impl<K: Hash + Eq + Clone> WindowMap<K> {
+    fn new(max_entries: usize) -> Self {
+        Self {
+            shards: (0..SHARD_COUNT).map(|_| Mutex::new(HashMap::new())).collect(),
+            hasher: RandomState::new(),
+            shard_capacity: ((max_entries + SHARD_COUNT - 1) / SHARD_COUNT).max(1),
+        }
+    }
+
+    fn shard<Q: Hash + ?Sized>(&self, key: &Q) -> &Mutex<HashMap<K, Window>> {
+        let index = self.hasher.hash_one(key) as usize % SHARD_COUNT;
+        &self.shards[index]
+    }
+
+    /// Time left in the window when `key` has reached `max_failures`.
+    fn blocked_for<Q>(&self, key: &Q, max_failures: u32, window: Duration) -> Option<Duration>
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        let shard = self.shard(key).lock().unwrap();
+        let entry = shard.get(key)?;
+        let elapsed = entry.started_at.elapsed();
+        if entry.failures >= max_failures && elapsed < window {
+            Some(window - elapsed)
+        } else {
+            None
+        }
+    }
+
+    fn record(&self, key: K, window: Duration) {
+        let now = Instant::now();
+        let mut shard = self.shard(&key).lock().unwrap();
+
+        if !shard.contains_key(&key) && shard.len() >= self.shard_capacity {
+            shard.retain(|_, entry| now.duration_since(entry.started_at) < window);
+            if shard.len() >= self.shard_capacity {
+                let oldest = shard
+                    .iter()
+                    .min_by_key(|(_, entry)| entry.started_at)
+                    .map(|(key, _)| key.clone());
+                if let Some(oldest) = oldest {
+                    shard.remove(&oldest);
+                }
+            }
+        }
+
+        let entry = shard.entry(key).or_insert(Window {
+            failures: 0,
+            started_at: now,
+        });
+        if now.duration_since(entry.started_at) >= window {
+            entry.failures = 0;
+            entry.started_at = now;
+        }
+        entry.failures = entry.failures.saturating_add(1);
+    }
+
+    fn remove<Q>(&self, key: &Q)
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        self.shard(key).lock().unwrap().remove(key);
+    }
+
+    fn len(&self) -> usize {
+        self.shards.iter().map(|shard| shard.lock().unwrap().len()).sum()
+    }
+}
+
+/// An address or CIDR block whose `X-Forwarded-For` is trusted.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+struct ProxyNet {
+    network: IpAddr,
+    prefix: u32,
+}
+
+impl ProxyNet {
+    fn parse(value: &str) -> Option<Self> {
+        let (address, prefix) = match value.split_once('/') {
+            Some((address, prefix)) => (address, Some(prefix)),
+            None => (value, None),
+        };
+        let network: IpAddr = address.trim().parse().ok()?;
+        let bits = if network.is_ipv4() { 32 } else { 128 };
+        let prefix = match prefix {
+            Some(prefix) => prefix.trim().parse::<u32>().ok().filter(|prefix| *prefix <= bits)?,
+            None => bits,
+        };
+        Some(Self { network, prefix })
+    }
+
+    fn contains(&self, ip: IpAddr) -> bool {
+        // Dual-stack sockets report IPv4 peers as ::ffff:a.b.c.d
+        let ip = match ip {
+            IpAddr::V6(v6) => v6.to_ipv4_mapped().map(IpAddr::V4).unwrap_or(ip),
+            ip => ip,
+        };
+        let (network, ip, bits) = match (self.network, ip) {
+            (IpAddr::V4(network), IpAddr::V4(ip)) => (u32::from(network) as u128, u32::from(ip) as u128, 32),
+            (IpAddr::V6(network), IpAddr::V6(ip)) => (u128::from(network), u128::from(ip), 128),
+            _ => return false,
+        };
+        let shift = bits - self.prefix;
+        shift >= bits || network >> shift == ip >> shift
+    }
+}
+
+/// In-memory limiter for the login and register endpoints.
+///
+/// Failed logins are counted per client IP and per (username/email, IP)
+/// within a fixed window, so guessing one account's password from one
+/// address is capped without letting others lock that account out. Failed
+/// registrations count against the IP only. Once a key reaches its limit
+/// further attempts are rejected before any database lookup or bcrypt work,
+/// so an attack cannot saturate the password pool that real users' logins
+/// depend on. A successful login clears its (account, IP) counter.
+pub struct LoginThrottle {
+    window: Duration,
+    max_per_ip: u32,
+    max_per_account: u32,
+    trusted_proxies: Vec<ProxyNet>,
+    ips: WindowMap<IpAddr>,
+    accounts: WindowMap<(IpAddr, String)>,
+    failures: AtomicU64,
+    ip_rejections: AtomicU64,
+    account_rejections: AtomicU64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct LoginThrottleStats {
+    pub window_seconds: u64,
+    pub max_per_ip: u32,
+    pub max_per_account: u32,
+    pub tracked_ips: usize,
+    pub tracked_accounts: usize,
+    pub failures: u64,
+    pub ip_rejections: u64,
+    pub account_rejections: u64,
+}
+
+impl LoginThrottle {
+    /// A limit of zero disables that dimension.
+    pub fn new(window: Duration, max_per_ip: u32, max_per_account: u32, max_entries: usize) -> Self {
+        Self {
+            window,
+            max_per_ip,
+            max_per_account,
+            trusted_proxies: Vec::new(),
+            ips: WindowMap::new(max_entries),
+            accounts: WindowMap::new(max_entries),
+            failures: AtomicU64::new(0),
+            ip_rejections: AtomicU64::new(0),
+            account_rejections: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `LOGIN_THROTTLE_WINDOW_SECONDS` (default 300),
+    /// `LOGIN_THROTTLE_MAX_PER_IP` (default 20),
+    /// `LOGIN_THROTTLE_MAX_PER_ACCOUNT` (default 5) and
+    /// `LOGIN_THROTTLE_MAX_ENTRIES` (default 100000 per map) and
+    /// `LOGIN_THROTTLE_TRUSTED_PROXIES`, the comma-separated addresses or CIDR
+    /// blocks whose `X-Forwarded-For` names the client (default loopback and
+    /// private ranges; empty trusts none).
+    pub fn from_env() -> Self {
+        let window_seconds = env_number("LOGIN_THROTTLE_WINDOW_SECONDS", 300u64);
+        let max_per_ip = env_number("LOGIN_THROTTLE_MAX_PER_IP", 20u32);
+        let max_per_account = env_number("LOGIN_THROTTLE_MAX_PER_ACCOUNT", 5u32);
+        let max_entries = env_number("LOGIN_THROTTLE_MAX_ENTRIES", 100_000usize);
+
+        let mut throttle = Self::new(
+            Duration::from_secs(window_seconds.max(1)),
+            max_per_ip,
+            max_per_account,
+            max_entries,
+        );
+        let trusted_proxies = env::var("LOGIN_THROTTLE_TRUSTED_PROXIES")
+            .unwrap_or_else(|_| DEFAULT_TRUSTED_PROXIES.to_string());
+        throttle.trusted_proxies = parse_proxies(&trusted_proxies);
+        throttle
+    }
+
+    pub fn window(&self) -> Duration {
+        self.window
+    }
+
+    /// Whether `peer` is a proxy whose `X-Forwarded-For` can be trusted.
+    pub fn trusts_proxy(&self, peer: IpAddr) -> bool {
+        self.trusted_proxies.iter().any(|proxy| proxy.contains(peer))
+    }
+
+    /// Normalize a username/email into the key used for per-account limits.
+    pub fn account_key(username_or_email: &str) -> String {
+        username_or_email
+            .trim()
+            .chars()
+            .take(MAX_ACCOUNT_KEY_LEN)
+            .collect::<String>()
+            .to_lowercase()
+    }
+
+    /// `Err(retry_after)` when `ip` is over its limit.
+    pub fn check_ip(&self, ip: IpAddr) -> Result<(), Duration> {
+        if self.max_per_ip == 0 {
+            return Ok(());
+        }
+        match self.ips.blocked_for(&ip, self.max_per_ip, self.window) {
+            Some(retry_after) => {
+                self.ip_rejections.fetch_add(1, Ordering::Relaxed);
+                Err(retry_after)
+            }
+            None => Ok(()),
+        }
+    }
+
+    /// `Err(retry_after)` when `account` is over its limit from `ip`.
+    pub fn check_account(&self, ip: IpAddr, account: &str) -> Result<(), Duration> {
+        if self.max_per_account == 0 {
+            return Ok(());
+        }
+        match self
+            .accounts
+            .blocked_for(&(ip, account.to_string()), self.max_per_account, self.window)
+        {
+            Some(retry_after) => {
+                self.account_rejections.fetch_add(1, Ordering::Relaxed);
+                Err(retry_after)
+            }
+            None => Ok(()),
+        }
+    }
+
+    /// Count a failed login (unknown account or wrong password).
+    pub fn record_failure(&self, ip: IpAddr, account: &str) {
+        self.failures.fetch_add(1, Ordering::Relaxed);
+        if self.max_per_ip > 0 {
+            self.ips.record(ip, self.window);
+        }
+        if self.max_per_account > 0 {
+            self.accounts.record((ip, account.to_string()), self.window);
+        }
+    }
+
+    /// Count a failed registration (invalid input, taken username/email)
+    /// against the client IP.
+    pub fn record_failed_registration(&self, ip: IpAddr) {
+        if self.max_per_ip > 0 {
+            self.ips.record(ip, self.window);
+        }
+    }
+
+    /// Clear the (account, IP) counter after a successful login.
+    pub fn record_success(&self, ip: IpAddr, account: &str) {
+        if self.max_per_account > 0 {
+            self.accounts.remove(&(ip, account.to_string()));
+        }
+    }
+
+    pub fn stats(&self) -> LoginThrottleStats {
+        LoginThrottleStats {
+            window_seconds: self.window.as_secs(),
+            max_per_ip: self.max_per_ip,
+            max_per_account: self.max_per_account,
+            tracked_ips: self.ips.len(),
+            tracked_accounts: self.accounts.len(),
+            failures: self.failures.load(Ordering::Relaxed),
+            ip_rejections: self.ip_rejections.load(Ordering::Relaxed),
+            account_rejections: self.account_rejections.load(Ordering::Relaxed),
+        }
+    }
+}
+
+fn parse_proxies(value: &str) -> Vec<ProxyNet> {
+    value
+        .split(',')
+        .map(str::trim)
+        .filter(|entry| !entry.is_empty())
+        .filter_map(|entry| {
+            let proxy = ProxyNet::parse(entry);
+            if proxy.is_none() {
+                eprintln!("⚠️  Ignoring invalid LOGIN_THROTTLE_TRUSTED_PROXIES entry '{}'", entry);
+            }
+            proxy
+        })
+        .collect()
+}
+
+fn env_number<T: std::str::FromStr>(name: &str, default: T) -> T {
+    env::var(name)
+        .ok()
+        .and_then(|value| value.trim().parse::<T>().ok())
+        .unwrap_or(default)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_ip_and_account_limits() {
+        let throttle = LoginThrottle::new(Duration::from_secs(60), 3, 2, 100);
+        let attacker: IpAddr = "10.0.0.1".parse().unwrap();
+        let user: IpAddr = "10.0.0.2".parse().unwrap();
+
+        throttle.record_failure(attacker, "alice");
+        assert!(throttle.check_account(attacker, "alice").is_ok());
+        throttle.record_failure(attacker, "alice");
+        assert!(throttle.check_account(attacker, "alice").is_err());
+        // The attacker cannot lock alice out from her own address
+        assert!(throttle.check_account(user, "alice").is_ok());
+
+        throttle.record_failure(attacker, "bob");
+        assert!(throttle.check_ip(attacker).is_err());
+        assert!(throttle.check_ip(user).is_ok());
+
+        throttle.record_success(attacker, "alice");
+        assert!(throttle.check_account(attacker, "alice").is_ok());
+        assert_eq!(throttle.stats().failures, 3);
+    }
+
+    #[test]
+    fn test_window_expiry_and_capacity() {
+        let throttle = LoginThrottle::new(Duration::ZERO, 1, 1, 100);
+        let ip: IpAddr = "10.0.0.1".parse().unwrap();
+        throttle.record_failure(ip, "alice");
+        assert!(throttle.check_ip(ip).is_ok());
+
+        let throttle = LoginThrottle::new(Duration::from_secs(60), 1, 1, SHARD_COUNT);
+        for i in 0..1000 {
+            throttle.record_failure(ip, &format!("user{}", i));
+        }
+        assert!(throttle.stats().tracked_accounts <= SHARD_COUNT);
+        assert_eq!(LoginThrottle::account_key("  Alice@Example.com "), "alice@example.com");
+    }
+
+    #[test]
+    fn test_trusted_proxies() {
+        let mut throttle = LoginThrottle::new(Duration::from_secs(60), 1, 1, 100);
+        throttle.trusted_proxies = parse_proxies(DEFAULT_TRUSTED_PROXIES);
+        let trusted = |ip: &str| throttle.trusts_proxy(ip.parse().unwrap());
+
+        assert!(trusted("127.0.0.1"));
+        assert!(trusted("172.18.0.5"));
+        assert!(trusted("::ffff:192.168.1.10"));
+        assert!(!trusted("172.32.0.1"));
+        assert!(!trusted("203.0.113.7"));
+
+        assert_eq!(parse_proxies("0.0.0.0/0, bogus, 10.1.2.3/33").len(), 1);
+        assert!(parse_proxies("").is_empty());
+    }
+}
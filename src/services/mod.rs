@@ -1,2 +1,11 @@
 pub mod file_upload;
-pub mod auth;
\ No newline at end of file
+pub mod auth;
+pub mod user_cache;
+pub mod password_pool;
+pub mod provisioning;
+pub mod revocation;
+pub mod refresh;
+pub mod login_throttle;
+pub mod count_cache;
+pub mod csv_codec;
+pub mod stats_cache;
@@ -0,0 +1,263 @@
+use serde::Serialize;
+use std::env;
+use std::fmt;
+use std::sync::atomic::{AtomicU64, AtomicUsize, Ordering};
+use std::sync::mpsc::{sync_channel, SyncSender, TrySendError};
+use std::sync::{Arc, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
+use tokio::sync::oneshot;
+
+use crate::services::auth::PasswordService;
+
+type Job = Box<dyn FnOnce() + Send + 'static>;
+
+/// Dedicated, size-limited thread pool for bcrypt work.
+///
+/// Hashing and verification run on their own OS threads behind a bounded
+/// queue, so a burst of logins cannot occupy the Tokio workers that serve every
+/// other request. When the queue is full the call fails immediately with
+/// [`PasswordPoolError::Busy`] and the handler answers 503.
+pub struct PasswordPool {
+    sender: SyncSender<Job>,
+    metrics: Arc<PoolMetrics>,
+    workers: usize,
+    queue_capacity: usize,
+}
+
+#[derive(Debug)]
+pub enum PasswordPoolError {
+    /// The queue is full; the request should be retried later.
+    Busy,
+    Failed(anyhow::Error),
+}
+
+impl fmt::Display for PasswordPoolError {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self {
+            PasswordPoolError::Busy => write!(f, "Password hashing queue is full"),
+            PasswordPoolError::Failed(err) => write!(f, "{}", err),
+        }
+    }
+}
+
+#[derive(Default)]
+struct PoolMetrics {
+    queued: AtomicUsize,
+    running: AtomicUsize,
+    completed: AtomicU64,
+    rejected: AtomicU64,
+    total_wait_us: AtomicU64,
+    max_wait_us: AtomicU64,
+    total_exec_us: AtomicU64,
+    max_exec_us: AtomicU64,
+}
+
+impl PoolMetrics {
+    fn record(&self, wait: Duration, exec: Duration) {
+        let wait_us = wait.as_micros() as u64;
+        let exec_us = exec.as_micros() as u64;
+
+        self.completed.fetch_add(1, Ordering::Relaxed);
+        self.total_wait_us.fetch_add(wait_us, Ordering::Relaxed);
+        self.max_wait_us.fetch_max(wait_us, Ordering::Relaxed);
+        self.total_exec_us.fetch_add(exec_us, Ordering::Relaxed);
+        self.max_exec_us.fetch_max(exec_us, Ordering::Relaxed);
+    }
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct PasswordPoolStats {
+    pub workers: usize,
+    pub queue_capacity: usize,
+    pub queue_depth: usize,
+    pub running: usize,
+    pub completed: u64,
+    pub rejected: u64,
+    pub avg_wait_ms: f64,
+    pub max_wait_ms: f64,
+    pub avg_exec_ms: f64,
+    pub max_exec_ms: f64,
+}
+
+impl PasswordPool {
+    pub fn new(workers: usize, queue_capacity: usize) -> Self {
+        let workers = workers.max(1);
+        let (sender, receiver) = sync_channel::<Job>(queue_capacity);
+        let receiver = Arc::new(Mutex::new(receiver));
+
+        for index in 0..workers {
+            let receiver = receiver.clone();
+            thread::Builder::new()
+                .name(format!("bcrypt-worker-{}", index))
+                .spawn(move || loop {
+                    let job = match receiver.lock().unwrap().recv() {
+                        Ok(job) => job,
+                        Err(_) => break,
+                    };
+                    job();
+                })
+                .expect("Failed to spawn password worker thread");
+        }
+
+        Self {
+            sender,
+            metrics: Arc::new(PoolMetrics::default()),
+            workers,
+            queue_capacity,
+        }
+    }
+
+    /// Reads `PASSWORD_POOL_WORKERS` (default: half the available cores) and
+    /// `PASSWORD_POOL_QUEUE` (default 64).
+    pub fn from_env() -> Self {
+        let default_workers = thread::available_parallelism()
+            .map(|cores| (cores.get() / 2).max(1))
+            .unwrap_or(1);
+        let workers = env::var("PASSWORD_POOL_WORKERS")
+            .ok()
+            .and_then(|value| value.parse::<usize>().ok())
+            .unwrap_or(default_workers);
+        let queue_capacity = env::var("PASSWORD_POOL_QUEUE")
+            .ok()
+            .and_then(|value| value.parse::<usize>().ok())
+            .unwrap_or(64);
+
+        Self::new(workers, queue_capacity)
+    }
+
+    pub async fn hash_password(&self, password: &str) -> Result<String, PasswordPoolError> {
+        let password = password.to_string();
+        self.run(move || PasswordService::hash_password(&password)).await
+    }
+
+    pub async fn verify_password(&self, password: &str, hash: &str) -> Result<bool, PasswordPoolError> {
+        let password = password.to_string();
+        let hash = hash.to_string();
+        self.run(move || PasswordService::verify_password(&password, &hash)).await
+    }
+
+    pub fn stats(&self) -> PasswordPoolStats {
+        let completed = self.metrics.completed.load(Ordering::Relaxed);
+        let average_ms = |total_us: u64| {
+            if completed == 0 {
+                0.0
+            } else {
+                total_us as f64 / completed as f64 / 1000.0
+            }
+        };
+
+        PasswordPoolStats {
+            workers: self.workers,
+            queue_capacity: self.queue_capacity,
+            queue_depth: self.metrics.queued.load(Ordering::Relaxed),
+            running: self.metrics.running.load(Ordering::Relaxed),
+            completed,
+            rejected: self.metrics.rejected.load(Ordering::Relaxed),
+            avg_wait_ms: average_ms(self.metrics.total_wait_us.load(Ordering::Relaxed)),
+            max_wait_ms: self.metrics.max_wait_us.load(Ordering::Relaxed) as f64 / 1000.0,
+            avg_exec_ms: average_ms(self.metrics.total_exec_us.load(Ordering::Relaxed)),
+            max_exec_ms: self.metrics.max_exec_us.load(Ordering::Relaxed) as f64 / 1000.0,
+        }
+    }
+
+    async fn run<T, F>(&self, task: F) -> Result<T, PasswordPoolError>
+    where
+        T: Send + 'static,
+        F: FnOnce() -> anyhow::Result<T> + Send + 'static,
+    {
+        let (result_tx, result_rx) = oneshot::channel();
+        let metrics = self.metrics.clone();
+        let enqueued_at = Instant::now();
+
+        let job: Job = Box::new(move || {
+            metrics.queued.fetch_sub(1, Ordering::Relaxed);
+            metrics.running.fetch_add(1, Ordering::Relaxed);
+            let wait = enqueued_at.elapsed();
+
+            let started_at = Instant::now();
+            let result = task();
+            let exec = started_at.elapsed();
+
+            metrics.running.fetch_sub(1, Ordering::Relaxed);
+            metrics.record(wait, exec);
+            let _ = result_tx.send(result);
+        });
+
+        self.metrics.queued.fetch_add(1, Ordering::Relaxed);
+        match self.sender.try_send(job) {
+            Ok(()) => {}
+            Err(TrySendError::Full(_)) => {
+                self.metrics.queued.fetch_sub(1, Ordering::Relaxed);
+                self.metrics.rejected.fetch_add(1, Ordering::Relaxed);
+                return Err(PasswordPoolError::Busy);
+            }
+            Err(TrySendError::Disconnected(_)) => {
+                self.metrics.queued.fetch_sub(1, Ordering::Relaxed);
+                return Err(PasswordPoolError::Failed(anyhow::anyhow!(
+                    "Password worker pool is not running"
+                )));
+            }
+        }
+
+        match result_rx.await {
+            Ok(result) => result.map_err(PasswordPoolError::Failed),
+            Err(_) => Err(PasswordPoolError::Failed(anyhow::anyhow!(
+                "Password worker stopped before finishing"
+            ))),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::sync::mpsc;
+
+    #[tokio::test]
+    async fn test_hash_and_verify_on_pool() {
+        let pool = PasswordPool::new(1, 4);
+
+        let hash = pool.hash_password("test_password_123").await.unwrap();
+        assert!(pool.verify_password("test_password_123", &hash).await.unwrap());
+        assert!(!pool.verify_password("wrong_password", &hash).await.unwrap());
+
+        let stats = pool.stats();
+        assert_eq!(stats.completed, 3);
+        assert_eq!(stats.queue_depth, 0);
+    }
+
+    #[tokio::test(flavor = "multi_thread", worker_threads = 2)]
+    async fn test_full_queue_is_rejected() {
+        let pool = Arc::new(PasswordPool::new(1, 1));
+        let (started_tx, started_rx) = mpsc::channel();
+        let (release_tx, release_rx) = mpsc::channel::<()>();
+
+        // Occupy the only worker
+        let blocking_pool = pool.clone();
+        let blocked = tokio::spawn(async move {
+            blocking_pool
+                .run(move || {
+                    started_tx.send(()).unwrap();
+                    release_rx.recv().unwrap();
+                    Ok(())
+                })
+                .await
+        });
+        started_rx.recv().unwrap();
+
+        // Fill the single queue slot
+        let queued_pool = pool.clone();
+        let queued = tokio::spawn(async move { queued_pool.run(|| Ok(())).await });
+        while pool.stats().queue_depth == 0 {
+            tokio::time::sleep(Duration::from_millis(5)).await;
+        }
+
+        assert!(matches!(pool.run(|| Ok(())).await, Err(PasswordPoolError::Busy)));
+        assert_eq!(pool.stats().rejected, 1);
+
+        release_tx.send(()).unwrap();
+        assert!(blocked.await.unwrap().is_ok());
+        assert!(queued.await.unwrap().is_ok());
+    }
+}
@@ -0,0 +1,432 @@
+use sea_orm::{
+    sea_query::Expr, ActiveModelTrait, ColumnTrait, DatabaseConnection, DbErr, EntityTrait,
+    QueryFilter, QueryOrder, QuerySelect, Set,
+};
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::time::{Duration, Instant};
+use tokio::sync::Notify;
+
+use crate::models::{
+    karyawan::{Column as KaryawanColumn, Entity as KaryawanEntity},
+    user::{ActiveModel as UserActiveModel, Column as UserColumn, Entity as UserEntity},
+};
+use crate::services::password_pool::PasswordPool;
+
+/// Password given to every auto-created karyawan account.
+pub const DEFAULT_KARYAWAN_PASSWORD: &str = "12345678";
+
+/// Username for the account auto-created for a karyawan (lowercase, no spaces).
+pub fn karyawan_username(nama: &str) -> String {
+    nama.to_lowercase().replace(" ", "")
+}
+
+pub fn karyawan_email(username: &str) -> String {
+    format!("{}@karyawan.local", username)
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize)]
+#[serde(rename_all = "lowercase")]
+pub enum ProvisioningMode {
+    /// Create the user account inside the karyawan create request (default).
+    Sync,
+    /// Insert the karyawan right away and let the background worker create
+    /// the account and backfill `user_id`.
+    Deferred,
+}
+
+/// Background worker that creates user accounts for karyawan rows inserted
+/// with `needs_account` set.
+///
+/// In deferred mode the create handlers only call [`UserProvisioner::schedule`];
+/// the worker then scans marked rows in id order, reuses accounts that
+/// already exist for the generated username, hashes the default password on
+/// the [`PasswordPool`] and backfills `user_id` with one UPDATE per batch.
+/// Rows that fail are retried with exponential backoff; once they run out of
+/// attempts their marker is cleared. Rows whose account was deleted later
+/// are not marked, so their account is never recreated.
+pub struct UserProvisioner {
+    mode: ProvisioningMode,
+    batch_size: u64,
+    poll_interval: Duration,
+    max_attempts: u32,
+    notify: Notify,
+    /// Serializes one-off drains started by [`UserProvisioner::provision_pending`].
+    drain_lock: tokio::sync::Mutex<()>,
+    retries: Mutex<HashMap<i32, RetryState>>,
+    provisioned: AtomicU64,
+    reused: AtomicU64,
+    failures: AtomicU64,
+    batches: AtomicU64,
+}
+
+struct RetryState {
+    attempts: u32,
+    next_attempt: Instant,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct ProvisioningStats {
+    pub mode: ProvisioningMode,
+    pub batches: u64,
+    pub provisioned: u64,
+    pub reused_accounts: u64,
+    pub failures: u64,
+    pub retrying: usize,
+}
+
+impl UserProvisioner {
+    pub fn new(mode: ProvisioningMode, batch_size: u64, poll_interval: Duration, max_attempts: u32) -> Self {
+        Self {
+            mode,
+            batch_size: batch_size.max(1),
+            poll_interval,
+            max_attempts: max_attempts.max(1),
+            notify: Notify::new(),
+            drain_lock: tokio::sync::Mutex::new(()),
+            retries: Mutex::new(HashMap::new()),
+            provisioned: AtomicU64::new(0),
+            reused: AtomicU64::new(0),
+            failures: AtomicU64::new(0),
+            batches: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `USER_PROVISIONING_MODE` (`sync` or `deferred`, default `sync`),
+    /// `USER_PROVISIONING_BATCH_SIZE` (default 100),
+    /// `USER_PROVISIONING_INTERVAL_SECONDS` (default 30) and
+    /// `USER_PROVISIONING_MAX_ATTEMPTS` (default 5).
+    pub fn from_env() -> Self {
+        let mode = match env::var("USER_PROVISIONING_MODE")
+            .unwrap_or_default()
+            .trim()
+            .to_lowercase()
+            .as_str()
+        {
+            "deferred" => ProvisioningMode::Deferred,
+            _ => ProvisioningMode::Sync,
+        };
+        let batch_size = env::var("USER_PROVISIONING_BATCH_SIZE")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(100);
+        let interval_seconds = env::var("USER_PROVISIONING_INTERVAL_SECONDS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(30);
+        let max_attempts = env::var("USER_PROVISIONING_MAX_ATTEMPTS")
+            .ok()
+            .and_then(|value| value.parse::<u32>().ok())
+            .unwrap_or(5);
+
+        Self::new(mode, batch_size, Duration::from_secs(interval_seconds), max_attempts)
+    }
+
+    pub fn is_deferred(&self) -> bool {
+        self.mode == ProvisioningMode::Deferred
+    }
+
+    /// Wake the worker after a karyawan was inserted without an account.
+    pub fn schedule(&self) {
+        if self.is_deferred() {
+            self.notify.notify_one();
+        }
+    }
+
+    /// Provision every karyawan still marked `needs_account` in the
+    /// background, in either mode. Used after bulk inserts, where hashing one password per
+    /// row inside the request would cap throughput at a few rows per second.
+    pub fn provision_pending(self: &Arc<Self>, db: DatabaseConnection, password_pool: Arc<PasswordPool>) {
+        if self.is_deferred() {
+            self.schedule();
+            return;
+        }
+
+        let provisioner = self.clone();
+        tokio::spawn(async move {
+            let _guard = provisioner.drain_lock.lock().await;
+            provisioner.drain(&db, &password_pool).await;
+        });
+    }
+
+    /// Start the worker loop. Does nothing in sync mode.
+    pub fn spawn(self: &Arc<Self>, db: DatabaseConnection, password_pool: Arc<PasswordPool>) {
+        if !self.is_deferred() {
+            return;
+        }
+
+        let provisioner = self.clone();
+        tokio::spawn(async move {
+            println!("✅ Deferred user provisioning worker started");
+            loop {
+                provisioner.drain(&db, &password_pool).await;
+
+                tokio::select! {
+                    _ = provisioner.notify.notified() => {}
+                    _ = tokio::time::sleep(provisioner.poll_interval) => {}
+                }
+            }
+        });
+    }
+
+    pub fn stats(&self) -> ProvisioningStats {
+        ProvisioningStats {
+            mode: self.mode,
+            batches: self.batches.load(Ordering::Relaxed),
+            provisioned: self.provisioned.load(Ordering::Relaxed),
+            reused_accounts: self.reused.load(Ordering::Relaxed),
+            failures: self.failures.load(Ordering::Relaxed),
+            retrying: self.retries.lock().unwrap().len(),
+        }
+    }
+
+    /// Walk every marked karyawan once, batch by batch.
+    async fn drain(&self, db: &DatabaseConnection, password_pool: &PasswordPool) {
+        let mut after_id = 0;
+        loop {
+            match self.provision_batch(db, password_pool, after_id).await {
+                Ok(Some(last_id)) => after_id = last_id,
+                Ok(None) => break,
+                Err(err) => {
+                    eprintln!("⚠️  User provisioning batch failed: {}", err);
+                    break;
+                }
+            }
+        }
+    }
+
+    /// Provision one batch of karyawan with `id > after_id`.
+    /// Returns the last id scanned, or `None` when nothing is pending.
+    async fn provision_batch(
+        &self,
+        db: &DatabaseConnection,
+        password_pool: &PasswordPool,
+        after_id: i32,
+    ) -> Result<Option<i32>, DbErr> {
+        let pending: Vec<(i32, String)> = KaryawanEntity::find()
+            .select_only()
+            .column(KaryawanColumn::Id)
+            .column(KaryawanColumn::Nama)
+            .filter(KaryawanColumn::NeedsAccount.eq(true))
+            .filter(KaryawanColumn::UserId.is_null())
+            .filter(KaryawanColumn::Id.gt(after_id))
+            .order_by_asc(KaryawanColumn::Id)
+            .limit(self.batch_size)
+            .into_tuple()
+            .all(db)
+            .await?;
+
+        let last_id = match pending.last() {
+            Some((id, _)) => *id,
+            None => return Ok(None),
+        };
+        self.batches.fetch_add(1, Ordering::Relaxed);
+
+        let ready: Vec<(i32, String)> = pending
+            .into_iter()
+            .filter(|(karyawan_id, _)| self.is_due(*karyawan_id))
+            .collect();
+        if ready.is_empty() {
+            return Ok(Some(last_id));
+        }
+
+        // Reuse accounts that already exist for the generated usernames
+        let mut usernames: Vec<String> = ready.iter().map(|(_, nama)| karyawan_username(nama)).collect();
+        usernames.sort();
+        usernames.dedup();
+
+        let mut accounts: HashMap<String, i32> = UserEntity::find()
+            .select_only()
+            .column(UserColumn::Username)
+            .column(UserColumn::Id)
+            .filter(UserColumn::Username.is_in(usernames))
+            .into_tuple::<(String, i32)>()
+            .all(db)
+            .await?
+            .into_iter()
+            .collect();
+
+        let mut assignments: Vec<(i32, i32)> = Vec::with_capacity(ready.len());
+        let mut abandoned: Vec<i32> = Vec::new();
+        for (karyawan_id, nama) in ready {
+            let username = karyawan_username(&nama);
+            let user_id = match accounts.get(&username) {
+                Some(user_id) => {
+                    self.reused.fetch_add(1, Ordering::Relaxed);
+                    *user_id
+                }
+                None => match create_account(db, password_pool, &username, &nama).await {
+                    Ok(user_id) => {
+                        accounts.insert(username, user_id);
+                        user_id
+                    }
+                    Err(err) => {
+                        if self.record_failure(karyawan_id, &err) {
+                            abandoned.push(karyawan_id);
+                        }
+                        continue;
+                    }
+                },
+            };
+            assignments.push((karyawan_id, user_id));
+        }
+
+        self.backfill(db, &assignments).await?;
+        self.abandon(db, abandoned).await?;
+        Ok(Some(last_id))
+    }
+
+    /// Set `user_id` for the whole batch in one `UPDATE ... CASE`.
+    async fn backfill(&self, db: &DatabaseConnection, assignments: &[(i32, i32)]) -> Result<(), DbErr> {
+        let (first, rest) = match assignments.split_first() {
+            Some(split) => split,
+            None => return Ok(()),
+        };
+
+        let mut user_id_case = Expr::case(KaryawanColumn::Id.eq(first.0), first.1);
+        for (karyawan_id, user_id) in rest {
+            user_id_case = user_id_case.case(KaryawanColumn::Id.eq(*karyawan_id), *user_id);
+        }
+
+        let karyawan_ids: Vec<i32> = assignments.iter().map(|(karyawan_id, _)| *karyawan_id).collect();
+        KaryawanEntity::update_many()
+            .col_expr(KaryawanColumn::UserId, user_id_case.into())
+            .col_expr(KaryawanColumn::NeedsAccount, Expr::value(false))
+            .filter(KaryawanColumn::Id.is_in(karyawan_ids.clone()))
+            .filter(KaryawanColumn::UserId.is_null())
+            .exec(db)
+            .await?;
+
+        self.provisioned.fetch_add(assignments.len() as u64, Ordering::Relaxed);
+        let mut retries = self.retries.lock().unwrap();
+        for karyawan_id in karyawan_ids {
+            retries.remove(&karyawan_id);
+        }
+
+        Ok(())
+    }
+
+    /// Clear the marker of rows that ran out of attempts, so later drains
+    /// stop scanning them.
+    async fn abandon(&self, db: &DatabaseConnection, karyawan_ids: Vec<i32>) -> Result<(), DbErr> {
+        if karyawan_ids.is_empty() {
+            return Ok(());
+        }
+
+        KaryawanEntity::update_many()
+            .col_expr(KaryawanColumn::NeedsAccount, Expr::value(false))
+            .filter(KaryawanColumn::Id.is_in(karyawan_ids.clone()))
+            .exec(db)
+            .await?;
+
+        let mut retries = self.retries.lock().unwrap();
+        for karyawan_id in karyawan_ids {
+            retries.remove(&karyawan_id);
+        }
+        Ok(())
+    }
+
+    fn is_due(&self, karyawan_id: i32) -> bool {
+        match self.retries.lock().unwrap().get(&karyawan_id) {
+            Some(state) => state.attempts < self.max_attempts && state.next_attempt <= Instant::now(),
+            None => true,
+        }
+    }
+
+    /// Count a failed attempt; returns `true` once the row has given up.
+    fn record_failure(&self, karyawan_id: i32, err: &anyhow::Error) -> bool {
+        self.failures.fetch_add(1, Ordering::Relaxed);
+
+        let mut retries = self.retries.lock().unwrap();
+        let state = retries.entry(karyawan_id).or_insert(RetryState {
+            attempts: 0,
+            next_attempt: Instant::now(),
+        });
+        state.attempts += 1;
+        let backoff_seconds = (1u64 << state.attempts.min(8)).min(300);
+        state.next_attempt = Instant::now() + Duration::from_secs(backoff_seconds);
+
+        if state.attempts >= self.max_attempts {
+            eprintln!(
+                "❌ Giving up on user account for karyawan {} after {} attempts: {}",
+                karyawan_id, state.attempts, err
+            );
+            true
+        } else {
+            eprintln!(
+                "⚠️  Failed to create user account for karyawan {} (attempt {}): {}",
+                karyawan_id, state.attempts, err
+            );
+            false
+        }
+    }
+}
+
+/// Insert the account for `username`, or return the id of the row a
+/// concurrent request created first.
+async fn create_account(
+    db: &DatabaseConnection,
+    password_pool: &PasswordPool,
+    username: &str,
+    nama: &str,
+) -> anyhow::Result<i32> {
+    let password_hash = password_pool
+        .hash_password(DEFAULT_KARYAWAN_PASSWORD)
+        .await
+        .map_err(|e| anyhow::anyhow!("Failed to hash password: {}", e))?;
+
+    let new_user = UserActiveModel {
+        username: Set(username.to_string()),
+        email: Set(karyawan_email(username)),
+        password_hash: Set(password_hash),
+        full_name: Set(Some(nama.to_string())),
+        is_active: Set(true),
+        ..Default::default()
+    };
+
+    match new_user.insert(db).await {
+        Ok(user) => Ok(user.id),
+        Err(insert_err) => {
+            let existing = UserEntity::find()
+                .filter(UserColumn::Username.eq(username))
+                .one(db)
+                .await?;
+            match existing {
+                Some(user) => Ok(user.id),
+                None => Err(anyhow::anyhow!("Database error: {}", insert_err)),
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_karyawan_username() {
+        assert_eq!(karyawan_username("Budi Santoso"), "budisantoso");
+        assert_eq!(karyawan_email("budisantoso"), "budisantoso@karyawan.local");
+    }
+
+    #[test]
+    fn test_retry_backoff() {
+        let provisioner = UserProvisioner::new(ProvisioningMode::Deferred, 10, Duration::from_secs(1), 2);
+        let err = anyhow::anyhow!("boom");
+
+        assert!(provisioner.is_due(1));
+        assert!(!provisioner.record_failure(1, &err));
+        assert!(!provisioner.is_due(1));
+
+        provisioner.retries.lock().unwrap().get_mut(&1).unwrap().next_attempt = Instant::now();
+        assert!(provisioner.is_due(1));
+
+        assert!(provisioner.record_failure(1, &err));
+        provisioner.retries.lock().unwrap().get_mut(&1).unwrap().next_attempt = Instant::now();
+        assert!(!provisioner.is_due(1));
+        assert_eq!(provisioner.stats().failures, 2);
+    }
+}
@@ -0,0 +1,253 @@
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::time::{Duration, Instant};
+use uuid::Uuid;
+
+use crate::models::user::Model as UserModel;
+
+/// How often expired sessions are swept out of the store.
+const SWEEP_INTERVAL: Duration = Duration::from_secs(60);
+
+/// Who a session belongs to. `security_epoch` is the epoch at login, so a
+/// refresh can tell whether it was bumped since.
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub struct RefreshSubject {
+    pub user_id: i32,
+    pub username: String,
+    pub email: String,
+    pub security_epoch: i32,
+}
+
+impl From<&UserModel> for RefreshSubject {
+    fn from(user: &UserModel) -> Self {
+        Self {
+            user_id: user.id,
+            username: user.username.clone(),
+            email: user.email.clone(),
+            security_epoch: user.security_epoch,
+        }
+    }
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum RefreshError {
+    /// Unknown session: never issued, logged out, swept or lost on restart.
+    Unknown,
+    /// The session has not been used within the refresh token lifetime.
+    Expired,
+    /// An already rotated token was presented again; the session is revoked.
+    Reused,
+}
+
+#[derive(Debug)]
+struct RefreshSession {
+    subject: RefreshSubject,
+    generation: u32,
+    expires_at: Instant,
+}
+
+/// Server-side store of refresh-token sessions.
+///
+/// One entry per login ("family"), holding only the current rotation
+/// generation. Every refresh bumps the generation, so each refresh token is
+/// single use; presenting an older generation means the token leaked and the
+/// whole family is revoked. The store is in memory: a restart logs every
+/// session out, clients fall back to `/api/auth/login`.
+pub struct RefreshStore {
+    ttl: Duration,
+    sessions: Mutex<HashMap<u128, RefreshSession>>,
+    issued: AtomicU64,
+    rotated: AtomicU64,
+    reuse_detected: AtomicU64,
+    rejected: AtomicU64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct RefreshStoreStats {
+    pub sessions: usize,
+    pub ttl_seconds: u64,
+    pub issued: u64,
+    pub rotated: u64,
+    pub reuse_detected: u64,
+    pub rejected: u64,
+}
+
+impl RefreshStore {
+    pub fn new(ttl: Duration) -> Self {
+        Self {
+            ttl,
+            sessions: Mutex::new(HashMap::new()),
+            issued: AtomicU64::new(0),
+            rotated: AtomicU64::new(0),
+            reuse_detected: AtomicU64::new(0),
+            rejected: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `REFRESH_TOKEN_EXPIRE_DAYS` (default 7).
+    pub fn from_env() -> Self {
+        let days = env::var("REFRESH_TOKEN_EXPIRE_DAYS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(7);
+
+        Self::new(Duration::from_secs(days.max(1) * 24 * 3600))
+    }
+
+    /// Lifetime of a refresh token in seconds.
+    pub fn ttl_seconds(&self) -> i64 {
+        self.ttl.as_secs() as i64
+    }
+
+    /// Start a new session and return its family id and first generation.
+    pub fn issue(&self, subject: RefreshSubject) -> (String, u32) {
+        let family = Uuid::new_v4();
+        let session = RefreshSession {
+            subject,
+            generation: 0,
+            expires_at: Instant::now() + self.ttl,
+        };
+
+        self.sessions.lock().unwrap().insert(family.as_u128(), session);
+        self.issued.fetch_add(1, Ordering::Relaxed);
+
+        (family.simple().to_string(), 0)
+    }
+
+    /// Consume generation `generation` of `family` and advance the session.
+    ///
+    /// Returns the session subject and the generation to sign into the next
+    /// refresh token. The session lifetime slides with every rotation.
+    pub fn rotate(&self, family: &str, generation: u32) -> Result<(RefreshSubject, u32), RefreshError> {
+        let result = match Uuid::parse_str(family) {
+            Ok(family) => self.rotate_family(family.as_u128(), generation),
+            Err(_) => Err(RefreshError::Unknown),
+        };
+
+        match result {
+            Ok(_) => {
+                self.rotated.fetch_add(1, Ordering::Relaxed);
+            }
+            Err(RefreshError::Reused) => {
+                self.reuse_detected.fetch_add(1, Ordering::Relaxed);
+            }
+            Err(_) => {
+                self.rejected.fetch_add(1, Ordering::Relaxed);
+            }
+        }
+        result
+    }
+
+    fn rotate_family(&self, family: u128, generation: u32) -> Result<(RefreshSubject, u32), RefreshError> {
+        let now = Instant::now();
+        let mut sessions = self.sessions.lock().unwrap();
+
+        let session = sessions.get_mut(&family).ok_or(RefreshError::Unknown)?;
+        if session.expires_at <= now {
+            sessions.remove(&family);
+            return Err(RefreshError::Expired);
+        }
+        if session.generation != generation {
+            sessions.remove(&family);
+            return Err(RefreshError::Reused);
+        }
+
+        session.generation += 1;
+        session.expires_at = now + self.ttl;
+        Ok((session.subject.clone(), session.generation))
+    }
+
+    /// End one session (logout). Returns whether it existed.
+    pub fn revoke(&self, family: &str) -> bool {
+        match Uuid::parse_str(family) {
+            Ok(family) => self.sessions.lock().unwrap().remove(&family.as_u128()).is_some(),
+            Err(_) => false,
+        }
+    }
+
+    /// End every session of `user_id`, e.g. once the account is deactivated.
+    pub fn revoke_user(&self, user_id: i32) {
+        self.sessions
+            .lock()
+            .unwrap()
+            .retain(|_, session| session.subject.user_id != user_id);
+    }
+
+    /// Drop sessions whose lifetime has passed.
+    pub fn purge_expired(&self) {
+        let now = Instant::now();
+        self.sessions
+            .lock()
+            .unwrap()
+            .retain(|_, session| session.expires_at > now);
+    }
+
+    /// Start the background sweep of expired sessions.
+    pub fn spawn(self: &Arc<Self>) {
+        let store = self.clone();
+        tokio::spawn(async move {
+            loop {
+                tokio::time::sleep(SWEEP_INTERVAL).await;
+                store.purge_expired();
+            }
+        });
+    }
+
+    pub fn stats(&self) -> RefreshStoreStats {
+        RefreshStoreStats {
+            sessions: self.sessions.lock().unwrap().len(),
+            ttl_seconds: self.ttl.as_secs(),
+            issued: self.issued.load(Ordering::Relaxed),
+            rotated: self.rotated.load(Ordering::Relaxed),
+            reuse_detected: self.reuse_detected.load(Ordering::Relaxed),
+            rejected: self.rejected.load(Ordering::Relaxed),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn subject(user_id: i32) -> RefreshSubject {
+        RefreshSubject {
+            user_id,
+            username: format!("user{}", user_id),
+            email: format!("user{}@example.com", user_id),
+            security_epoch: 0,
+        }
+    }
+
+    #[test]
+    fn test_rotation_is_single_use() {
+        let store = RefreshStore::new(Duration::from_secs(60));
+        let (family, generation) = store.issue(subject(1));
+
+        let (rotated, next) = store.rotate(&family, generation).unwrap();
+        assert_eq!(rotated.user_id, 1);
+        assert_eq!(next, generation + 1);
+
+        // Replaying the old token revokes the whole session
+        assert_eq!(store.rotate(&family, generation), Err(RefreshError::Reused));
+        assert_eq!(store.rotate(&family, next), Err(RefreshError::Unknown));
+        assert_eq!(store.stats().reuse_detected, 1);
+    }
+
+    #[test]
+    fn test_expired_and_revoked_sessions() {
+        let store = RefreshStore::new(Duration::ZERO);
+        let (family, generation) = store.issue(subject(1));
+        assert_eq!(store.rotate(&family, generation), Err(RefreshError::Expired));
+
+        let store = RefreshStore::new(Duration::from_secs(60));
+        let (first, _) = store.issue(subject(1));
+        let (second, generation) = store.issue(subject(2));
+        assert!(store.revoke(&first));
+        store.revoke_user(2);
+        assert_eq!(store.rotate(&second, generation), Err(RefreshError::Unknown));
+        assert_eq!(store.stats().sessions, 0);
+    }
+}
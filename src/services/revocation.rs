@@ -0,0 +1,219 @@
+use sea_orm::{DatabaseConnection, DbErr, EntityTrait, QueryOrder, QuerySelect};
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, RwLock};
+use std::time::Duration;
+
+use crate::models::user::{Column as UserColumn, Entity as UserEntity};
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize)]
+#[serde(rename_all = "lowercase")]
+pub enum AuthMode {
+    /// Load the user row (or its cached copy) on every request (default).
+    Stateful,
+    /// Trust the claims and consult only the in-memory epoch table.
+    Stateless,
+}
+
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Revocation {
+    /// The token was issued before the user's current security epoch.
+    Revoked,
+    /// The account has been deactivated.
+    Inactive,
+    /// The account no longer exists.
+    Deleted,
+}
+
+#[derive(Debug, Clone, Copy)]
+struct SecurityState {
+    epoch: i32,
+    is_active: bool,
+}
+
+/// Users as of the last refresh.
+#[derive(Default)]
+struct Snapshot {
+    /// Users that differ from the defaults (`security_epoch > 0` or
+    /// `is_active = false`), so the map stays small.
+    entries: HashMap<i32, SecurityState>,
+    /// Every user id, sorted.
+    user_ids: Vec<i32>,
+}
+
+/// In-memory revocation table for the stateless auth mode.
+///
+/// Reloaded from the `users` table every `AUTH_EPOCH_REFRESH_SECONDS`; a
+/// token is rejected when its `security_epoch` claim is older than the stored
+/// epoch, the account is inactive, or the account was deleted. Ids above the
+/// highest one loaded belong to users registered since the last refresh and
+/// are accepted.
+pub struct EpochTable {
+    mode: AuthMode,
+    refresh_interval: Duration,
+    snapshot: RwLock<Snapshot>,
+    refreshes: AtomicU64,
+    refresh_failures: AtomicU64,
+    rejected: AtomicU64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct EpochTableStats {
+    pub mode: AuthMode,
+    pub entries: usize,
+    pub users: usize,
+    pub refresh_interval_seconds: u64,
+    pub refreshes: u64,
+    pub refresh_failures: u64,
+    pub rejected: u64,
+}
+
+impl EpochTable {
+    pub fn new(mode: AuthMode, refresh_interval: Duration) -> Self {
+        Self {
+            mode,
+            refresh_interval,
+            snapshot: RwLock::new(Snapshot::default()),
+            refreshes: AtomicU64::new(0),
+            refresh_failures: AtomicU64::new(0),
+            rejected: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `AUTH_MODE` (`stateful` or `stateless`, default `stateful`) and
+    /// `AUTH_EPOCH_REFRESH_SECONDS` (default 30).
+    pub fn from_env() -> Self {
+        let mode = match env::var("AUTH_MODE")
+            .unwrap_or_default()
+            .trim()
+            .to_lowercase()
+            .as_str()
+        {
+            "stateless" => AuthMode::Stateless,
+            _ => AuthMode::Stateful,
+        };
+        let refresh_seconds = env::var("AUTH_EPOCH_REFRESH_SECONDS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(30);
+
+        Self::new(mode, Duration::from_secs(refresh_seconds.max(1)))
+    }
+
+    pub fn is_stateless(&self) -> bool {
+        self.mode == AuthMode::Stateless
+    }
+
+    /// Check the epoch and active flag carried by a token.
+    pub fn check(&self, user_id: i32, token_epoch: i32, token_is_active: bool) -> Result<(), Revocation> {
+        let snapshot = self.snapshot.read().unwrap();
+        let deleted = snapshot.user_ids.last().map_or(false, |&max_id| user_id <= max_id)
+            && snapshot.user_ids.binary_search(&user_id).is_err();
+        let result = match snapshot.entries.get(&user_id) {
+            _ if deleted => Err(Revocation::Deleted),
+            Some(state) if !state.is_active => Err(Revocation::Inactive),
+            Some(state) if token_epoch < state.epoch => Err(Revocation::Revoked),
+            _ if !token_is_active => Err(Revocation::Inactive),
+            _ => Ok(()),
+        };
+        drop(snapshot);
+
+        if result.is_err() {
+            self.rejected.fetch_add(1, Ordering::Relaxed);
+        }
+        result
+    }
+
+    /// Reload every user's id, epoch and active flag.
+    pub async fn refresh(&self, db: &DatabaseConnection) -> Result<(), DbErr> {
+        let rows: Vec<(i32, i32, bool)> = UserEntity::find()
+            .select_only()
+            .column(UserColumn::Id)
+            .column(UserColumn::SecurityEpoch)
+            .column(UserColumn::IsActive)
+            .order_by_asc(UserColumn::Id)
+            .into_tuple()
+            .all(db)
+            .await?;
+
+        self.load(rows);
+        self.refreshes.fetch_add(1, Ordering::Relaxed);
+
+        Ok(())
+    }
+
+    /// Replace the snapshot with `(id, epoch, is_active)` rows in id order.
+    fn load(&self, rows: Vec<(i32, i32, bool)>) {
+        let mut snapshot = Snapshot {
+            entries: HashMap::new(),
+            user_ids: Vec::with_capacity(rows.len()),
+        };
+        for (id, epoch, is_active) in rows {
+            snapshot.user_ids.push(id);
+            if epoch > 0 || !is_active {
+                snapshot.entries.insert(id, SecurityState { epoch, is_active });
+            }
+        }
+        *self.snapshot.write().unwrap() = snapshot;
+    }
+
+    /// Periodically reload the table. Does nothing in stateful mode.
+    pub fn spawn(self: &Arc<Self>, db: DatabaseConnection) {
+        if !self.is_stateless() {
+            return;
+        }
+
+        let table = self.clone();
+        tokio::spawn(async move {
+            loop {
+                tokio::time::sleep(table.refresh_interval).await;
+                if let Err(err) = table.refresh(&db).await {
+                    table.refresh_failures.fetch_add(1, Ordering::Relaxed);
+                    eprintln!("⚠️  Failed to refresh auth epoch table: {}", err);
+                }
+            }
+        });
+    }
+
+    pub fn stats(&self) -> EpochTableStats {
+        let snapshot = self.snapshot.read().unwrap();
+        EpochTableStats {
+            mode: self.mode,
+            entries: snapshot.entries.len(),
+            users: snapshot.user_ids.len(),
+            refresh_interval_seconds: self.refresh_interval.as_secs(),
+            refreshes: self.refreshes.load(Ordering::Relaxed),
+            refresh_failures: self.refresh_failures.load(Ordering::Relaxed),
+            rejected: self.rejected.load(Ordering::Relaxed),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_epoch_checks() {
+        let table = EpochTable::new(AuthMode::Stateless, Duration::from_secs(30));
+
+        // Nothing loaded yet: every user is at epoch 0 and active
+        assert_eq!(table.check(1, 0, true), Ok(()));
+        assert_eq!(table.check(1, 0, false), Err(Revocation::Inactive));
+
+        table.load(vec![(1, 2, true), (3, 0, false), (4, 0, true)]);
+        assert_eq!(table.check(1, 1, true), Err(Revocation::Revoked));
+        assert_eq!(table.check(1, 2, true), Ok(()));
+        assert_eq!(table.check(3, 0, true), Err(Revocation::Inactive));
+        assert_eq!(table.check(4, 0, true), Ok(()));
+
+        // 2 was deleted; 5 registered after the refresh
+        assert_eq!(table.check(2, 0, true), Err(Revocation::Deleted));
+        assert_eq!(table.check(5, 0, true), Ok(()));
+
+        assert_eq!((table.stats().entries, table.stats().users), (2, 3));
+        assert_eq!(table.stats().rejected, 4);
+    }
+}
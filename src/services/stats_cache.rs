@@ -0,0 +1,152 @@
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::future::Future;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+
+use crate::models::stats::{GroupStats, StatsGroup};
+
+/// In-memory cache of the kantor/jabatan stats aggregates.
+///
+/// Entries stay valid until a karyawan, kantor or jabatan write calls
+/// [`StatsCache::invalidate`], so a dashboard refresh normally costs no
+/// query at all. `STATS_CACHE_SECONDS` bounds staleness from writes made by
+/// other processes against the same database.
+pub struct StatsCache {
+    ttl: Duration,
+    entries: Mutex<HashMap<StatsGroup, (Vec<GroupStats>, Instant)>>,
+    /// Bumped by every invalidation; a result whose query overlapped a
+    /// write is returned but not cached.
+    generation: AtomicU64,
+    hits: AtomicU64,
+    misses: AtomicU64,
+    invalidations: AtomicU64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct StatsCacheStats {
+    pub entries: usize,
+    pub ttl_seconds: u64,
+    pub hits: u64,
+    pub misses: u64,
+    pub invalidations: u64,
+}
+
+impl StatsCache {
+    pub fn new(ttl: Duration) -> Self {
+        Self {
+            ttl,
+            entries: Mutex::new(HashMap::new()),
+            generation: AtomicU64::new(0),
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+            invalidations: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `STATS_CACHE_SECONDS` (default 300, 0 disables caching).
+    pub fn from_env() -> Self {
+        let ttl_seconds = env::var("STATS_CACHE_SECONDS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(300);
+
+        Self::new(Duration::from_secs(ttl_seconds))
+    }
+
+    /// Return the cached stats for `group`, or run `load` and cache its result.
+    pub async fn get_or_load<F, E>(&self, group: StatsGroup, load: F) -> Result<Vec<GroupStats>, E>
+    where
+        F: Future<Output = Result<Vec<GroupStats>, E>>,
+    {
+        if let Some(stats) = self.get(group) {
+            self.hits.fetch_add(1, Ordering::Relaxed);
+            return Ok(stats);
+        }
+
+        self.misses.fetch_add(1, Ordering::Relaxed);
+        let generation = self.generation.load(Ordering::Acquire);
+        let stats = load.await?;
+        if !self.ttl.is_zero() {
+            let mut entries = self.entries.lock().unwrap();
+            if self.generation.load(Ordering::Acquire) == generation {
+                entries.insert(group, (stats.clone(), Instant::now()));
+            }
+        }
+        Ok(stats)
+    }
+
+    fn get(&self, group: StatsGroup) -> Option<Vec<GroupStats>> {
+        let entries = self.entries.lock().unwrap();
+        match entries.get(&group) {
+            Some((stats, loaded_at)) if loaded_at.elapsed() < self.ttl => Some(stats.clone()),
+            _ => None,
+        }
+    }
+
+    /// Drop every cached aggregate; called after writes that change them.
+    pub fn invalidate(&self) {
+        let mut entries = self.entries.lock().unwrap();
+        self.generation.fetch_add(1, Ordering::AcqRel);
+        self.invalidations.fetch_add(1, Ordering::Relaxed);
+        entries.clear();
+    }
+
+    pub fn stats(&self) -> StatsCacheStats {
+        StatsCacheStats {
+            entries: self.entries.lock().unwrap().len(),
+            ttl_seconds: self.ttl.as_secs(),
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            invalidations: self.invalidations.load(Ordering::Relaxed),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn group(headcount: i64) -> Vec<GroupStats> {
+        vec![GroupStats {
+            id: 1,
+            nama: "Pusat".to_string(),
+            headcount,
+            total_gaji: headcount * 5_000_000,
+            avg_gaji: None,
+            min_gaji: None,
+            max_gaji: None,
+        }]
+    }
+
+    #[tokio::test]
+    async fn test_cached_until_invalidated() {
+        let cache = StatsCache::new(Duration::from_secs(60));
+
+        let stats: Result<_, ()> = cache.get_or_load(StatsGroup::Kantor, async { Ok(group(2)) }).await;
+        assert_eq!(stats.unwrap()[0].headcount, 2);
+        let stats: Result<_, ()> = cache.get_or_load(StatsGroup::Kantor, async { Ok(group(3)) }).await;
+        assert_eq!(stats.unwrap()[0].headcount, 2);
+
+        cache.invalidate();
+        let stats: Result<_, ()> = cache.get_or_load(StatsGroup::Kantor, async { Ok(group(3)) }).await;
+        assert_eq!(stats.unwrap()[0].headcount, 3);
+        assert_eq!((cache.stats().hits, cache.stats().misses), (1, 2));
+    }
+
+    #[tokio::test]
+    async fn test_result_overlapping_a_write_is_not_cached() {
+        let cache = StatsCache::new(Duration::from_secs(60));
+
+        let stats: Result<_, ()> = cache
+            .get_or_load(StatsGroup::Jabatan, async {
+                cache.invalidate();
+                Ok(group(1))
+            })
+            .await;
+        assert!(stats.is_ok());
+        assert_eq!(cache.stats().entries, 0);
+    }
+}
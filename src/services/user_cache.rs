@@ -0,0 +1,289 @@
+use serde::Serialize;
+use std::collections::HashMap;
+use std::env;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Mutex;
+use std::time::{Duration, Instant};
+
+use crate::models::user::Model as User;
+
+const SHARD_COUNT: usize = 16;
+
+/// Bounded TTL cache of authenticated users, keyed by user id.
+///
+/// Used by `jwt_auth_layer` so that a valid token does not cost a MySQL round
+/// trip on every request. The map is split into mutex-guarded shards to keep
+/// lock contention low; when a shard is full, expired entries are dropped
+/// first and then the least recently used one is evicted.
+pub struct UserCache {
+    shards: Vec<Mutex<Shard>>,
+    ttl: Duration,
+    shard_capacity: usize,
+    hits: AtomicU64,
+    misses: AtomicU64,
+    evictions: AtomicU64,
+    invalidations: AtomicU64,
+}
+
+#[derive(Default)]
+struct Shard {
+    entries: HashMap<i32, Entry>,
+    clock: u64,
+}
+
+struct Entry {
+    user: User,
+    inserted_at: Instant,
+    last_used: u64,
+}
+
+#[derive(Debug, Clone, Serialize)]
+pub struct UserCacheStats {
+    pub enabled: bool,
+    pub entries: usize,
+    pub capacity: usize,
+    pub ttl_seconds: u64,
+    pub hits: u64,
+    pub misses: u64,
+    pub evictions: u64,
+    pub invalidations: u64,
+}
+
+impl UserCache {
+    /// A `ttl` or `max_entries` of zero disables caching entirely.
+    pub fn new(ttl: Duration, max_entries: usize) -> Self {
+        let shard_capacity = if max_entries == 0 {
+            0
+        } else {
+            (max_entries + SHARD_COUNT - 1) / SHARD_COUNT
+        };
+
+        Self {
+            shards: (0..SHARD_COUNT).map(|_| Mutex::new(Shard::default())).collect(),
+            ttl,
+            shard_capacity,
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+            evictions: AtomicU64::new(0),
+            invalidations: AtomicU64::new(0),
+        }
+    }
+
+    /// Reads `USER_CACHE_TTL_SECONDS` (default 60) and
+    /// `USER_CACHE_MAX_ENTRIES` (default 10000).
+    pub fn from_env() -> Self {
+        let ttl_seconds = env::var("USER_CACHE_TTL_SECONDS")
+            .ok()
+            .and_then(|value| value.parse::<u64>().ok())
+            .unwrap_or(60);
+        let max_entries = env::var("USER_CACHE_MAX_ENTRIES")
+            .ok()
+            .and_then(|value| value.parse::<usize>().ok())
+            .unwrap_or(10_000);
+
+        Self::new(Duration::from_secs(ttl_seconds), max_entries)
+    }
+
+    pub fn is_enabled(&self) -> bool {
+        self.shard_capacity > 0 && !self.ttl.is_zero()
+    }
+
+    pub fn get(&self, user_id: i32) -> Option<User> {
+        if !self.is_enabled() {
+            return None;
+        }
+
+        let mut shard = self.shard(user_id).lock().unwrap();
+        shard.clock += 1;
+        let clock = shard.clock;
+
+        let fresh = shard
+            .entries
+            .get(&user_id)
+            .map(|entry| entry.inserted_at.elapsed() < self.ttl);
+
+        let cached = match fresh {
+            Some(true) => shard.entries.get_mut(&user_id).map(|entry| {
+                entry.last_used = clock;
+                entry.user.clone()
+            }),
+            Some(false) => {
+                shard.entries.remove(&user_id);
+                None
+            }
+            None => None,
+        };
+
+        match cached {
+            Some(user) => {
+                self.hits.fetch_add(1, Ordering::Relaxed);
+                Some(user)
+            }
+            None => {
+                self.misses.fetch_add(1, Ordering::Relaxed);
+                None
+            }
+        }
+    }
+
+    pub fn insert(&self, user: User) {
+        if !self.is_enabled() {
+            return;
+        }
+
+        let mut shard = self.shard(user.id).lock().unwrap();
+        shard.clock += 1;
+        let clock = shard.clock;
+
+        if !shard.entries.contains_key(&user.id) && shard.entries.len() >= self.shard_capacity {
+            let ttl = self.ttl;
+            let before = shard.entries.len();
+            shard.entries.retain(|_, entry| entry.inserted_at.elapsed() < ttl);
+            let mut evicted = (before - shard.entries.len()) as u64;
+
+            if shard.entries.len() >= self.shard_capacity {
+                let oldest = shard
+                    .entries
+                    .iter()
+                    .min_by_key(|(_, entry)| entry.last_used)
+                    .map(|(id, _)| *id);
+                if let Some(id) = oldest {
+                    shard.entries.remove(&id);
+                    evicted += 1;
+                }
+            }
+
+            self.evictions.fetch_add(evicted, Ordering::Relaxed);
+        }
+
+        shard.entries.insert(
+            user.id,
+            Entry {
+                user,
+                inserted_at: Instant::now(),
+                last_used: clock,
+            },
+        );
+    }
+
+    /// Drop a single user, e.g. after it has been updated or deactivated.
+    pub fn invalidate(&self, user_id: i32) {
+        let mut shard = self.shard(user_id).lock().unwrap();
+        if shard.entries.remove(&user_id).is_some() {
+            self.invalidations.fetch_add(1, Ordering::Relaxed);
+        }
+    }
+
+    pub fn invalidate_all(&self) {
+        for shard in &self.shards {
+            let mut shard = shard.lock().unwrap();
+            let removed = shard.entries.len() as u64;
+            shard.entries.clear();
+            self.invalidations.fetch_add(removed, Ordering::Relaxed);
+        }
+    }
+
+    pub fn stats(&self) -> UserCacheStats {
+        let entries = self
+            .shards
+            .iter()
+            .map(|shard| shard.lock().unwrap().entries.len())
+            .sum();
+
+        UserCacheStats {
+            enabled: self.is_enabled(),
+            entries,
+            capacity: self.shard_capacity * SHARD_COUNT,
+            ttl_seconds: self.ttl.as_secs(),
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            evictions: self.evictions.load(Ordering::Relaxed),
+            invalidations: self.invalidations.load(Ordering::Relaxed),
+        }
+    }
+
+    fn shard(&self, user_id: i32) -> &Mutex<Shard> {
+        &self.shards[(user_id as u32 as usize) % SHARD_COUNT]
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn test_user(id: i32) -> User {
+        let now = chrono::Utc::now().naive_utc();
+        User {
+            id,
+            username: format!("user{}", id),
+            email: format!("user{}@example.com", id),
+            password_hash: "hash".to_string(),
+            full_name: None,
+            is_active: true,
+            security_epoch: 0,
+            created_at: now,
+            updated_at: now,
+        }
+    }
+
+    #[test]
+    fn test_hit_and_miss() {
+        let cache = UserCache::new(Duration::from_secs(60), 100);
+
+        assert!(cache.get(1).is_none());
+        cache.insert(test_user(1));
+        assert_eq!(cache.get(1).unwrap().username, "user1");
+
+        let stats = cache.stats();
+        assert_eq!(stats.hits, 1);
+        assert_eq!(stats.misses, 1);
+        assert_eq!(stats.entries, 1);
+    }
+
+    #[test]
+    fn test_expired_entries_are_misses() {
+        let cache = UserCache::new(Duration::from_millis(1), 100);
+
+        cache.insert(test_user(1));
+        std::thread::sleep(Duration::from_millis(5));
+        assert!(cache.get(1).is_none());
+        assert_eq!(cache.stats().entries, 0);
+    }
+
+    #[test]
+    fn test_capacity_evicts_least_recently_used() {
+        // One slot per shard: ids 1 and 17 land in the same shard
+        let cache = UserCache::new(Duration::from_secs(60), SHARD_COUNT);
+
+        cache.insert(test_user(1));
+        cache.insert(test_user(17));
+
+        assert!(cache.get(1).is_none());
+        assert!(cache.get(17).is_some());
+        assert_eq!(cache.stats().evictions, 1);
+    }
+
+    #[test]
+    fn test_invalidate() {
+        let cache = UserCache::new(Duration::from_secs(60), 100);
+
+        cache.insert(test_user(1));
+        cache.insert(test_user(2));
+        cache.invalidate(1);
+        assert!(cache.get(1).is_none());
+        assert!(cache.get(2).is_some());
+
+        cache.invalidate_all();
+        assert!(cache.get(2).is_none());
+        assert_eq!(cache.stats().invalidations, 2);
+    }
+
+    #[test]
+    fn test_disabled_cache() {
+        let cache = UserCache::new(Duration::from_secs(0), 100);
+
+        cache.insert(test_user(1));
+        assert!(cache.get(1).is_none());
+        assert!(!cache.stats().enabled);
+    }
+}
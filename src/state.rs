@@ -0,0 +1,121 @@
+use axum::extract::FromRef;
+use sea_orm::DatabaseConnection;
+use std::sync::Arc;
+use std::time::Duration;
+
+use crate::database::{PoolMonitor, ReadConnection, ReadReplica};
+use crate::services::auth::JwtService;
+use crate::services::count_cache::CountCache;
+use crate::services::login_throttle::LoginThrottle;
+use crate::services::password_pool::PasswordPool;
+use crate::services::provisioning::UserProvisioner;
+use crate::services::refresh::RefreshStore;
+use crate::services::stats_cache::StatsCache;
+use crate::services::revocation::EpochTable;
+use crate::services::user_cache::UserCache;
+
+/// Shared application state handed to every router.
+///
+/// Handlers that only need the database keep extracting
+/// `State<DatabaseConnection>`; the `FromRef` impls below project the
+/// individual pieces out of the state.
+#[derive(Clone)]
+pub struct AppState {
+    pub db: DatabaseConnection,
+    pub jwt: Arc<JwtService>,
+    pub user_cache: Arc<UserCache>,
+    pub password_pool: Arc<PasswordPool>,
+    pub user_provisioner: Arc<UserProvisioner>,
+    pub epochs: Arc<EpochTable>,
+    pub refresh_tokens: Arc<RefreshStore>,
+    pub login_throttle: Arc<LoginThrottle>,
+    pub db_pool: Arc<PoolMonitor>,
+    pub read_replica: Arc<ReadReplica>,
+    pub list_counts: Arc<CountCache>,
+    pub karyawan_stats: Arc<StatsCache>,
+}
+
+impl AppState {
+    pub fn new(db: DatabaseConnection, jwt: JwtService) -> Self {
+        Self {
+            db,
+            jwt: Arc::new(jwt),
+            user_cache: Arc::new(UserCache::from_env()),
+            password_pool: Arc::new(PasswordPool::from_env()),
+            user_provisioner: Arc::new(UserProvisioner::from_env()),
+            epochs: Arc::new(EpochTable::from_env()),
+            refresh_tokens: Arc::new(RefreshStore::from_env()),
+            login_throttle: Arc::new(LoginThrottle::from_env()),
+            db_pool: Arc::new(PoolMonitor::from_env()),
+            read_replica: Arc::new(ReadReplica::new(None, Duration::from_secs(5))),
+            list_counts: Arc::new(CountCache::from_env()),
+            karyawan_stats: Arc::new(StatsCache::from_env()),
+        }
+    }
+
+    /// Route read-only handlers to `read_replica` (see [`ReadConnection`]).
+    pub fn with_read_replica(mut self, read_replica: ReadReplica) -> Self {
+        self.read_replica = Arc::new(read_replica);
+        self
+    }
+}
+
+impl FromRef<AppState> for DatabaseConnection {
+    fn from_ref(state: &AppState) -> Self {
+        state.db.clone()
+    }
+}
+
+impl FromRef<AppState> for ReadConnection {
+    fn from_ref(state: &AppState) -> Self {
+        ReadConnection(state.read_replica.connection(&state.db))
+    }
+}
+
+impl FromRef<AppState> for Arc<JwtService> {
+    fn from_ref(state: &AppState) -> Self {
+        state.jwt.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<PasswordPool> {
+    fn from_ref(state: &AppState) -> Self {
+        state.password_pool.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<UserProvisioner> {
+    fn from_ref(state: &AppState) -> Self {
+        state.user_provisioner.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<RefreshStore> {
+    fn from_ref(state: &AppState) -> Self {
+        state.refresh_tokens.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<LoginThrottle> {
+    fn from_ref(state: &AppState) -> Self {
+        state.login_throttle.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<UserCache> {
+    fn from_ref(state: &AppState) -> Self {
+        state.user_cache.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<CountCache> {
+    fn from_ref(state: &AppState) -> Self {
+        state.list_counts.clone()
+    }
+}
+
+impl FromRef<AppState> for Arc<StatsCache> {
+    fn from_ref(state: &AppState) -> Self {
+        state.karyawan_stats.clone()
+    }
+}
@@ -107,6 +107,125 @@ pub async fn validate_jabatan_id_exists(
     }
 }
 
+/// Hasil dari [`validate_karyawan_references`].
+#[derive(Debug, Default, PartialEq)]
+pub struct KaryawanReferences {
+    /// ID user dengan username yang dicari, jika sudah ada.
+    pub existing_user_id: Option<i32>,
+}
+
+#[derive(Debug, sea_orm::FromQueryResult)]
+struct ReferenceRow {
+    kantor_exists: i64,
+    jabatan_exists: i64,
+    user_id: Option<i32>,
+}
+
+// Validasi kantor_id dan jabatan_id (plus lookup username opsional) dalam satu query.
+// Error berupa (message, detail) dengan pesan yang sama seperti
+// validate_kantor_id_exists / validate_jabatan_id_exists; kantor dicek lebih dulu.
+pub async fn validate_karyawan_references(
+    kantor_id: i32,
+    jabatan_id: i32,
+    username: Option<&str>,
+    db: &sea_orm::DatabaseConnection,
+) -> Result<KaryawanReferences, (String, String)> {
+    use sea_orm::{ConnectionTrait, FromQueryResult, Statement};
+
+    if kantor_id <= 0 {
+        return Err((
+            "Invalid kantor_id".to_string(),
+            "kantor_id wajib diisi dan harus berupa angka positif".to_string(),
+        ));
+    }
+    if jabatan_id <= 0 {
+        return Err((
+            "Invalid jabatan_id".to_string(),
+            "jabatan_id wajib diisi dan harus berupa angka positif".to_string(),
+        ));
+    }
+
+    let mut values: Vec<sea_orm::Value> = vec![kantor_id.into(), jabatan_id.into()];
+    let user_lookup = match username {
+        Some(username) => {
+            values.push(username.into());
+            "(SELECT id FROM users WHERE username = ? LIMIT 1)"
+        }
+        None => "NULL",
+    };
+    let statement = Statement::from_sql_and_values(
+        db.get_database_backend(),
+        format!(
+            "SELECT EXISTS(SELECT 1 FROM kantor WHERE id = ?) AS kantor_exists, \
+             EXISTS(SELECT 1 FROM jabatan WHERE id = ?) AS jabatan_exists, \
+             {} AS user_id",
+            user_lookup
+        ),
+        values,
+    );
+
+    let row = match ReferenceRow::find_by_statement(statement).one(db).await {
+        Ok(Some(row)) => row,
+        Ok(None) => {
+            return Err((
+                "Invalid kantor_id".to_string(),
+                format!("Kantor dengan ID {} tidak ditemukan di database", kantor_id),
+            ));
+        }
+        Err(err) => {
+            return Err((
+                "Failed to validate references".to_string(),
+                format!("Error saat mengecek kantor dan jabatan di database: {}", err),
+            ));
+        }
+    };
+
+    if row.kantor_exists == 0 {
+        return Err((
+            "Invalid kantor_id".to_string(),
+            format!("Kantor dengan ID {} tidak ditemukan di database", kantor_id),
+        ));
+    }
+    if row.jabatan_exists == 0 {
+        return Err((
+            "Invalid jabatan_id".to_string(),
+            format!("Jabatan dengan ID {} tidak ditemukan di database", jabatan_id),
+        ));
+    }
+
+    Ok(KaryawanReferences {
+        existing_user_id: row.user_id,
+    })
+}
+
+// Ubah pelanggaran foreign key dari INSERT/UPDATE karyawan menjadi error yang
+// sama seperti validate_karyawan_references, sehingga update bisa langsung
+// mengandalkan constraint fk_karyawan_* tanpa query pengecekan terlebih dulu.
+pub fn karyawan_reference_error(
+    err: &sea_orm::DbErr,
+    kantor_id: Option<i32>,
+    jabatan_id: Option<i32>,
+) -> Option<(String, String)> {
+    let message = match err.sql_err() {
+        Some(sea_orm::SqlErr::ForeignKeyConstraintViolation(message)) => message,
+        _ => return None,
+    };
+
+    if message.contains("fk_karyawan_kantor_id") {
+        Some((
+            "Invalid kantor_id".to_string(),
+            format!("Kantor dengan ID {} tidak ditemukan di database", kantor_id.unwrap_or_default()),
+        ))
+    } else if message.contains("fk_karyawan_jabatan_id") {
+        Some((
+            "Invalid jabatan_id".to_string(),
+            format!("Jabatan dengan ID {} tidak ditemukan di database", jabatan_id.unwrap_or_default()),
+        ))
+    } else {
+        None
+    }
+}
+
 // Function untuk menghandle validation errors
 pub fn handle_validation_errors(validation_errors: validator::ValidationErrors) -> Vec<String> {
     validation_errors
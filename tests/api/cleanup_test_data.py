@@ -24,31 +24,49 @@ def cleanup():
     admin_token = login_response.json()['data']['token']
     headers = {"Authorization": f"Bearer {admin_token}"}
     
-    # Get all karyawan
-    karyawan_response = requests.get(
-        f"{BASE_URL}/api/karyawans",
-        headers=headers
-    )
-    
-    if karyawan_response.status_code != 200:
-        print("❌ Failed to get karyawan list")
-        return
-    
-    karyawans = karyawan_response.json()['data']
+    # Get all karyawan (the list endpoint is paginated)
+    karyawans = []
+    cursor = None
+    while True:
+        params = {"limit": 200}
+        if cursor:
+            params["cursor"] = cursor
+        karyawan_response = requests.get(
+            f"{BASE_URL}/api/karyawans",
+            headers=headers,
+            params=params
+        )
+
+        if karyawan_response.status_code != 200:
+            print("❌ Failed to get karyawan list")
+            return
+
+        body = karyawan_response.json()
+        karyawans.extend(body['data'] or [])
+        cursor = (body.get('page') or {}).get('next_cursor')
+        if not cursor:
+            break
     
-    # Delete test karyawan (contains "Test" in name or has user_id 9)
+    # Delete test karyawan (contains "Test" in name or has user_id 9) in one request
+    targets = [
+        k for k in karyawans
+        if 'Test' in k.get('nama', '') or k.get('user_id') == 9
+    ]
     deleted_count = 0
-    for k in karyawans:
-        if 'Test' in k.get('nama', '') or k.get('user_id') == 9:
-            delete_response = requests.delete(
-                f"{BASE_URL}/api/karyawans/{k['id']}",
-                headers=headers
-            )
-            if delete_response.status_code in [200, 204]:
-                print(f"✅ Deleted karyawan: {k['nama']} (ID: {k['id']}, User ID: {k.get('user_id')})")
-                deleted_count += 1
-            else:
-                print(f"❌ Failed to delete karyawan {k['id']}: {delete_response.status_code}")
+    if targets:
+        delete_response = requests.delete(
+            f"{BASE_URL}/api/karyawans/bulk",
+            headers=headers,
+            json={"ids": [k['id'] for k in targets]}
+        )
+        if delete_response.status_code in [200, 204] and delete_response.json().get('success'):
+            deleted_ids = set(delete_response.json()['data']['ids'])
+            for k in targets:
+                if k['id'] in deleted_ids:
+                    print(f"✅ Deleted karyawan: {k['nama']} (ID: {k['id']}, User ID: {k.get('user_id')})")
+                    deleted_count += 1
+        else:
+            print(f"❌ Failed to delete test karyawan: {delete_response.status_code}")
     
     print(f"\n🎉 Cleanup complete! Deleted {deleted_count} test karyawan")
 